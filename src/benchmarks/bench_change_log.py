@@ -0,0 +1,56 @@
+"""
+Синхронизация клиента после небольшого количества изменений: повторное чтение списка справочников и всех
+элементов против запроса журнала изменений /changes/?since=<токен>. Также время записи всех элементов
+загруженной версии в журнал (changelog.record_version_elements).
+    python -m benchmarks.bench_change_log
+"""
+import time
+
+from .utils import best_of, create_ref_book, setup_django
+
+REF_BOOKS_COUNT = 5
+ELEMENTS_COUNT = 20000
+CHANGES_COUNT = 100
+
+
+def main():
+    setup_django()
+
+    from django.db import transaction
+    from django.test import Client
+
+    from reference_books import changelog, models
+
+    versions = []
+    for i in range(REF_BOOKS_COUNT):
+        ref_book, version = create_ref_book(f'REF-{i}', ELEMENTS_COUNT)
+        versions.append(version)
+        with transaction.atomic():
+            start = time.perf_counter()
+            changelog.record_version_elements(version.id)
+            elapsed = time.perf_counter() - start
+    print(f'record_version_elements, {ELEMENTS_COUNT} elements: {elapsed * 1000:.1f} ms')
+    token = models.ChangeLogEntry.objects.latest('id').id
+    elements = models.ReferenceBookElement.objects.filter(ref_book_version__in=versions).order_by('?')[:CHANGES_COUNT]
+    for element in elements:
+        element.value = f'Новое {element.value}'
+        element.save()
+
+    client = Client()
+
+    def poll_everything():
+        ref_books = client.get('/refbooks/').json()['refbooks']
+        return [client.get(f'/refbooks/{ref_book["id"]}/elements/').content for ref_book in ref_books]
+
+    def read_changes():
+        return client.get('/changes/', {'since': token}).json()
+
+    print(f'{REF_BOOKS_COUNT} ref books x {ELEMENTS_COUNT} elements, {CHANGES_COUNT} changed elements')
+    print(f'all ref books and elements: {best_of(poll_everything, repeat=3) * 1000:8.1f} ms, '
+          f'{sum(map(len, poll_everything()))} bytes')
+    print(f'/changes/?since=<token>:    {best_of(read_changes, repeat=5, number=10) * 1000:8.1f} ms, '
+          f'{len(client.get("/changes/", {"since": token}).content)} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Размер и время ответа списка элементов (20000 элементов) без сжатия и с каждой доступной кодировкой:
+для текущей версии (сжатие при каждом запросе), прошлой версии (сжатая копия в общем кэше)
+и готовых файлов (PAYLOAD_ROOT).
+    python -m benchmarks.bench_compression
+"""
+import tempfile
+from datetime import timedelta
+
+from .utils import best_of, create_ref_book, setup_django
+
+ELEMENTS_COUNT = 20000
+
+
+def main():
+    setup_django()
+
+    from django.test import Client, override_settings
+    from django.utils.timezone import localdate
+
+    from reference_books import models
+    from reference_books.compression import get_encodings
+
+    ref_book, version = create_ref_book('ICD-10', ELEMENTS_COUNT, date=localdate() - timedelta(days=1))
+    current_version = models.ReferenceBookVersion.objects.create(ref_book=ref_book, version='2.0', date=localdate())
+    models.ReferenceBookElement.objects.bulk_create(
+        models.ReferenceBookElement(ref_book_version=current_version, code=element.code, value=element.value)
+        for element in models.ReferenceBookElement.objects.filter(ref_book_version=version)
+    )
+    client = Client()
+    url = f'/refbooks/{ref_book.id}/elements/'
+
+    def get(params, encoding):
+        response = client.get(url, params, HTTP_ACCEPT_ENCODING=encoding)
+        return len(b''.join(response.streaming_content) if response.streaming else response.content)
+
+    cases = {
+        'current version': ({}, {}),
+        'past version': ({'version': '1.0'}, {}),
+    }
+    with tempfile.TemporaryDirectory() as payload_root:
+        cases['payload file'] = ({}, {'PAYLOAD_ROOT': payload_root})
+        for name, (params, reference_books_settings) in cases.items():
+            with override_settings(REFERENCE_BOOKS=reference_books_settings):
+                for encoding in ['identity', *get_encodings()]:
+                    size = get(params, encoding)
+                    timing = best_of(lambda: get(params, encoding), repeat=10)
+                    print(f'{name:<16} {encoding:<9} {size / 1024:9.1f} KB {timing * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
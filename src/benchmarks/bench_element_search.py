@@ -0,0 +1,43 @@
+"""
+Время поиска элементов справочника (подсказки при вводе) по коду и значению.
+    python -m benchmarks.bench_element_search
+"""
+from .utils import best_of, create_ref_book, setup_django
+
+ELEMENTS_COUNT = 100000
+LIMIT = 20
+QUERIES = {
+    'code prefix': 'A0012',
+    'code prefix, 10 found': 'A09999',
+    'value, few matches': 'элемента 4242',
+    'value, all match': 'значение',
+}
+
+
+def main():
+    setup_django()
+
+    from django.test import Client
+
+    from reference_books import models, services
+
+    ref_book, version = create_ref_book('ICD-10', ELEMENTS_COUNT)
+    # Элементы другой версии того же справочника также попадают в индекс значений.
+    other_version = models.ReferenceBookVersion.objects.create(ref_book=ref_book, version='0.9', date='2000-01-01')
+    models.ReferenceBookElement.objects.bulk_create(
+        models.ReferenceBookElement(ref_book_version=other_version, code=f'A{i:06d}', value=f'Значение элемента {i}')
+        for i in range(ELEMENTS_COUNT)
+    )
+    client = Client()
+    url = f'/refbooks/{ref_book.id}/elements/search/'
+    print(f'{ELEMENTS_COUNT} elements per version, limit {LIMIT}')
+    for name, query in QUERIES.items():
+        found = len(services.search_elements(ref_book.id, query, LIMIT))
+        service_time = best_of(lambda: services.search_elements(ref_book.id, query, LIMIT), repeat=5, number=20)
+        view_time = best_of(lambda: client.get(url, {'q': query, 'limit': LIMIT}), repeat=5, number=20)
+        print(f'{name:<20} {query!r:<18} found {found:3d}  service {service_time * 1000:6.2f} ms  '
+              f'endpoint {view_time * 1000:6.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Проверка элементов (validate_elements) для версии со 100 000 элементов: запрос к БД, индекс в памяти
+процесса (element_index.py) и отображаемый в память файл элементов (element_store.py).
+Также время сборки файла и память, которую занимает версия в процессе.
+    python -m benchmarks.bench_element_store
+"""
+import random
+import tempfile
+import time
+import tracemalloc
+
+from .utils import best_of, create_ref_book, setup_django
+
+ELEMENTS_COUNT = 100000
+LOOKUPS_COUNT = 1000
+
+
+def main():
+    setup_django()
+
+    from django.test import override_settings
+
+    from reference_books.caches import shared_cache
+    from reference_books.element_index import element_index
+    from reference_books.element_store import build_element_store, element_store
+    from reference_books.services import validate_elements
+
+    ref_book, version = create_ref_book('ICD-10', ELEMENTS_COUNT)
+    version.refresh_from_db(fields=['revision'])
+    numbers = random.Random(0).sample(range(ELEMENTS_COUNT * 2), LOOKUPS_COUNT)
+    lookups = [(f'A{i:06d}', f'Значение элемента {i}') for i in numbers]
+
+    def validate():
+        for code, value in lookups:
+            validate_elements(ref_book.id, code, value)
+
+    def measure(label, **settings):
+        with override_settings(REFERENCE_BOOKS=settings):
+            shared_cache.clear()
+            element_index.clear()
+            element_store.clear()
+            tracemalloc.start()
+            validate()
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            elapsed = best_of(validate, repeat=5)
+        print(f'{label:<16} {elapsed / LOOKUPS_COUNT * 1e6:8.1f} us/element, '
+              f'{memory / 1024 / 1024:6.1f} MB in process')
+
+    with tempfile.TemporaryDirectory() as root:
+        with override_settings(REFERENCE_BOOKS={'ELEMENT_STORE_ROOT': root}):
+            start = time.perf_counter()
+            build_element_store(version.id, version.revision)
+            elapsed = time.perf_counter() - start
+        print(f'build_element_store, {ELEMENTS_COUNT} elements: {elapsed * 1000:.1f} ms')
+        print(f'{LOOKUPS_COUNT} validate_elements calls, half of the elements are missing')
+        measure('database', ELEMENT_INDEX_ENABLED=False)
+        measure('element_index', ELEMENT_INDEX_ENABLED=True)
+        measure('element_store', ELEMENT_INDEX_ENABLED=False, ELEMENT_STORE_ROOT=root)
+
+
+if __name__ == '__main__':
+    main()
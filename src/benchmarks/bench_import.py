@@ -0,0 +1,62 @@
+"""
+Сравнение полной загрузки версии справочника и загрузки изменений относительно базовой версии.
+    python -m benchmarks.bench_import
+"""
+import csv
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from .utils import create_ref_book, setup_django
+
+ELEMENTS_COUNT = 100000
+# Доля изменённых элементов (поровну добавленных, изменённых и удалённых).
+CHANGED_SHARE = 0.01
+
+
+def main():
+    setup_django()
+
+    from django.core.management import call_command
+
+    create_ref_book('ICD-10', ELEMENTS_COUNT, version='1.0', date='2023-01-01')
+    changed = int(ELEMENTS_COUNT * CHANGED_SHARE) // 3
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        full_path = Path(tmp_dir) / 'full.csv'
+        diff_path = Path(tmp_dir) / 'diff.csv'
+        with full_path.open('w', newline='', encoding='utf-8') as full_file, \
+                diff_path.open('w', newline='', encoding='utf-8') as diff_file:
+            full_writer = csv.writer(full_file)
+            diff_writer = csv.writer(diff_file)
+            full_writer.writerow(['code', 'value'])
+            diff_writer.writerow(['op', 'code', 'value'])
+            for i in range(ELEMENTS_COUNT):
+                if i < changed:
+                    diff_writer.writerow(['remove', f'A{i:06d}', ''])
+                    continue
+                value = f'Значение элемента {i}'
+                if i < 2 * changed:
+                    value = f'Новое значение элемента {i}'
+                    diff_writer.writerow(['change', f'A{i:06d}', value])
+                full_writer.writerow([f'A{i:06d}', value])
+            for i in range(changed):
+                full_writer.writerow([f'B{i:06d}', f'Добавленный элемент {i}'])
+                diff_writer.writerow(['add', f'B{i:06d}', f'Добавленный элемент {i}'])
+
+        timings = {}
+        for name, path, options in [
+            ('full', full_path, {}),
+            ('diff', diff_path, {'base_version': '1.0'}),
+        ]:
+            start = time.perf_counter()
+            call_command('import_refbook_version', str(path), ref_book='ICD-10', ref_book_version=name,
+                         date=f'2024-01-0{len(timings) + 1}', stdout=StringIO(), **options)
+            timings[name] = time.perf_counter() - start
+    print(f'{ELEMENTS_COUNT} elements, {3 * changed} changes')
+    print(f'full import: {timings["full"]:6.2f} s')
+    print(f'diff import: {timings["diff"]:6.2f} s  speedup: x{timings["full"] / timings["diff"]:.1f}')
+
+
+if __name__ == '__main__':
+    main()
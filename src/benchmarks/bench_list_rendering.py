@@ -0,0 +1,41 @@
+"""
+Сравнение формирования списков справочников и элементов через ModelSerializer и через values_list() (FAST_LIST_RENDERING).
+    python -m benchmarks.bench_list_rendering
+"""
+from .utils import best_of, create_ref_book, setup_django
+
+ELEMENTS_COUNT = 20000
+REF_BOOKS_COUNT = 5000
+
+
+def main():
+    setup_django()
+
+    from django.test import Client, override_settings
+
+    from reference_books import models
+
+    ref_book, _ = create_ref_book('ICD-10', ELEMENTS_COUNT)
+    models.ReferenceBook.objects.bulk_create(
+        models.ReferenceBook(code=f'RB{i}', name=f'Справочник {i}') for i in range(REF_BOOKS_COUNT)
+    )
+    client = Client()
+    urls = {
+        'refbooks': '/refbooks/',
+        'elements': f'/refbooks/{ref_book.id}/elements/',
+    }
+    for name, url in urls.items():
+        assert client.get(url).status_code == 200
+        results = {}
+        for fast in (False, True):
+            with override_settings(REFERENCE_BOOKS={'FAST_LIST_RENDERING': fast}):
+                results[fast] = best_of(lambda: client.get(url).content)
+        print(
+            f'{name:<10} serializer: {results[False] * 1000:8.1f} ms  '
+            f'fast path: {results[True] * 1000:8.1f} ms  '
+            f'speedup: x{results[False] / results[True]:.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Сравнение фильтра списка справочников по дате (?date=): JOIN + DISTINCT, Exists() и кэш по дате.
+    python -m benchmarks.bench_ref_book_date_filter
+"""
+from datetime import date, timedelta
+
+from .utils import best_of, setup_django
+
+REF_BOOKS_COUNT = 10000
+VERSIONS_COUNT = 50
+
+
+def main():
+    setup_django()
+
+    from reference_books import models, services
+    from reference_books.caches import shared_cache
+
+    models.ReferenceBook.objects.bulk_create(
+        models.ReferenceBook(code=f'RB{i}', name=f'Справочник {i}') for i in range(REF_BOOKS_COUNT)
+    )
+    start_date = date(2020, 1, 1)
+    for ref_book_id in models.ReferenceBook.objects.values_list('id', flat=True):
+        models.ReferenceBookVersion.objects.bulk_create(
+            models.ReferenceBookVersion(
+                ref_book_id=ref_book_id,
+                version=str(i),
+                # Справочники начинают действовать в разные дни, чтобы фильтр отбирал их часть.
+                date=start_date + timedelta(days=ref_book_id % 365 + i * 30),
+            )
+            for i in range(VERSIONS_COUNT)
+        )
+    filter_date = start_date + timedelta(days=180)
+
+    def distinct_join():
+        queryset = (
+            models.ReferenceBook.objects.only('id', 'code', 'name').order_by('id')
+            .filter(referencebookversion__date__lte=filter_date).distinct()
+        )
+        return list(queryset.values_list('id', 'code', 'name'))
+
+    def exists():
+        return list(services.get_queryset_of_ref_books(filter_date).values_list('id', 'code', 'name'))
+
+    def cached():
+        return services.get_ref_books(filter_date)
+
+    assert distinct_join() == exists()
+    shared_cache.clear()
+    cached()
+    print(f'{REF_BOOKS_COUNT} refbooks x {VERSIONS_COUNT} versions, {len(exists())} refbooks match')
+    timings = {name: best_of(func) for name, func in [
+        ('JOIN + DISTINCT', distinct_join),
+        ('Exists()', exists),
+        ('cached per date', cached),
+    ]}
+    for name, timing in timings.items():
+        print(f'{name:<16} {timing * 1000:9.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Выгрузка всех справочников: списки элементов JSON (по одному запросу на справочник) против двоичного снимка
+(команда export_snapshot, эндпоинт /snapshot/) и загрузка снимка через mmap (SnapshotReader).
+    python -m benchmarks.bench_snapshot
+"""
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from .utils import best_of, create_ref_book, setup_django
+
+REF_BOOKS_COUNT = 5
+ELEMENTS_COUNT = 100000
+
+
+def main():
+    setup_django()
+
+    from django.test import Client
+
+    from reference_books.snapshots import SnapshotReader, write_snapshot
+
+    for i in range(REF_BOOKS_COUNT):
+        create_ref_book(f'REF-{i}', ELEMENTS_COUNT)
+    client = Client()
+
+    def download_json():
+        ref_books = client.get('/refbooks/').json()['refbooks']
+        return [client.get(f'/refbooks/{ref_book["id"]}/elements/').content for ref_book in ref_books]
+
+    def download_snapshot():
+        return b''.join(client.get('/snapshot/').streaming_content)
+
+    def load_json(contents):
+        return [{e['code']: e['value'] for e in json.loads(content)['elements']} for content in contents]
+
+    def load_snapshot(path):
+        with SnapshotReader(path) as reader:
+            return {version[0]: dict(reader.elements(version[0])) for version in reader.versions()}
+
+    contents = download_json()
+    print(f'{REF_BOOKS_COUNT} ref books x {ELEMENTS_COUNT} elements')
+    print(f'JSON element lists:   {best_of(download_json, repeat=3) * 1000:8.1f} ms, '
+          f'{sum(map(len, contents))} bytes, load {best_of(lambda: load_json(contents), repeat=3) * 1000:6.1f} ms')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / 'refbooks.snapshot'
+        start = time.perf_counter()
+        size = write_snapshot(path)
+        print(f'export_snapshot:      {(time.perf_counter() - start) * 1000:8.1f} ms, {size} bytes')
+        print(f'/snapshot/ streamed:  {best_of(download_snapshot, repeat=3) * 1000:8.1f} ms')
+        print(f'SnapshotReader, all elements into dicts: '
+              f'{best_of(lambda: load_snapshot(path), repeat=3) * 1000:6.1f} ms')
+
+        def list_versions():
+            with SnapshotReader(path) as reader:
+                return list(reader.versions())
+
+        print(f'SnapshotReader, open and list versions:  {best_of(list_versions, repeat=5, number=20) * 1000:6.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
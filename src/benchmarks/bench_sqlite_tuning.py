@@ -0,0 +1,120 @@
+"""
+Пропускная способность check_element во время загрузки новой версии справочника
+для профилей БД development (без настройки) и sqlite (WAL, PRAGMA, постоянные соединения).
+    python -m benchmarks.bench_sqlite_tuning [--duration 10] [--readers 8]
+Каждый профиль запускается в отдельном процессе с тестовой БД в файле (в памяти WAL не работает).
+"""
+import argparse
+import csv
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .utils import create_ref_book, setup_django
+
+PROFILES = ('development', 'sqlite')
+ELEMENTS_COUNT = 10000
+# Количество элементов в загружаемых версиях.
+IMPORT_ELEMENTS_COUNT = 50000
+
+
+def run_profile(profile: str, duration: float, readers: int) -> None:
+    os.environ['DATABASE_PROFILE'] = profile
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        setup_django(NAME=str(Path(tmp_dir) / 'bench.sqlite3'))
+
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.core.management import call_command
+        from django.db import connection
+
+        ref_book, _ = create_ref_book('ICD-10', ELEMENTS_COUNT, date='2023-01-01')
+        csv_path = Path(tmp_dir) / 'elements.csv'
+        with csv_path.open('w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['code', 'value'])
+            writer.writerows((f'A{i:06d}', f'Значение элемента {i}') for i in range(IMPORT_ELEMENTS_COUNT))
+        connection.close()
+
+        handler = WSGIHandler()
+        stop = threading.Event()
+        imports = 0
+
+        def import_versions():
+            nonlocal imports
+            try:
+                while not stop.is_set():
+                    imports += 1
+                    # Версии с датой в будущем не меняют текущую версию, которую проверяют читатели.
+                    call_command(
+                        'import_refbook_version', csv_path, ref_book='ICD-10', ref_book_version=f'import-{imports}',
+                        date=f'{2100 + imports}-01-01', verbosity=0,
+                    )
+            finally:
+                connection.close()
+
+        def read():
+            latencies, errors = [], 0
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': f'/refbooks/{ref_book.id}/check_element/',
+                'QUERY_STRING': 'code=A000500&value=%D0%97%D0%BD%D0%B0%D1%87%D0%B5%D0%BD%D0%B8%D0%B5',
+                'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'HTTP_HOST': 'testserver',
+                'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+            }
+            while not stop.is_set():
+                start = time.perf_counter()
+                response = handler({**environ, 'wsgi.input': io.BytesIO()}, lambda status, headers: None)
+                b''.join(response)
+                response.close()
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+            connection.close()
+            return latencies, errors
+
+        writer_thread = threading.Thread(target=import_versions)
+        with ThreadPoolExecutor(readers) as executor:
+            writer_thread.start()
+            futures = [executor.submit(read) for _ in range(readers)]
+            time.sleep(duration)
+            stop.set()
+            results = [future.result() for future in futures]
+        writer_thread.join()
+
+        latencies = sorted(latency for thread_latencies, _ in results for latency in thread_latencies)
+        errors = sum(thread_errors for _, thread_errors in results)
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(
+            f'{profile:<12} {len(latencies) / duration:8.0f} req/s  '
+            f'p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms  '
+            f'errors {errors:5d}  imports {imports}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--profile', choices=PROFILES, help='Запуск одного профиля в текущем процессе.')
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args.profile, args.duration, args.readers)
+        return
+    print(f'{args.readers} readers, {args.duration:.0f} s, import of {IMPORT_ELEMENTS_COUNT} elements in a loop')
+    for profile in PROFILES:
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_sqlite_tuning', '--profile', profile,
+             '--duration', str(args.duration), '--readers', str(args.readers)],
+            check=True,
+        )
+
+
+if __name__ == '__main__':
+    main()
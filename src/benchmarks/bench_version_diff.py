@@ -0,0 +1,69 @@
+"""
+Сравнение получения различий двух версий справочника: загрузка обеих версий и сравнение на стороне клиента
+против эндпоинта /refbooks/<id>/diff/ (без кэша и из кэша).
+    python -m benchmarks.bench_version_diff
+"""
+from .utils import best_of, create_ref_book, setup_django
+
+ELEMENTS_COUNT = 100000
+# Доля изменённых элементов (поровну добавленных, изменённых и удалённых).
+CHANGED_SHARE = 0.01
+
+
+def main():
+    setup_django()
+
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    from reference_books import models
+    from reference_books.caches import shared_cache
+
+    ref_book, version1 = create_ref_book('ICD-10', ELEMENTS_COUNT, version='1.0', date='2023-01-01')
+    version2 = models.ReferenceBookVersion.objects.create(ref_book=ref_book, version='2.0', date='2024-01-01')
+    changed = int(ELEMENTS_COUNT * CHANGED_SHARE) // 3
+    elements = []
+    for i in range(changed, ELEMENTS_COUNT + changed):
+        value = f'Значение элемента {i}'
+        if i < 2 * changed:
+            value = f'Новое значение элемента {i}'
+        elements.append(models.ReferenceBookElement(ref_book_version=version2, code=f'A{i:06d}', value=value))
+    models.ReferenceBookElement.objects.bulk_create(elements, batch_size=5000)
+
+    client = Client()
+    elements_url = f'/refbooks/{ref_book.id}/elements/'
+    diff_url = f'/refbooks/{ref_book.id}/diff/'
+
+    def client_side_diff():
+        old = {e['code']: e['value'] for e in client.get(elements_url, {'version': '1.0'}).json()['elements']}
+        new = {e['code']: e['value'] for e in client.get(elements_url, {'version': '2.0'}).json()['elements']}
+        return (
+            [code for code in new if code not in old],
+            [code for code in new if code in old and old[code] != new[code]],
+            [code for code in old if code not in new],
+        )
+
+    def endpoint_diff():
+        return b''.join(client.get(diff_url, {'from': '1.0', 'to': '2.0'}).streaming_content)
+
+    def uncached_endpoint_diff():
+        shared_cache.clear()
+        return endpoint_diff()
+
+    added, changed_codes, removed = client_side_diff()
+    print(f'{ELEMENTS_COUNT} elements, {len(added)} added, {len(changed_codes)} changed, {len(removed)} removed')
+    shared_cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        endpoint_diff()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {queries[-1]["sql"]}')
+        print('plan:', '; '.join(row[3] for row in cursor.fetchall()))
+    print(f'client-side diff of two versions: {best_of(client_side_diff, repeat=3) * 1000:8.1f} ms')
+    print(f'diff endpoint, not cached:        {best_of(uncached_endpoint_diff, repeat=3) * 1000:8.1f} ms')
+    print(f'diff endpoint, cached:            {best_of(endpoint_diff, repeat=3) * 1000:8.1f} ms')
+    print(f'response size: {len(endpoint_diff())} bytes')
+
+
+if __name__ == '__main__':
+    main()
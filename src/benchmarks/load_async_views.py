@@ -0,0 +1,131 @@
+"""
+Нагрузочный тест: пропускная способность синхронных эндпоинтов (WSGI) и их асинхронных вариантов (ASGI).
+    python -m benchmarks.load_async_views [--requests 2000] [--concurrency 50]
+По умолчанию обработчики Django (WSGIHandler в пуле потоков, ASGIHandler в цикле событий) вызываются
+в том же процессе, без сетевого сервера. С --url запросы отправляются запущенному серверу, например:
+    uvicorn config.asgi:application --workers 1
+    python -m benchmarks.load_async_views --url http://127.0.0.1:8000 --ref-book-id 1
+"""
+import argparse
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen
+
+from .utils import create_ref_book, setup_django
+
+ELEMENTS_COUNT = 1000
+
+
+def get_paths(ref_book_id: int) -> dict[str, tuple[str, str]]:
+    """
+    Пути синхронного и асинхронного вариантов каждого эндпоинта.
+    """
+    check_element = f'check_element/?code=A000500&value=%D0%97%D0%BD%D0%B0%D1%87%D0%B5%D0%BD%D0%B8%D0%B5'
+    return {
+        'refbooks': ('/refbooks/', '/async/refbooks/'),
+        'elements': (f'/refbooks/{ref_book_id}/elements/', f'/async/refbooks/{ref_book_id}/elements/'),
+        'check_element': (f'/refbooks/{ref_book_id}/{check_element}', f'/async/refbooks/{ref_book_id}/{check_element}'),
+    }
+
+
+def run_wsgi(path: str, requests: int, concurrency: int) -> float:
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    url_path, _, query_string = path.partition('?')
+
+    def request(_):
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': url_path, 'QUERY_STRING': query_string,
+            'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'HTTP_HOST': 'testserver',
+            'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+        }
+        response = handler(environ, lambda status, headers: None)
+        assert response.status_code == 200, response.status_code
+        b''.join(response)
+        response.close()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(request, range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def run_asgi(path: str, requests: int, concurrency: int) -> float:
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+    url_path, _, query_string = path.partition('?')
+
+    async def request(semaphore):
+        async with semaphore:
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': url_path, 'query_string': query_string.encode(),
+                'headers': [(b'host', b'testserver')], 'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+            }
+            messages = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                messages.append(message)
+
+            await handler(scope, receive, send)
+            assert messages[0]['status'] == 200, messages[0]['status']
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(request(semaphore) for _ in range(requests)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return requests / (time.perf_counter() - start)
+
+
+def run_http(url: str, requests: int, concurrency: int) -> float:
+    def request(_):
+        with urlopen(url) as response:
+            assert response.status == 200, response.status
+            response.read()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(request, range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--url', help='Адрес запущенного сервера. По умолчанию - обработчики Django в процессе.')
+    parser.add_argument('--ref-book-id', type=int, default=1, help='id справочника на запущенном сервере.')
+    args = parser.parse_args()
+
+    print(f'{args.requests} requests, concurrency {args.concurrency}')
+    if args.url:
+        for name, (sync_path, async_path) in get_paths(args.ref_book_id).items():
+            sync_rps = run_http(args.url + sync_path, args.requests, args.concurrency)
+            async_rps = run_http(args.url + async_path, args.requests, args.concurrency)
+            print(f'{name:<14} sync: {sync_rps:8.0f} req/s  async: {async_rps:8.0f} req/s')
+        return
+
+    setup_django()
+    ref_book, _ = create_ref_book('ICD-10', ELEMENTS_COUNT)
+    for name, (sync_path, async_path) in get_paths(ref_book.id).items():
+        wsgi_rps = run_wsgi(sync_path, args.requests, args.concurrency)
+        asgi_sync_rps = run_asgi(sync_path, args.requests, args.concurrency)
+        asgi_async_rps = run_asgi(async_path, args.requests, args.concurrency)
+        print(
+            f'{name:<14} WSGI sync: {wsgi_rps:8.0f} req/s  '
+            f'ASGI sync: {asgi_sync_rps:8.0f} req/s  ASGI async: {asgi_async_rps:8.0f} req/s'
+        )
+
+
+if __name__ == '__main__':
+    main()
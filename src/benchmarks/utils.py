@@ -0,0 +1,57 @@
+"""
+Общие функции для бенчмарков. Бенчмарки запускаются из каталога src:
+    python -m benchmarks.<имя модуля>
+и работают с временной тестовой БД, не затрагивая db.sqlite3.
+"""
+import os
+import time
+from collections.abc import Callable
+
+
+def setup_django(**database_test_settings) -> None:
+    """
+    Инициализация Django и создание тестовой БД (по умолчанию SQLite в памяти).
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.settings_dict['TEST'].update(database_test_settings)
+    connection.creation.create_test_db(verbosity=0)
+
+
+def best_of(func: Callable, repeat: int = 5, number: int = 1) -> float:
+    """
+    Лучшее время (в секундах) одного вызова func из repeat серий по number вызовов.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
+
+
+def create_ref_book(code: str, elements_count: int, version: str = '1.0', date=None):
+    """
+    Создание справочника с одной версией и elements_count элементами.
+    """
+    from django.utils.timezone import localdate
+
+    from reference_books import models
+
+    ref_book = models.ReferenceBook.objects.create(code=code, name=f'Справочник {code}')
+    ref_book_version = models.ReferenceBookVersion.objects.create(
+        ref_book=ref_book, version=version, date=date or localdate(),
+    )
+    models.ReferenceBookElement.objects.bulk_create(
+        models.ReferenceBookElement(ref_book_version=ref_book_version, code=f'A{i:06d}', value=f'Значение элемента {i}')
+        for i in range(elements_count)
+    )
+    return ref_book, ref_book_version
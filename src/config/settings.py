@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'reference_books.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -75,13 +77,114 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# Профиль БД задаётся переменной окружения DATABASE_PROFILE:
+# development (по умолчанию) - SQLite без настройки, соединение на каждый запрос;
+# sqlite - SQLite для эксплуатации: WAL (чтение не блокируется записью), PRAGMA и постоянные соединения;
+# postgresql - PostgreSQL (параметры подключения из переменных окружения POSTGRES_*, нужен пакет psycopg2).
+
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'development')
+
+# Время жизни постоянного соединения в секундах (для профилей sqlite и postgresql).
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', 600))
+
+# PRAGMA, выполняемые при открытии соединения SQLite в профиле sqlite (см. reference_books/signals.py).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # В режиме WAL не теряет согласованность при сбое, fsync только при контрольной точке.
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение - размер в КиБ.
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
 }
 
+if DATABASE_PROFILE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'medical_directory'),
+            'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', '127.0.0.1'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # Постоянные соединения (пул на уровне процесса) с проверкой перед повторным использованием.
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            # За PgBouncer в режиме transaction pooling курсоры на стороне сервера использовать нельзя.
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('PGBOUNCER', '') == '1',
+            'OPTIONS': {
+                'connect_timeout': 5,
+                'application_name': 'medical_directory',
+            },
+        }
+    }
+elif DATABASE_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Ожидание блокировки записи (в секундах) вместо немедленной ошибки database is locked.
+                'timeout': 20,
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
+# Реплики для чтения эндпоинтами справочников (см. reference_books/routers.py): переменная окружения
+# DATABASE_REPLICAS - пути к файлам SQLite либо хосты PostgreSQL (профиль postgresql) через запятую.
+# Псевдонимы реплик - replica1, replica2, ...; остальные параметры подключения - как у основной БД.
+DATABASE_REPLICAS = [replica for replica in os.environ.get('DATABASE_REPLICAS', '').split(',') if replica]
+
+for number, replica in enumerate(DATABASE_REPLICAS, start=1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST' if DATABASE_PROFILE == 'postgresql' else 'NAME': replica,
+        # В тестах реплики - та же тестовая БД.
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['reference_books.routers.ReplicaRouter']
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# Бэкенд задаётся переменной окружения CACHE_URL: redis://host:port/db (Redis и совместимые с ним сервера,
+# нужен пакет redis), file:///path/to/dir (файловый кэш). По умолчанию - кэш в памяти процесса.
+
+CACHE_URL = os.environ.get('CACHE_URL', '')
+
+if CACHE_URL.startswith(('redis://', 'rediss://', 'unix://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+elif CACHE_URL.startswith('file://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_URL.removeprefix('file://'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,
+            },
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -131,3 +234,24 @@ SPECTACULAR_SETTINGS = {
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
 }
+
+REFERENCE_BOOKS = {
+    'ELEMENT_INDEX_ENABLED': False,
+    'ELEMENT_INDEX_MAX_BYTES': 256 * 1024 * 1024,
+    'ELEMENT_STORE_ROOT': os.environ.get('REFBOOKS_ELEMENT_STORE_ROOT'),
+    'STREAM_ELEMENTS': False,
+    'STREAM_CHUNK_SIZE': 2000,
+    # Формирование списков справочников и элементов из .values() без ModelSerializer.
+    'FAST_LIST_RENDERING': True,
+    # Cache-Control: max-age (в секундах) для списков элементов прошлых версий, запрошенных по ?version=.
+    'PAST_VERSION_MAX_AGE': 365 * 24 * 60 * 60,
+    'CACHE_ALIAS': 'default',
+    'CACHE_TIMEOUT': 24 * 60 * 60,
+    'DIFF_CACHE_MAX_ROWS': 10000,
+    'PAYLOAD_ROOT': os.environ.get('REFBOOKS_PAYLOAD_ROOT'),
+    'SQLITE_PRAGMAS': SQLITE_PRAGMAS if DATABASE_PROFILE == 'sqlite' else {},
+    'READ_REPLICAS': [f'replica{number}' for number in range(1, len(DATABASE_REPLICAS) + 1)],
+    'REPLICA_LAG': float(os.environ.get('REPLICA_LAG', 5)),
+    'CHANGE_LOG_ENABLED': True,
+    'SNAPSHOT_PATH': os.environ.get('REFBOOKS_SNAPSHOT_PATH'),
+}
@@ -26,32 +26,31 @@ class ReferenceBookVersionInline(admin.TabularInline):
 
 @admin.register(models.ReferenceBook)
 class ReferenceBookAdmin(admin.ModelAdmin):
-    list_display = ("id", "code", "name", "current_version", "version_date")
+    list_display = ("id", "code", "name", "current_version_number", "version_date")
     list_display_links = ("id", "code", "name")
     inlines = (ReferenceBookVersionInline,)
 
     def get_queryset(self, request):
+        # Текущая версия определяется по датам, а не по указателю current_version: указатель обновляется
+        # командой roll_current_versions и до её запуска не учитывает версии с наступившей датой начала действия.
         queryset = super().get_queryset(request)
-        current_date = localdate()
         version_queryset = (
             models.ReferenceBookVersion.objects
             .filter(
                 ref_book_id=OuterRef('id'),
-                date__lte=current_date,
+                date__lte=localdate(),
             )
             .order_by('-date')
         )
-        current_version = version_queryset.values('version')[:1]
-        version_date = version_queryset.values('date')[:1]
         queryset = queryset.annotate(
-            current_version=Subquery(current_version),
-            version_date=Subquery(version_date),
+            current_version_number=Subquery(version_queryset.values('version')[:1]),
+            version_date=Subquery(version_queryset.values('date')[:1]),
         )
         return queryset
 
     @admin.display(description='Текущая версия', empty_value='Нет текущей версии')
-    def current_version(self, obj):
-        return obj.current_version
+    def current_version_number(self, obj):
+        return obj.current_version_number
 
     @admin.display(description='Дата начала действия версии', empty_value='Нет текущей версии')
     def version_date(self, obj):
@@ -5,3 +5,6 @@ class ReferenceBooksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reference_books'
     verbose_name = 'Медицинский справочник'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,110 @@
+"""
+Асинхронные варианты эндпоинтов чтения для запуска под ASGI (uvicorn, daphne).
+Ответы совпадают с ответами синхронных представлений из views.py. Запросы, для которых нужны
+возможности DRF (постраничная выдача, форматы кроме компактного JSON, сериализаторы моделей,
+потоковая отдача), передаются синхронным представлениям, которые выполняются в потоке.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework import status
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import payloads
+from . import serializers
+from . import services
+from . import views
+from .conf import get_setting
+from .renderers import can_stream_json
+from .routers import replica_reads
+
+_ref_book_list_view = views.ReferenceBookListView.as_view({'get': 'list'})
+_ref_book_element_list_view = views.ReferenceBookElementListView.as_view({'get': 'list'})
+
+
+@replica_reads
+async def ref_book_list(request):
+    """
+    Получение списка справочников (+ актуальных на указанную дату).
+    """
+    if not get_setting('FAST_LIST_RENDERING') or not _accepts_compact_json(request):
+        return await sync_to_async(_ref_book_list_view)(request)
+    query_params_serializer = serializers.ReferenceBookListViewQueryParamSerializer(data=request.GET)
+    if not query_params_serializer.is_valid():
+        return _json_response(query_params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = {"refbooks": await services.aget_ref_books(query_params_serializer.validated_data.get("date"))}
+    return _json_response(data)
+
+
+@replica_reads
+async def ref_book_element_list(request, id):
+    """
+    Получение элементов заданного справочника
+    """
+    streaming = get_setting('STREAM_ELEMENTS')
+    if not get_setting('FAST_LIST_RENDERING') or streaming or not _accepts_compact_json(request):
+        return await sync_to_async(_ref_book_element_list_view)(request, id=id)
+    query_params_serializer = serializers.ReferenceBookElementListViewQueryParamSerializer(data=request.GET)
+    if not query_params_serializer.is_valid():
+        return _json_response(query_params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    if query_params_serializer.validated_data.get("page_size") is not None:
+        return await sync_to_async(_ref_book_element_list_view)(request, id=id)
+    date = query_params_serializer.validated_data.get("date")
+    version_state = await services.aget_version_state(id, query_params_serializer.data.get("version"), date)
+    # Как и в ReferenceBookElementListView.get_queryset, элементы выбираются по исходному параметру.
+    version = request.GET.get("version", None)
+    if version_state is None:
+        return _json_response({"elements": await services.aget_ref_book_elements(id, version, date)})
+    not_modified_response = get_conditional_response(
+        request,
+        etag=views.get_version_etag(version_state),
+        last_modified=views.get_version_last_modified(version_state),
+    )
+    if not_modified_response is not None:
+        return views.set_version_cache_headers(not_modified_response, version_state)
+    payload = await sync_to_async(payloads.get_payload)(
+        version_state["id"], version_state["revision"], request.META.get("HTTP_ACCEPT_ENCODING", ""),
+    )
+    if payload is not None:
+        response = views.get_payload_response(*payload)
+    else:
+        response = _json_response({"elements": await services.aget_ref_book_elements(id, version, date)})
+    return views.set_version_cache_headers(response, version_state)
+
+
+@replica_reads
+async def element_validation(request, id):
+    """
+    Проверка присутствия элемента с данным кодом и значением в указанной версии справочника.
+    """
+    if not _accepts_compact_json(request):
+        return await sync_to_async(views.ElementValidationView.as_view())(request, id=id)
+    query_params_serializer = serializers.ElementValidationViewQueryParamSerializer(data=request.GET)
+    if not query_params_serializer.is_valid():
+        return _json_response(query_params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    exists = await services.avalidate_elements(ref_book_id=id, **query_params_serializer.validated_data)
+    return _json_response({"exists": exists})
+
+
+def _accepts_compact_json(request) -> bool:
+    # Выбор формата ответа так же, как в DRF (заголовок Accept, параметр format).
+    drf_request = Request(request)
+    renderers = [renderer() for renderer in api_settings.DEFAULT_RENDERER_CLASSES]
+    try:
+        drf_request.accepted_renderer, drf_request.accepted_media_type = (
+            DefaultContentNegotiation().select_renderer(drf_request, renderers)
+        )
+    except NotAcceptable:
+        return False
+    return can_stream_json(drf_request)
+
+
+def _json_response(data, status=status.HTTP_200_OK):
+    response = HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+    # Как в ответах DRF: содержимое зависит от заголовка Accept.
+    patch_vary_headers(response, ['Accept'])
+    return response
@@ -0,0 +1,259 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from .conf import get_setting
+
+# Пространство имён, номер версии которого входит во все ключи (см. VersionedCache.clear).
+GLOBAL_NAMESPACE = 'all'
+# Списки справочников по датам.
+REF_BOOK_LIST_NAMESPACE = 'ref_books'
+# Время (в секундах), в течение которого вычисление значения считается выполняющимся другим процессом.
+LOCK_TIMEOUT = 30
+# Интервал (в секундах) повторной проверки кэша при ожидании значения, вычисляемого другим процессом.
+LOCK_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+
+def version_namespace(version_id: int) -> str:
+    """
+    Пространство имён данных версии справочника (элементов).
+    """
+    return f'version:{version_id}'
+
+
+class VersionedCache:
+    """
+    Кэш, общий для всех процессов, поверх кэша Django (settings.CACHES, псевдоним - настройка CACHE_ALIAS).
+    Ключи сгруппированы в пространства имён. Номер версии пространства хранится в самом кэше и входит в ключи,
+    при изменении данных он увеличивается (см. signals.py) - прежние значения перестают читаться
+    и удаляются бэкендом по истечении CACHE_TIMEOUT либо при вытеснении.
+    Значение, вычисленное до увеличения номера, сохраняется под прежним ключом и не будет прочитано.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._fill_checks: list[tuple[Callable[[], bool], Callable[[], Awaitable[bool]]]] = []
+
+    def add_fill_check(self, check: Callable[[], bool], acheck: Callable[[], Awaitable[bool]]) -> None:
+        """
+        Регистрация проверки того, что значения, вычисляемые в текущем контексте, можно сохранять
+        (например, что прочитанная реплика не отстаёт от основной БД, см. routers.py).
+        :check: Функция, возвращающая флаг.
+        :acheck: Асинхронный вариант check.
+        """
+        self._fill_checks.append((check, acheck))
+
+    def can_fill(self) -> bool:
+        """
+        Проверка того, что значения, вычисляемые в текущем контексте, можно сохранять.
+        Вызывается после получения ключа и до вычисления значения.
+        """
+        return all(check() for check, acheck in self._fill_checks)
+
+    async def acan_fill(self) -> bool:
+        for check, acheck in self._fill_checks:
+            if not await acheck():
+                return False
+        return True
+
+    @property
+    def cache(self):
+        return caches[get_setting('CACHE_ALIAS')]
+
+    def make_keys(self, items: Iterable[tuple[str, str]]) -> dict[tuple[str, str], str]:
+        """
+        Получение ключей кэша с текущими номерами версий пространств имён.
+        :items: Пары (пространство имён, ключ).
+        :return: Словарь {(пространство имён, ключ): ключ кэша}.
+        """
+        items = list(items)
+        versions = self._get_namespace_versions({GLOBAL_NAMESPACE, *(namespace for namespace, key in items)})
+        global_version = versions[GLOBAL_NAMESPACE]
+        return {
+            (namespace, key): f'{self.prefix}:{namespace}:{global_version}.{versions[namespace]}:{key}'
+            for namespace, key in items
+        }
+
+    def make_key(self, namespace: str, key: str) -> str:
+        return self.make_keys([(namespace, key)])[(namespace, key)]
+
+    def get_or_set(self, namespace: str, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Получение значения по ключу. При отсутствии значение вычисляется функцией compute и сохраняется.
+        Вычисление выполняет только один процесс, остальные ожидают его результат
+        (не дольше LOCK_TIMEOUT, после чего вычисляют значение сами).
+        """
+        cache = self.cache
+        cache_key = self.make_key(namespace, key)
+        value = cache.get(cache_key, _MISSING)
+        if value is not _MISSING:
+            return value
+        lock_key = f'{cache_key}:lock'
+        if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            value = self._wait(cache, cache_key, lock_key)
+            if value is not _MISSING:
+                return value
+        try:
+            can_fill = self.can_fill()
+            value = compute()
+            if can_fill:
+                cache.set(cache_key, value, get_setting('CACHE_TIMEOUT'))
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    async def amake_keys(self, items: Iterable[tuple[str, str]]) -> dict[tuple[str, str], str]:
+        """
+        Асинхронный вариант make_keys.
+        """
+        items = list(items)
+        versions = await self._aget_namespace_versions({GLOBAL_NAMESPACE, *(namespace for namespace, key in items)})
+        global_version = versions[GLOBAL_NAMESPACE]
+        return {
+            (namespace, key): f'{self.prefix}:{namespace}:{global_version}.{versions[namespace]}:{key}'
+            for namespace, key in items
+        }
+
+    async def amake_key(self, namespace: str, key: str) -> str:
+        return (await self.amake_keys([(namespace, key)]))[(namespace, key)]
+
+    async def aget_or_set(self, namespace: str, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Асинхронный вариант get_or_set, compute - асинхронная функция.
+        """
+        cache_key = await self.amake_key(namespace, key)
+        value = await self._acall('get', cache_key, _MISSING)
+        if value is not _MISSING:
+            return value
+        lock_key = f'{cache_key}:lock'
+        if not await self._acall('add', lock_key, 1, LOCK_TIMEOUT):
+            value = await self._await(cache_key, lock_key)
+            if value is not _MISSING:
+                return value
+        try:
+            can_fill = await self.acan_fill()
+            value = await compute()
+            if can_fill:
+                await self._acall('set', cache_key, value, get_setting('CACHE_TIMEOUT'))
+        finally:
+            await self._acall('delete', lock_key)
+        return value
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        return self.cache.get_many(keys)
+
+    def set_many(self, data: dict[str, Any]) -> None:
+        self.cache.set_many(data, get_setting('CACHE_TIMEOUT'))
+
+    async def aget_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        return await self._acall('get_many', keys)
+
+    async def aset_many(self, data: dict[str, Any]) -> None:
+        await self._acall('set_many', data, get_setting('CACHE_TIMEOUT'))
+
+    def set_flag(self, name: str, timeout: float | None, value: Any = 1) -> None:
+        """
+        Установка флага - ключа без номеров версий пространств имён, существующего timeout секунд
+        (None - без ограничения).
+        """
+        self.cache.set(self._flag_key(name), value, timeout)
+
+    def get_flag(self, name: str) -> Any:
+        return self.cache.get(self._flag_key(name))
+
+    async def aget_flag(self, name: str) -> Any:
+        return await self._acall('get', self._flag_key(name))
+
+    def has_flag(self, name: str) -> bool:
+        return self.get_flag(name) is not None
+
+    async def ahas_flag(self, name: str) -> bool:
+        return await self.aget_flag(name) is not None
+
+    def bump(self, *namespaces: str) -> None:
+        """
+        Увеличение номеров версий пространств имён - значения, сохранённые ранее, перестают читаться.
+        """
+        cache = self.cache
+        for namespace in namespaces:
+            try:
+                cache.incr(self._namespace_key(namespace))
+            except ValueError:
+                # Номер версии отсутствует (ещё не создан либо вытеснен) - создаём новый.
+                cache.add(self._namespace_key(namespace), time.time_ns(), None)
+
+    def clear(self) -> None:
+        self.bump(GLOBAL_NAMESPACE)
+
+    def _get_namespace_versions(self, namespaces: set[str]) -> dict[str, int]:
+        cache = self.cache
+        keys = {namespace: self._namespace_key(namespace) for namespace in namespaces}
+        stored = cache.get_many(keys.values())
+        versions = {}
+        for namespace, key in keys.items():
+            version = stored.get(key)
+            if version is None:
+                # Номер, основанный на времени, не совпадёт с номерами вытесненной версии пространства.
+                cache.add(key, time.time_ns(), None)
+                version = cache.get(key)
+            versions[namespace] = version
+        return versions
+
+    async def _aget_namespace_versions(self, namespaces: set[str]) -> dict[str, int]:
+        keys = {namespace: self._namespace_key(namespace) for namespace in namespaces}
+        stored = await self._acall('get_many', keys.values())
+        versions = {}
+        for namespace, key in keys.items():
+            version = stored.get(key)
+            if version is None:
+                await self._acall('add', key, time.time_ns(), None)
+                version = await self._acall('get', key)
+            versions[namespace] = version
+        return versions
+
+    def _namespace_key(self, namespace: str) -> str:
+        return f'{self.prefix}:ns:{namespace}'
+
+    def _flag_key(self, name: str) -> str:
+        return f'{self.prefix}:flag:{name}'
+
+    @staticmethod
+    def _wait(cache, cache_key: str, lock_key: str) -> Any:
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = cache.get(cache_key, _MISSING)
+            if value is not _MISSING:
+                return value
+            if cache.get(lock_key) is None:
+                # Вычисление в другом процессе завершилось ошибкой.
+                break
+        return _MISSING
+
+    async def _await(self, cache_key: str, lock_key: str) -> Any:
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            value = await self._acall('get', cache_key, _MISSING)
+            if value is not _MISSING:
+                return value
+            if await self._acall('get', lock_key) is None:
+                break
+        return _MISSING
+
+    async def _acall(self, method: str, *args) -> Any:
+        cache = self.cache
+        if isinstance(cache, LocMemCache):
+            # Кэш в памяти процесса не выполняет ввода-вывода: синхронный метод вызывается в цикле событий
+            # без переключения в поток (асинхронные методы кэшей Django - обёртки sync_to_async).
+            return getattr(cache, method)(*args)
+        return await getattr(cache, f'a{method}')(*args)
+
+
+shared_cache = VersionedCache(prefix='refbooks')
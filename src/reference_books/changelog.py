@@ -0,0 +1,136 @@
+"""
+Журнал изменений справочников (ChangeLogEntry) для инкрементальной синхронизации клиентов:
+клиент запрашивает изменения после последнего полученного токена (id записи) вместо повторного чтения
+всех справочников и элементов.
+Записи добавляются обработчиками сигналов (см. signals.py) в транзакции изменения, а при загрузке версии
+командой import_refbook_version - одним запросом для всех элементов версии (record_version_elements).
+Удаление справочника или версии удаляет и вложенные объекты, отдельные записи для них не добавляются.
+
+Токен верен, только если записи становятся видимыми в порядке id: иначе клиент, получивший запись
+с большим id, пропустит запись с меньшим id из транзакции, зафиксированной позже. В SQLite пишущие транзакции
+выполняются по одной. В PostgreSQL id выдаются при вставке, поэтому перед записью в журнал берётся
+транзакционная рекомендательная блокировка (до фиксации транзакции): транзакции, пишущие в журнал,
+фиксируются по очереди, а запись журнала в длинной транзакции (загрузка версии) задерживает остальные изменения
+до её фиксации.
+"""
+from django.db import connection, transaction
+
+from . import models
+from .conf import get_setting
+
+Entry = models.ChangeLogEntry
+
+# Ключ рекомендательной блокировки журнала в PostgreSQL.
+LOCK_KEY = 0x5246_424B_4C4F_47  # b'RFBKLOG'
+
+
+def record_ref_book(ref_book: models.ReferenceBook, operation: str) -> None:
+    """
+    Запись изменения справочника в журнал.
+    :ref_book: Справочник.
+    :operation: ChangeLogEntry.UPSERT либо ChangeLogEntry.DELETE.
+    """
+    if operation == Entry.DELETE:
+        _record(Entry.REF_BOOK, operation, ref_book.pk)
+    else:
+        _record(Entry.REF_BOOK, operation, ref_book.pk, code=ref_book.code, value=ref_book.name)
+
+
+def record_version(version: models.ReferenceBookVersion, operation: str) -> None:
+    """
+    Запись изменения версии справочника в журнал.
+    :version: Версия справочника.
+    :operation: ChangeLogEntry.UPSERT либо ChangeLogEntry.DELETE.
+    """
+    if operation == Entry.DELETE:
+        _record(Entry.VERSION, operation, version.pk)
+    else:
+        _record(Entry.VERSION, operation, version.pk, parent_id=version.ref_book_id, code=version.version,
+                date=version.date)
+
+
+def record_element(element: models.ReferenceBookElement, operation: str) -> None:
+    """
+    Запись изменения элемента справочника в журнал.
+    :element: Элемент справочника.
+    :operation: ChangeLogEntry.UPSERT либо ChangeLogEntry.DELETE.
+    """
+    if operation == Entry.DELETE:
+        _record(Entry.ELEMENT, operation, element.pk)
+    else:
+        _record(Entry.ELEMENT, operation, element.pk, parent_id=element.ref_book_version_id, code=element.code,
+                value=element.value)
+
+
+def record_version_elements(version_id: int) -> int:
+    """
+    Запись всех элементов версии справочника в журнал одним запросом INSERT ... SELECT
+    (для элементов, созданных bulk_create и SQL без отправки сигналов).
+    :version_id: id версии.
+    :return: Количество добавленных записей.
+    """
+    if not get_setting('CHANGE_LOG_ENABLED'):
+        return 0
+    quote_name = connection.ops.quote_name
+    entry_table = quote_name(Entry._meta.db_table)
+    element_table = quote_name(models.ReferenceBookElement._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        _lock()
+        cursor.execute(
+            f'INSERT INTO {entry_table} (object_type, operation, object_id, parent_id, code, value) '
+            f'SELECT %s, %s, id, ref_book_version_id, code, value FROM {element_table} '
+            f'WHERE ref_book_version_id = %s ORDER BY id',
+            [Entry.ELEMENT, Entry.UPSERT, version_id],
+        )
+        return cursor.rowcount
+
+
+def get_changes(since: int, limit: int) -> tuple[list[dict], bool]:
+    """
+    Получение изменений после токена.
+    :since: Токен - id последней полученной записи журнала (0 - с начала журнала).
+    :limit: Максимальное количество изменений.
+    :return: Пара (изменения в порядке записи в журнал, есть ли следующие изменения).
+             Изменение - словарь с токеном, типом объекта, операцией, id объекта и, кроме удаления,
+             полями объекта: code и name справочника; ref_book_id, version и date версии;
+             version_id, code и value элемента.
+    """
+    rows = list(
+        Entry.objects
+        .filter(id__gt=since)
+        .order_by('id')
+        .values_list('id', 'object_type', 'operation', 'object_id', 'parent_id', 'code', 'value', 'date')[:limit + 1]
+    )
+    return [_to_dict(*row) for row in rows[:limit]], len(rows) > limit
+
+
+def _record(object_type: str, operation: str, object_id: int, parent_id: int | None = None, code: str = '',
+            value: str = '', date=None) -> None:
+    if not get_setting('CHANGE_LOG_ENABLED'):
+        return
+    # Вне транзакции блокировка снималась бы сразу после запроса.
+    with transaction.atomic():
+        _lock()
+        Entry.objects.create(
+            object_type=object_type, operation=operation, object_id=object_id, parent_id=parent_id, code=code,
+            value=value, date=date,
+        )
+
+
+def _lock() -> None:
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [LOCK_KEY])
+
+
+def _to_dict(token, object_type, operation, object_id, parent_id, code, value, date) -> dict:
+    change = {"token": token, "type": object_type, "op": operation, "id": object_id}
+    if operation == Entry.DELETE:
+        return change
+    if object_type == Entry.REF_BOOK:
+        change.update({"code": code, "name": value})
+    elif object_type == Entry.VERSION:
+        change.update({"ref_book_id": parent_id, "version": code, "date": date.isoformat()})
+    else:
+        change.update({"version_id": parent_id, "code": code, "value": value})
+    return change
@@ -0,0 +1,103 @@
+import gzip
+import zlib
+from collections.abc import Iterable, Iterator
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Расширения файлов сжатых копий (см. payloads.py).
+SUFFIXES = {'br': '.br', 'zstd': '.zst', 'gzip': '.gz'}
+
+# Уровни сжатия: для ответов, сжимаемых при каждом запросе, и для сжимаемых один раз (готовые копии).
+_LEVELS = {
+    'br': (5, 11),
+    'zstd': (3, 19),
+    'gzip': (6, 9),
+}
+
+
+def get_encodings() -> list[str]:
+    """
+    Доступные кодировки (Content-Encoding) в порядке предпочтения сервера.
+    brotli и zstd доступны, только если установлены пакеты brotli и zstandard.
+    """
+    encodings = []
+    if brotli is not None:
+        encodings.append('br')
+    if zstandard is not None:
+        encodings.append('zstd')
+    encodings.append('gzip')
+    return encodings
+
+
+def choose_encoding(accept_encoding: str, encodings: Iterable[str] | None = None) -> str | None:
+    """
+    Выбор кодировки по заголовку Accept-Encoding с учётом весов q.
+    При равных весах выбирается кодировка, раньше указанная в encodings.
+    :accept_encoding: Значение заголовка Accept-Encoding запроса.
+    :encodings: Кодировки, из которых выбирается подходящая. По умолчанию - все доступные.
+    :return: Кодировка либо None, если клиент не принимает ни одну из них.
+    """
+    weights = {}
+    for part in accept_encoding.split(','):
+        encoding, _, params = part.partition(';')
+        encoding = encoding.strip().lower()
+        if not encoding:
+            continue
+        try:
+            weights[encoding] = float(params.strip().removeprefix('q=')) if params.strip() else 1.0
+        except ValueError:
+            continue
+    best, best_weight = None, 0.0
+    for encoding in encodings if encodings is not None else get_encodings():
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    """
+    Сжатие данных.
+    :static: Максимальное сжатие для данных, которые сжимаются один раз и отдаются многократно.
+    """
+    level = _LEVELS[encoding][static]
+    if encoding == 'gzip':
+        # mtime=0 - одинаковые данные дают одинаковый результат.
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, static: bool = False) -> Iterator[bytes]:
+    """
+    Потоковое сжатие.
+    :static: Максимальное сжатие (см. compress). Без него каждый фрагмент отдаётся клиенту сразу после сжатия.
+    """
+    level = _LEVELS[encoding][static]
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, flush, finish = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+    elif encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        process, flush, finish = (
+            compressor.compress, lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), compressor.flush,
+        )
+    for chunk in chunks:
+        data = process(chunk)
+        if not static:
+            data += flush()
+        if data:
+            yield data
+    yield finish()
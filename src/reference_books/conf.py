@@ -0,0 +1,49 @@
+from django.conf import settings
+
+DEFAULTS = {
+    # Индекс элементов в памяти процесса для validate_elements (см. element_index.py).
+    'ELEMENT_INDEX_ENABLED': False,
+    # Ограничение памяти индекса элементов в байтах. При превышении вытесняются целые версии (LRU).
+    'ELEMENT_INDEX_MAX_BYTES': 256 * 1024 * 1024,
+    # Каталог файлов элементов версий, отображаемых в память, для validate_elements (см. element_store.py).
+    # None - файлы не используются.
+    'ELEMENT_STORE_ROOT': None,
+    # Потоковая отдача списка элементов справочника (StreamingHttpResponse) вместо сериализации в память.
+    'STREAM_ELEMENTS': False,
+    # Количество элементов, читаемых из БД и отдаваемых клиенту за один раз при потоковой отдаче.
+    'STREAM_CHUNK_SIZE': 2000,
+    # Формирование списков справочников и элементов из .values() без ModelSerializer.
+    'FAST_LIST_RENDERING': True,
+    # Cache-Control: max-age (в секундах) для списков элементов прошлых версий, запрошенных по ?version=.
+    'PAST_VERSION_MAX_AGE': 365 * 24 * 60 * 60,
+    # Наибольшее количество различий версий, сохраняемых в общем кэше (см. services.get_version_diff).
+    # Большие различия только отдаются потоком и не накапливаются в памяти.
+    'DIFF_CACHE_MAX_ROWS': 10000,
+    # Псевдоним кэша из settings.CACHES для общего кэша справочников (см. caches.py).
+    'CACHE_ALIAS': 'default',
+    # Время хранения значений общего кэша в секундах. Устаревшие значения перестают читаться сразу
+    # после изменения данных, а удаляются бэкендом по истечении этого времени.
+    'CACHE_TIMEOUT': 24 * 60 * 60,
+    # Каталог готовых файлов JSON списков элементов версий (см. payloads.py). None - файлы не используются.
+    'PAYLOAD_ROOT': None,
+    # PRAGMA, выполняемые при открытии каждого соединения SQLite: {имя: значение}.
+    'SQLITE_PRAGMAS': {},
+    # Псевдонимы БД из settings.DATABASES - реплики для чтения эндпоинтами справочников (см. routers.py).
+    'READ_REPLICAS': [],
+    # Время (в секундах) после изменения справочников, в течение которого чтение выполняется из основной БД,
+    # пока изменения не дошли до реплик.
+    'REPLICA_LAG': 5,
+    # Запись изменений справочников в журнал для эндпоинта /changes/ (см. changelog.py).
+    'CHANGE_LOG_ENABLED': True,
+    # Файл снимка справочников, записываемый командой export_snapshot и отдаваемый эндпоинтом /snapshot/.
+    # None либо отсутствующий файл - снимок формируется при запросе (см. snapshots.py).
+    'SNAPSHOT_PATH': None,
+}
+
+
+def get_setting(name: str):
+    """
+    Получение настройки приложения из словаря settings.REFERENCE_BOOKS (либо значения по умолчанию).
+    Читается при каждом обращении, чтобы работал override_settings.
+    """
+    return getattr(settings, 'REFERENCE_BOOKS', {}).get(name, DEFAULTS[name])
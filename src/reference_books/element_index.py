@@ -0,0 +1,165 @@
+import sys
+import threading
+from collections import OrderedDict
+
+from . import models
+from .conf import get_setting
+
+# Примерные накладные расходы на одну запись словаря (слот хэш-таблицы и ссылки).
+_ENTRY_OVERHEAD = 64
+
+
+class ElementIndex:
+    """
+    Индекс элементов справочников в памяти процесса: {id версии: {код: значение}}.
+    Версии загружаются целиком при первом обращении и вытесняются целиком
+    по принципу LRU при превышении ограничения памяти (ELEMENT_INDEX_MAX_BYTES).
+    Версия хранится вместе с ревизией, для которой загружена, и загружается заново, когда ревизия
+    (увеличивается при любом изменении элементов, см. signals.py) отличается: так изменения,
+    сделанные другими процессами, не остаются незамеченными. Изменения отдельных элементов, сделанные
+    в этом процессе, применяются к загруженной версии без повторной загрузки (см. apply_change).
+    """
+
+    def __init__(self):
+        self._versions: OrderedDict[int, dict[str, str]] = OrderedDict()
+        self._revisions: dict[int, int] = {}
+        self._sizes: dict[int, int] = {}
+        # Версии, которые не помещаются в индекс целиком: {id версии: ревизия}.
+        self._oversized: dict[int, int] = {}
+        self._total_size = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def contains(self, version_id: int, revision: int, code: str, value: str) -> bool | None:
+        """
+        Проверка наличия элемента в версии справочника.
+        :version_id: id версии справочника.
+        :revision: Текущая ревизия версии.
+        :code: Код элемента справочника.
+        :value: Значение элемента справочника.
+        :return: Флаг присутствия элемента либо None, если версия не помещается в индекс
+                 и проверку нужно выполнить запросом к БД.
+        """
+        elements = self._get_elements(version_id, revision)
+        if elements is None:
+            return None
+        return elements.get(code) == value
+
+    def get_revision(self, version_id: int) -> int | None:
+        """
+        Ревизия, для которой загружена версия, либо None, если версии нет в индексе.
+        """
+        with self._lock:
+            return self._revisions.get(version_id)
+
+    def apply_change(self, version_id: int, revision: int, removed_code: str | None = None,
+                     added: tuple[str, str] | None = None) -> bool:
+        """
+        Применение изменения одного элемента к загруженной версии.
+        Изменение применяется, только если версия загружена для предыдущей ревизии, то есть других изменений
+        элементов после загрузки не было. Иначе версия будет загружена заново при следующем обращении.
+        :version_id: id версии справочника.
+        :revision: Ревизия версии после изменения.
+        :removed_code: Код удалённого элемента (либо прежний код изменённого элемента).
+        :added: Пара (код, значение) добавленного или изменённого элемента.
+        :return: Флаг того, что изменение применено.
+        """
+        with self._lock:
+            # Загрузки, начатые до изменения, могли прочитать элементы до него - их результат не сохраняется.
+            self._generation += 1
+            elements = self._versions.get(version_id)
+            if elements is None or self._revisions[version_id] != revision - 1:
+                return False
+            if removed_code is not None and removed_code in elements:
+                self._resize(version_id, -self._entry_size(removed_code, elements.pop(removed_code)))
+            if added is not None:
+                code, value = added
+                if code in elements:
+                    self._resize(version_id, -self._entry_size(code, elements[code]))
+                elements[code] = value
+                self._resize(version_id, self._entry_size(code, value))
+            self._revisions[version_id] = revision
+            self._evict(keep=version_id)
+            return True
+
+    def discard(self, version_id: int) -> None:
+        """
+        Удаление версии из индекса. Версия будет загружена заново при следующем обращении.
+        """
+        with self._lock:
+            self._generation += 1
+            self._oversized.pop(version_id, None)
+            self._drop(version_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._versions.clear()
+            self._revisions.clear()
+            self._sizes.clear()
+            self._oversized.clear()
+            self._total_size = 0
+
+    def _get_elements(self, version_id: int, revision: int) -> dict[str, str] | None:
+        with self._lock:
+            elements = self._versions.get(version_id)
+            if elements is not None:
+                if self._revisions[version_id] == revision:
+                    self._versions.move_to_end(version_id)
+                    return elements
+                self._drop(version_id)
+            if self._oversized.get(version_id) == revision:
+                return None
+            generation = self._generation
+        max_size = get_setting('ELEMENT_INDEX_MAX_BYTES')
+        elements = {}
+        size = 0
+        rows = (
+            models.ReferenceBookElement.objects
+            .filter(ref_book_version_id=version_id)
+            .values_list('code', 'value')
+            .iterator()
+        )
+        for code, value in rows:
+            elements[code] = value
+            size += self._entry_size(code, value)
+            if size > max_size:
+                with self._lock:
+                    if generation == self._generation:
+                        self._oversized[version_id] = revision
+                return None
+        with self._lock:
+            # Если во время загрузки индекс менялся, загруженные данные могли устареть - не сохраняем их.
+            # Элементы, изменённые после чтения ревизии, лишь приводят к повторной загрузке со следующей ревизией.
+            if generation == self._generation and version_id not in self._versions:
+                self._oversized.pop(version_id, None)
+                self._versions[version_id] = elements
+                self._revisions[version_id] = revision
+                self._sizes[version_id] = 0
+                self._resize(version_id, size)
+                self._evict(keep=version_id)
+        return elements
+
+    def _resize(self, version_id: int, delta: int) -> None:
+        self._sizes[version_id] += delta
+        self._total_size += delta
+
+    def _drop(self, version_id: int) -> None:
+        if self._versions.pop(version_id, None) is not None:
+            del self._revisions[version_id]
+            self._total_size -= self._sizes.pop(version_id)
+
+    def _evict(self, keep: int | None = None) -> None:
+        max_size = get_setting('ELEMENT_INDEX_MAX_BYTES')
+        while self._total_size > max_size and self._versions:
+            version_id = next(iter(self._versions))
+            if version_id == keep:
+                break
+            self._drop(version_id)
+
+    @staticmethod
+    def _entry_size(code: str, value: str) -> int:
+        return sys.getsizeof(code) + sys.getsizeof(value) + _ENTRY_OVERHEAD
+
+
+element_index = ElementIndex()
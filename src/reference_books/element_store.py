@@ -0,0 +1,256 @@
+"""
+Файлы элементов версий справочников для validate_elements, отображаемые в память (mmap).
+Файл версии собирается командой build_element_store (и import_refbook_version для загруженной версии)
+в каталоге ELEMENT_STORE_ROOT. В отличие от индекса в памяти процесса (element_index.py) страницы файла
+разделяются всеми процессами сервера через страничный кэш ОС.
+
+Имя файла содержит ревизию версии, поэтому изменённые элементы никогда не читаются из устаревшего файла:
+для новой ревизии файла нет, и проверка выполняется запросом к БД до следующей сборки.
+Файл записывается во временный и атомарно переименовывается, процессы открывают его при первом обращении
+к новой ревизии, а прежние отображения остаются корректными до закрытия.
+
+Формат (все целые - беззнаковые little-endian):
+    magic b'RBELEM1\\n' | u64 id версии | u32 ревизия | u32 количество элементов n
+    | u32 смещения [n + 1] кодов | u32 смещения [n + 1] значений
+    | коды UTF-8 подряд, по возрастанию байтов | значения UTF-8 подряд в порядке кодов
+Смещения отсчитываются от начала строк кодов и значений соответственно, код ищется двоичным поиском.
+"""
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from . import models
+from .conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'RBELEM1\n'
+HEADER = struct.Struct('<8sQII')
+OFFSET = struct.Struct('<I')
+OFFSET_SIZE = OFFSET.size
+# Время (в секундах), через которое снова проверяется отсутствующий либо повреждённый файл ревизии:
+# файл может быть собран командой build_element_store позже.
+MISSING_RECHECK_INTERVAL = 60
+
+
+class ElementStoreFormatError(ValueError):
+    pass
+
+
+class ElementStoreFile:
+    """
+    Файл элементов одной ревизии версии справочника.
+    """
+
+    def __init__(self, path: Path):
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < HEADER.size:
+                raise ElementStoreFormatError(f'{path}: файл слишком мал для файла элементов.')
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open(path, size)
+        except ElementStoreFormatError:
+            self._mmap.close()
+            raise
+
+    def _open(self, path: Path, size: int) -> None:
+        magic, self.version_id, self.revision, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ElementStoreFormatError(f'{path} не является файлом элементов версии справочника.')
+        table_size = (count + 1) * OFFSET_SIZE
+        codes_start = HEADER.size + 2 * table_size
+        if codes_start > size:
+            raise ElementStoreFormatError(f'{path}: таблицы смещений выходят за пределы файла.')
+        # Проверка до создания memoryview: отображение с экспортированными буферами нельзя закрыть.
+        codes_first, codes_end, values_first, values_end = (
+            OFFSET.unpack_from(self._mmap, position)[0]
+            for position in (HEADER.size, HEADER.size + table_size - OFFSET_SIZE,
+                             HEADER.size + table_size, codes_start - OFFSET_SIZE)
+        )
+        if codes_first != 0 or values_first != 0 or codes_start + codes_end + values_end != size:
+            raise ElementStoreFormatError(f'{path}: размер строк не соответствует таблицам смещений.')
+        self._count = count
+        tables = memoryview(self._mmap)[HEADER.size:codes_start]
+        if sys.byteorder == 'little':
+            # Смещения читаются из отображения без копирования.
+            tables = tables.cast('I')
+        else:
+            tables = array('I', tables)
+            tables.byteswap()
+        self._code_offsets = tables[:count + 1]
+        self._value_offsets = tables[count + 1:]
+        self._codes_start = codes_start
+        self._values_start = codes_start + codes_end
+
+    def __len__(self):
+        return self._count
+
+    def get(self, code: str) -> str | None:
+        """
+        Значение элемента с кодом code либо None, если элемента нет.
+        """
+        key = code.encode()
+        data, offsets, start = self._mmap, self._code_offsets, self._codes_start
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if data[start + offsets[middle]:start + offsets[middle + 1]] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._count or data[start + offsets[low]:start + offsets[low + 1]] != key:
+            return None
+        offsets, start = self._value_offsets, self._values_start
+        return data[start + offsets[low]:start + offsets[low + 1]].decode()
+
+
+class ElementStore:
+    """
+    Открытые файлы элементов версий в процессе: {id версии: файл последней запрошенной ревизии}.
+    """
+
+    def __init__(self):
+        self._files: dict[int, ElementStoreFile] = {}
+        # Ревизии без файла (либо с повреждённым файлом): {id версии: (ревизия, время следующей проверки)}.
+        self._missing: dict[int, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def contains(self, version_id: int, revision: int, code: str, value: str) -> bool | None:
+        """
+        Проверка наличия элемента в версии справочника.
+        :version_id: id версии справочника.
+        :revision: Текущая ревизия версии.
+        :code: Код элемента справочника.
+        :value: Значение элемента справочника.
+        :return: Флаг присутствия элемента либо None, если файл ревизии не собран (или файлы не используются)
+                 и проверку нужно выполнить иначе.
+        """
+        store_file = self._get_file(version_id, revision)
+        if store_file is None:
+            return None
+        try:
+            return store_file.get(code) == value
+        except UnicodeDecodeError:
+            # Строки файла повреждены - проверка выполняется иначе до пересборки файла.
+            logger.warning('Файл элементов версии %s ревизии %s повреждён.', version_id, revision)
+            self._set_missing(version_id, revision)
+            return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._missing.clear()
+
+    def _get_file(self, version_id: int, revision: int) -> ElementStoreFile | None:
+        store_file = self._files.get(version_id)
+        if store_file is not None and store_file.revision == revision:
+            return store_file
+        missing = self._missing.get(version_id)
+        if missing is not None and missing[0] == revision and time.monotonic() < missing[1]:
+            return None
+        root = get_setting('ELEMENT_STORE_ROOT')
+        if root is None:
+            return None
+        path = _get_path(Path(root), version_id, revision)
+        try:
+            store_file = ElementStoreFile(path)
+        except FileNotFoundError:
+            self._set_missing(version_id, revision)
+            return None
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning('Файл элементов %s не может быть прочитан: %s', path, e)
+            self._set_missing(version_id, revision)
+            return None
+        with self._lock:
+            # Прежнее отображение закрывается при удалении последней ссылки на него,
+            # поэтому параллельные проверки по нему завершаются корректно.
+            self._files[version_id] = store_file
+            self._missing.pop(version_id, None)
+        return store_file
+
+    def file_built(self, version_id: int) -> None:
+        """
+        Сброс отметки об отсутствии файла версии после его сборки в этом процессе.
+        """
+        with self._lock:
+            self._missing.pop(version_id, None)
+
+    def _set_missing(self, version_id: int, revision: int) -> None:
+        with self._lock:
+            store_file = self._files.get(version_id)
+            if store_file is not None and store_file.revision == revision:
+                del self._files[version_id]
+            self._missing[version_id] = (revision, time.monotonic() + MISSING_RECHECK_INTERVAL)
+
+
+def build_element_store(version_id: int, revision: int) -> bool:
+    """
+    Сборка файла элементов ревизии версии справочника. Файлы прежних ревизий удаляются.
+    :version_id: id версии справочника.
+    :revision: Ревизия версии, для которой собирается файл.
+    :return: Флаг того, что файл создан. Если за время сборки ревизия изменилась, файл не сохраняется.
+    """
+    root = Path(get_setting('ELEMENT_STORE_ROOT'))
+    root.mkdir(parents=True, exist_ok=True)
+    path = _get_path(root, version_id, revision)
+    rows = (
+        models.ReferenceBookElement.objects
+        .filter(ref_book_version_id=version_id)
+        .values_list('code', 'value')
+        .iterator(chunk_size=get_setting('STREAM_CHUNK_SIZE'))
+    )
+    # Порядок байтов UTF-8 не зависит от правил сортировки БД.
+    elements = sorted((code.encode(), value.encode()) for code, value in rows)
+    code_offsets, value_offsets = array('I', [0]), array('I', [0])
+    for code, value in elements:
+        code_offsets.append(code_offsets[-1] + len(code))
+        value_offsets.append(value_offsets[-1] + len(value))
+    if sys.byteorder != 'little':
+        code_offsets.byteswap()
+        value_offsets.byteswap()
+    with tempfile.NamedTemporaryFile(dir=root, prefix='.tmp-', delete=False) as file:
+        temp_path = Path(file.name)
+    try:
+        with temp_path.open('wb') as file:
+            file.write(HEADER.pack(MAGIC, version_id, revision, len(elements)))
+            file.write(code_offsets.tobytes())
+            file.write(value_offsets.tobytes())
+            file.writelines(code for code, value in elements)
+            file.writelines(value for code, value in elements)
+        # Элементы могли измениться во время чтения - такой файл не соответствует ревизии.
+        if not models.ReferenceBookVersion.objects.filter(pk=version_id, revision=revision).exists():
+            return False
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    element_store.file_built(version_id)
+    for stale_path in root.glob(f'{version_id}-*.elements'):
+        if stale_path != path:
+            stale_path.unlink(missing_ok=True)
+    return True
+
+
+def remove_element_store(version_id: int) -> None:
+    """
+    Удаление файлов всех ревизий версии справочника.
+    """
+    root = get_setting('ELEMENT_STORE_ROOT')
+    if root is None:
+        return
+    for path in Path(root).glob(f'{version_id}-*.elements'):
+        path.unlink(missing_ok=True)
+
+
+def _get_path(root: Path, version_id: int, revision: int) -> Path:
+    return root / f'{version_id}-{revision}.elements'
+
+
+element_store = ElementStore()
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reference_books import models
+from reference_books.conf import get_setting
+from reference_books.payloads import build_payload
+
+
+class Command(BaseCommand):
+    help = (
+        'Сборка готовых файлов JSON (и сжатых копий) списков элементов версий справочников в каталоге '
+        'PAYLOAD_ROOT. Без команды файлы создаются при первом запросе списка элементов версии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ref-book', help='Код справочника. По умолчанию - все справочники.')
+
+    def handle(self, *args, **options):
+        if get_setting('PAYLOAD_ROOT') is None:
+            raise CommandError('Не задана настройка PAYLOAD_ROOT.')
+        versions = models.ReferenceBookVersion.objects.order_by('id')
+        if options['ref_book'] is not None:
+            versions = versions.filter(ref_book__code=options['ref_book'])
+        count = 0
+        for version_id, revision in versions.values_list('id', 'revision'):
+            count += build_payload(version_id, revision)
+        self.stdout.write(self.style.SUCCESS(f'Собрано файлов версий: {count}'))
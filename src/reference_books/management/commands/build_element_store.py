@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reference_books import models
+from reference_books.conf import get_setting
+from reference_books.element_store import build_element_store
+
+
+class Command(BaseCommand):
+    help = (
+        'Сборка файлов элементов версий справочников в каталоге ELEMENT_STORE_ROOT для проверки элементов '
+        'через mmap (см. element_store.py). Файл заменяется атомарно, файлы прежних ревизий удаляются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ref-book', help='Код справочника. По умолчанию - все справочники.')
+
+    def handle(self, *args, **options):
+        if get_setting('ELEMENT_STORE_ROOT') is None:
+            raise CommandError('Не задана настройка ELEMENT_STORE_ROOT.')
+        versions = models.ReferenceBookVersion.objects.order_by('id')
+        if options['ref_book'] is not None:
+            versions = versions.filter(ref_book__code=options['ref_book'])
+        count = 0
+        for version_id, revision in versions.values_list('id', 'revision'):
+            count += build_element_store(version_id, revision)
+        self.stdout.write(self.style.SUCCESS(f'Собрано файлов версий: {count}'))
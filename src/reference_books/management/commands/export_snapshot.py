@@ -0,0 +1,28 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reference_books.conf import get_setting
+from reference_books.snapshots import write_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгрузка всех справочников, версий и элементов в двоичный файл снимка (формат описан в snapshots.py). '
+        'Файл записывается потоково и атомарно заменяет прежний; его же отдаёт эндпоинт /snapshot/.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', type=Path,
+                            help='Путь к файлу снимка. По умолчанию - настройка SNAPSHOT_PATH.')
+
+    def handle(self, *args, **options):
+        path = options['output'] or get_setting('SNAPSHOT_PATH')
+        if path is None:
+            raise CommandError('Укажите --output либо настройку SNAPSHOT_PATH.')
+        start = time.perf_counter()
+        size = write_snapshot(Path(path))
+        self.stdout.write(self.style.SUCCESS(
+            f'Снимок записан в {path}: {size} байт за {time.perf_counter() - start:.1f} с.'
+        ))
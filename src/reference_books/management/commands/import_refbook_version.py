@@ -0,0 +1,222 @@
+import csv
+import json
+import time
+from collections.abc import Iterator
+from datetime import date
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+
+from reference_books import changelog, models
+from reference_books.conf import get_setting
+from reference_books.element_store import build_element_store
+
+CODE_MAX_LENGTH = models.ReferenceBookElement._meta.get_field('code').max_length
+VALUE_MAX_LENGTH = models.ReferenceBookElement._meta.get_field('value').max_length
+
+# Операции файла изменений (--base-version).
+OP_ADD = 'add'
+OP_CHANGE = 'change'
+OP_REMOVE = 'remove'
+DIFF_OPERATIONS = (OP_ADD, OP_CHANGE, OP_REMOVE)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загрузка новой версии справочника из файла CSV (столбцы code, value) или JSONL '
+        '(объекты {"code": ..., "value": ...}). Файл читается потоково, элементы вставляются '
+        'пакетами bulk_create в одной транзакции. '
+        'С --base-version файл содержит только изменения относительно базовой версии '
+        '(дополнительный столбец/ключ op: add, change или remove): элементы базовой версии копируются '
+        'одним запросом INSERT ... SELECT, после чего применяются изменения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path, help='Путь к файлу с элементами.')
+        parser.add_argument('--ref-book', required=True, help='Код справочника.')
+        parser.add_argument('--ref-book-version', required=True, help='Номер новой версии.')
+        parser.add_argument('--date', required=True, type=date.fromisoformat,
+                            help='Дата начала действия версии в формате ГГГГ-ММ-ДД.')
+        parser.add_argument('--base-version',
+                            help='Номер базовой версии. Если указан, файл содержит изменения относительно неё.')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Формат файла. По умолчанию определяется по расширению.')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Количество элементов в одном bulk_create.')
+        parser.add_argument('--delimiter', default=',', help='Разделитель столбцов CSV.')
+        parser.add_argument('--encoding', default='utf-8', help='Кодировка файла.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным числом.')
+        path = options['path']
+        if not path.is_file():
+            raise CommandError(f'Файл {path} не найден.')
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('csv', 'jsonl'):
+            raise CommandError('Не удалось определить формат файла, укажите --format.')
+        ref_book = models.ReferenceBook.objects.filter(code=options['ref_book']).first()
+        if ref_book is None:
+            raise CommandError(f'Справочник с кодом {options["ref_book"]} не найден.')
+        self._check_version_is_unique(ref_book, options['ref_book_version'], options['date'])
+        base_version = None
+        if options['base_version'] is not None:
+            base_version = models.ReferenceBookVersion.objects.filter(
+                ref_book=ref_book, version=options['base_version'],
+            ).first()
+            if base_version is None:
+                raise CommandError(f'Базовая версия {options["base_version"]} справочника {ref_book.code} не найдена.')
+
+        start = time.perf_counter()
+        with path.open(encoding=options['encoding'], newline='') as file:
+            if file_format == 'csv':
+                rows = self._read_csv(file, options['delimiter'], diff=base_version is not None)
+            else:
+                rows = self._read_jsonl(file, diff=base_version is not None)
+            try:
+                with transaction.atomic():
+                    version = models.ReferenceBookVersion.objects.create(
+                        ref_book=ref_book,
+                        version=options['ref_book_version'],
+                        date=options['date'],
+                    )
+                    if base_version is None:
+                        count = self._insert_elements(version, rows, options['batch_size'])
+                    else:
+                        count = self._apply_diff(base_version, version, rows, options['batch_size'])
+                    # bulk_create и SQL не отправляют сигналы, элементы записываются в журнал изменений разом.
+                    changelog.record_version_elements(version.pk)
+            except IntegrityError as e:
+                raise CommandError(f'Коды элементов в версии справочника должны быть уникальны: {e}')
+        if get_setting('ELEMENT_STORE_ROOT') is not None:
+            # Файл элементов загруженной версии готов к моменту, когда она станет текущей.
+            version.refresh_from_db(fields=['revision'])
+            build_element_store(version.pk, version.revision)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено элементов: {count} за {elapsed:.1f} с ({count / elapsed if elapsed else 0:.0f} строк/с).'
+        ))
+
+    @staticmethod
+    def _check_version_is_unique(ref_book, version, version_date):
+        versions = models.ReferenceBookVersion.objects.filter(ref_book=ref_book)
+        if versions.filter(version=version).exists():
+            raise CommandError(f'Версия {version} справочника {ref_book.code} уже существует.')
+        if versions.filter(date=version_date).exists():
+            raise CommandError(f'Версия справочника {ref_book.code} с датой {version_date} уже существует.')
+
+    def _insert_elements(self, version, rows: Iterator[tuple[str | None, str, str]], batch_size: int) -> int:
+        count = 0
+        elements = (
+            models.ReferenceBookElement(ref_book_version=version, code=code, value=value)
+            for op, code, value in rows
+        )
+        while batch := list(islice(elements, batch_size)):
+            models.ReferenceBookElement.objects.bulk_create(batch, batch_size=batch_size)
+            count += len(batch)
+            if self.verbosity >= 2:
+                self.stdout.write(f'Загружено элементов: {count}')
+        return count
+
+    def _apply_diff(self, base_version, version, rows: Iterator[tuple[str, str, str]], batch_size: int) -> int:
+        """
+        Создание версии копированием элементов базовой версии и применением изменений.
+        :return: Количество элементов в новой версии.
+        """
+        table = connection.ops.quote_name(models.ReferenceBookElement._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (ref_book_version_id, code, value) '
+                f'SELECT %s, code, value FROM {table} WHERE ref_book_version_id = %s',
+                [version.pk, base_version.pk],
+            )
+            count = cursor.rowcount
+        if self.verbosity >= 2:
+            self.stdout.write(f'Скопировано элементов базовой версии: {count}')
+        while batch := list(islice(rows, batch_size)):
+            # Изменённые элементы удаляются и вставляются заново вместе с добавленными.
+            removed_codes = [code for op, code, value in batch if op != OP_ADD]
+            deleted = self._delete_elements(table, version, removed_codes)
+            if deleted != len(removed_codes):
+                raise CommandError('Изменяемые и удаляемые элементы должны присутствовать в базовой версии.')
+            models.ReferenceBookElement.objects.bulk_create(
+                [
+                    models.ReferenceBookElement(ref_book_version=version, code=code, value=value)
+                    for op, code, value in batch
+                    if op != OP_REMOVE
+                ],
+                batch_size=batch_size,
+            )
+            count += sum(op == OP_ADD for op, code, value in batch) - sum(op == OP_REMOVE for op, code, value in batch)
+        return count
+
+    @staticmethod
+    def _delete_elements(table: str, version, codes: list[str]) -> int:
+        deleted = 0
+        # Ограничение числа параметров в одном запросе (SQLite ограничивает количество переменных).
+        for start in range(0, len(codes), 500):
+            chunk = codes[start:start + 500]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {table} WHERE ref_book_version_id = %s '
+                    f'AND code IN ({", ".join(["%s"] * len(chunk))})',
+                    [version.pk, *chunk],
+                )
+                deleted += cursor.rowcount
+        return deleted
+
+    def _read_csv(self, file, delimiter: str, diff: bool) -> Iterator[tuple[str | None, str, str]]:
+        reader = csv.DictReader(file, delimiter=delimiter)
+        required_columns = {'op', 'code', 'value'} if diff else {'code', 'value'}
+        if not reader.fieldnames or not required_columns <= set(reader.fieldnames):
+            raise CommandError(f'В CSV файле должны быть столбцы {", ".join(sorted(required_columns))}.')
+        code_lines = {} if diff else None
+        for row in reader:
+            yield self._validate_row(reader.line_num, row, code_lines)
+
+    def _read_jsonl(self, file, diff: bool) -> Iterator[tuple[str | None, str, str]]:
+        code_lines = {} if diff else None
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise CommandError(f'Строка {line_number}: некорректный JSON ({e}).')
+            if not isinstance(row, dict):
+                raise CommandError(f'Строка {line_number}: ожидается объект с ключами code и value.')
+            yield self._validate_row(line_number, row, code_lines)
+
+    @staticmethod
+    def _validate_row(line_number: int, row: dict, code_lines: dict[str, int] | None) -> tuple[str | None, str, str]:
+        """
+        Проверка строки файла.
+        :line_number: Номер строки файла.
+        :row: Строка файла.
+        :code_lines: Для файла изменений (--base-version) - номера строк с уже прочитанными кодами {код: строка},
+                     дополняется кодом строки. None - файл всех элементов версии.
+        :return: Тройка (операция либо None, код, значение).
+        """
+        op, code, value = row.get('op'), row.get('code'), row.get('value')
+        if code_lines is not None and op not in DIFF_OPERATIONS:
+            raise CommandError(f'Строка {line_number}: операция должна быть одной из: {", ".join(DIFF_OPERATIONS)}.')
+        if not isinstance(code, str) or not code:
+            raise CommandError(f'Строка {line_number}: не указан код элемента.')
+        if code_lines is not None:
+            # Повторный код в одном пакете приводил бы к ошибке об отсутствии элемента в базовой версии,
+            # а в разных пакетах результат зависел бы от --batch-size, поэтому каждый код указывается один раз.
+            if code in code_lines:
+                raise CommandError(f'Строка {line_number}: код {code} уже указан в строке {code_lines[code]}.')
+            code_lines[code] = line_number
+        if op == OP_REMOVE:
+            return op, code, ''
+        if not isinstance(value, str) or not value:
+            raise CommandError(f'Строка {line_number}: не указано значение элемента.')
+        if len(code) > CODE_MAX_LENGTH:
+            raise CommandError(f'Строка {line_number}: код длиннее {CODE_MAX_LENGTH} символов.')
+        if len(value) > VALUE_MAX_LENGTH:
+            raise CommandError(f'Строка {line_number}: значение длиннее {VALUE_MAX_LENGTH} символов.')
+        return op, code, value
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from reference_books import services
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновление указателей на текущие версии справочников. '
+        'Запускается ежедневно, чтобы версии с наступившей датой начала действия стали текущими.'
+    )
+
+    def handle(self, *args, **options):
+        changed = services.roll_current_versions()
+        self.stdout.write(self.style.SUCCESS(f'Текущая версия изменилась у справочников: {changed}'))
@@ -0,0 +1,71 @@
+import hashlib
+
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .caches import shared_cache
+from .compression import choose_encoding, compress, compress_stream
+
+# Пространство имён общего кэша для сжатых копий неизменяемых ответов.
+COMPRESSED_NAMESPACE = 'compressed'
+# Ответы меньшего размера не сжимаются.
+MIN_LENGTH = 200
+# Сжимаемые типы содержимого. HTML (админ-панель) не сжимается (атака BREACH на CSRF-токены).
+COMPRESSIBLE_CONTENT_TYPES = (
+    'application/json',
+    'application/vnd.oai.openapi',
+    'text/csv',
+    'text/plain',
+)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Сжатие ответов API в кодировке, выбранной по заголовку Accept-Encoding (br, zstd, gzip - см. compression.py).
+    Неизменяемые ответы (с ETag и Cache-Control: public, например элементы прошлых версий) сжимаются
+    с максимальным уровнем один раз, сжатая копия хранится в общем кэше.
+    Ответы, уже имеющие Content-Encoding (готовые файлы, см. payloads.py), не изменяются.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not self._is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not response.streaming and len(response.content) < MIN_LENGTH:
+            return response
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            if self._is_immutable(response):
+                content = response.content
+                key = f'{encoding}:{hashlib.blake2b(content, digest_size=16).hexdigest()}'
+                compressed = shared_cache.get_or_set(
+                    COMPRESSED_NAMESPACE, key, lambda: compress(content, encoding, static=True),
+                )
+            else:
+                compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # Сжатое представление побайтово отличается от исходного.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def _is_compressible(response) -> bool:
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+
+    @staticmethod
+    def _is_immutable(response) -> bool:
+        return response.has_header('ETag') and 'public' in response.get('Cache-Control', '')
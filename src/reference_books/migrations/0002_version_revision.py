@@ -0,0 +1,23 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reference_books', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='referencebookversion',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='referencebookversion',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Увеличивается при каждом изменении элементов версии.', verbose_name='Ревизия содержимого'),
+        ),
+    ]
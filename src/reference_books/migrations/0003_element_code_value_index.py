@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reference_books', '0002_version_revision'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='referencebookelement',
+            index=models.Index(fields=['ref_book_version', 'code', 'value'], name='refbook_element_code_value_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:48
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.utils.timezone import localdate
+import django.db.models.deletion
+
+
+def fill_current_versions(apps, schema_editor):
+    ReferenceBook = apps.get_model('reference_books', 'ReferenceBook')
+    ReferenceBookVersion = apps.get_model('reference_books', 'ReferenceBookVersion')
+    ReferenceBook.objects.update(
+        current_version=Subquery(
+            ReferenceBookVersion.objects
+            .filter(ref_book_id=OuterRef('id'), date__lte=localdate())
+            .order_by('-date')
+            .values('id')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reference_books', '0003_element_code_value_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='referencebook',
+            name='current_version',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Обновляется при изменении версий и командой roll_current_versions.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='reference_books.referencebookversion', verbose_name='Текущая версия'),
+        ),
+        migrations.RunPython(fill_current_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# Полнотекстовый индекс FTS5 (токенизатор trigram - поиск подстроки без учёта регистра) по значениям элементов.
+# Таблица индекса не хранит значения (content=...), а обновляется триггерами таблицы элементов.
+# Создаётся только в SQLite 3.34+ (токенизатор trigram), в остальных случаях поиск выполняется без индекса
+# (см. services.search_elements).
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE reference_books_element_fts USING fts5(
+        value, content='reference_books_referencebookelement', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER reference_books_element_fts_insert AFTER INSERT ON reference_books_referencebookelement BEGIN
+        INSERT INTO reference_books_element_fts(rowid, value) VALUES (new.id, new.value);
+    END
+    """,
+    """
+    CREATE TRIGGER reference_books_element_fts_delete AFTER DELETE ON reference_books_referencebookelement BEGIN
+        INSERT INTO reference_books_element_fts(reference_books_element_fts, rowid, value)
+        VALUES ('delete', old.id, old.value);
+    END
+    """,
+    """
+    CREATE TRIGGER reference_books_element_fts_update AFTER UPDATE OF value ON reference_books_referencebookelement
+    BEGIN
+        INSERT INTO reference_books_element_fts(reference_books_element_fts, rowid, value)
+        VALUES ('delete', old.id, old.value);
+        INSERT INTO reference_books_element_fts(rowid, value) VALUES (new.id, new.value);
+    END
+    """,
+    "INSERT INTO reference_books_element_fts(reference_books_element_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS reference_books_element_fts_insert',
+    'DROP TRIGGER IF EXISTS reference_books_element_fts_delete',
+    'DROP TRIGGER IF EXISTS reference_books_element_fts_update',
+    'DROP TABLE IF EXISTS reference_books_element_fts',
+]
+
+
+def supports_fts(connection) -> bool:
+    return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 34, 0)
+
+
+def create_fts(apps, schema_editor):
+    if supports_fts(schema_editor.connection):
+        for sql in CREATE_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reference_books', '0004_ref_book_current_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reference_books', '0005_element_value_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(choices=[('ref_book', 'Справочник'), ('version', 'Версия справочника'), ('element', 'Элемент справочника')], max_length=10, verbose_name='Тип объекта')),
+                ('operation', models.CharField(choices=[('upsert', 'Создание или изменение'), ('delete', 'Удаление')], max_length=10, verbose_name='Операция')),
+                ('object_id', models.BigIntegerField(verbose_name='id объекта')),
+                ('parent_id', models.BigIntegerField(help_text='Справочник для версии, версия для элемента.', null=True, verbose_name='id родительского объекта')),
+                ('code', models.CharField(blank=True, help_text='Код справочника, номер версии либо код элемента.', max_length=100, verbose_name='Код')),
+                ('value', models.CharField(blank=True, help_text='Наименование справочника либо значение элемента.', max_length=300, verbose_name='Значение')),
+                ('date', models.DateField(null=True, verbose_name='Дата начала действия версии')),
+            ],
+            options={
+                'verbose_name': 'Запись журнала изменений',
+                'verbose_name_plural': 'Журнал изменений',
+            },
+        ),
+    ]
@@ -15,6 +15,16 @@ class ReferenceBook(models.Model):
         'Описание',
         blank=True,
     )
+    current_version = models.ForeignKey(
+        'ReferenceBookVersion',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name='Текущая версия',
+        help_text='Обновляется при изменении версий и командой roll_current_versions.',
+    )
 
     class Meta:
         verbose_name = 'Справочник'
@@ -25,6 +35,9 @@ class ReferenceBook(models.Model):
 
 
 class ReferenceBookVersion(models.Model):
+    # Поля состояния содержимого версии, которые не записываются при сохранении экземпляра.
+    CONTENT_STATE_FIELDS = ('revision', 'modified_at')
+
     ref_book = models.ForeignKey(
         ReferenceBook,
         on_delete=models.CASCADE,
@@ -37,12 +50,35 @@ class ReferenceBookVersion(models.Model):
     date = models.DateField(
         'Дата начала действия версии',
     )
+    revision = models.PositiveIntegerField(
+        'Ревизия содержимого',
+        default=0,
+        editable=False,
+        help_text='Увеличивается при каждом изменении элементов версии.',
+    )
+    modified_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+    )
 
     class Meta:
         verbose_name = 'Версия справочника'
         verbose_name_plural = 'Версии справочников'
         unique_together = [['ref_book', 'version'], ['ref_book', 'date']]
 
+    def __str__(self):
+        return f'Версия `{self.version}`'
+
+    def save(self, *args, **kwargs):
+        # Ревизия и дата изменения обновляются только через F() при изменении элементов (см. signals.py):
+        # сохранение загруженного ранее экземпляра вернуло бы прежнюю ревизию и совпадение ETag и имён файлов.
+        if not self._state.adding:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            kwargs['update_fields'] = [name for name in update_fields if name not in self.CONTENT_STATE_FIELDS]
+        super().save(*args, **kwargs)
+
 
 class ReferenceBookElement(models.Model):
     ref_book_version = models.ForeignKey(
@@ -63,3 +99,69 @@ class ReferenceBookElement(models.Model):
         verbose_name = 'Элемент справочника'
         verbose_name_plural = 'Элементы справочников'
         unique_together = [['ref_book_version', 'code']]
+        indexes = [
+            # Покрывающий индекс для проверки элементов (code, value) и выборки элементов версии
+            # без обращения к таблице.
+            models.Index(fields=['ref_book_version', 'code', 'value'], name='refbook_element_code_value_idx'),
+        ]
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Запись журнала изменений справочников для инкрементальной синхронизации (см. changelog.py).
+    Журнал только пополняется, id записи - токен, после которого клиент запрашивает следующие изменения.
+    Связи с изменёнными объектами не хранятся, чтобы записи об удалении оставались после удаления объектов.
+    """
+    REF_BOOK = 'ref_book'
+    VERSION = 'version'
+    ELEMENT = 'element'
+    OBJECT_TYPE_CHOICES = [
+        (REF_BOOK, 'Справочник'),
+        (VERSION, 'Версия справочника'),
+        (ELEMENT, 'Элемент справочника'),
+    ]
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    OPERATION_CHOICES = [
+        (UPSERT, 'Создание или изменение'),
+        (DELETE, 'Удаление'),
+    ]
+
+    object_type = models.CharField(
+        'Тип объекта',
+        max_length=10,
+        choices=OBJECT_TYPE_CHOICES,
+    )
+    operation = models.CharField(
+        'Операция',
+        max_length=10,
+        choices=OPERATION_CHOICES,
+    )
+    object_id = models.BigIntegerField(
+        'id объекта',
+    )
+    parent_id = models.BigIntegerField(
+        'id родительского объекта',
+        null=True,
+        help_text='Справочник для версии, версия для элемента.',
+    )
+    code = models.CharField(
+        'Код',
+        max_length=100,
+        blank=True,
+        help_text='Код справочника, номер версии либо код элемента.',
+    )
+    value = models.CharField(
+        'Значение',
+        max_length=300,
+        blank=True,
+        help_text='Наименование справочника либо значение элемента.',
+    )
+    date = models.DateField(
+        'Дата начала действия версии',
+        null=True,
+    )
+
+    class Meta:
+        verbose_name = 'Запись журнала изменений'
+        verbose_name_plural = 'Журнал изменений'
@@ -0,0 +1,23 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class ElementCursorPagination(CursorPagination):
+    """
+    Постраничная выдача элементов версии справочника по ключу (code) вместо смещения,
+    поэтому скорость не зависит от номера страницы: используется уникальный индекс (ref_book_version, code).
+    Включается только если в запросе указан page_size.
+    """
+    ordering = 'code'
+    page_size = None
+    page_size_query_param = 'page_size'
+    page_size_query_description = 'Количество элементов на странице. Если не указано, возвращаются все элементы.'
+    cursor_query_description = 'Курсор страницы (значение из ссылок next/previous).'
+    max_page_size = 1000
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'elements': data,
+        })
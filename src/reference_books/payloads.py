@@ -0,0 +1,128 @@
+import os
+import tempfile
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO
+
+from . import models
+from .compression import SUFFIXES, choose_encoding, compress_stream, get_encodings
+from .conf import get_setting
+from .renderers import stream_elements_json
+
+# Размер фрагмента при сжатии файлов.
+CHUNK_SIZE = 64 * 1024
+
+
+def get_payload(version_id: int, revision: int, accept_encoding: str = '') -> tuple[BinaryIO, str | None] | None:
+    """
+    Открытие файла с готовым JSON списка элементов версии справочника (в формате ответа
+    ReferenceBookElementListView). При отсутствии файл создаётся.
+    Файлы открываются без предварительной проверки наличия: их может удалить сборка следующей ревизии
+    или удаление версии в другом процессе.
+    :version_id: id версии справочника.
+    :revision: Ревизия версии (входит в имя файла, поэтому изменённые элементы попадают в новый файл).
+    :accept_encoding: Значение заголовка Accept-Encoding запроса.
+    :return: Пара (открытый файл, Content-Encoding либо None для несжатого JSON) либо None,
+             если файлы не используются (не задана настройка PAYLOAD_ROOT), версия изменилась во время сборки
+             или файлы удалены - тогда список элементов формируется обычным образом.
+    """
+    root = get_setting('PAYLOAD_ROOT')
+    if root is None:
+        return None
+    path = _get_path(Path(root), version_id, revision)
+    try:
+        return _open_payload(path, accept_encoding)
+    except FileNotFoundError:
+        pass
+    if not build_payload(version_id, revision):
+        return None
+    try:
+        return _open_payload(path, accept_encoding)
+    except FileNotFoundError:
+        return None
+
+
+def build_payload(version_id: int, revision: int) -> bool:
+    """
+    Сборка файла JSON списка элементов версии справочника и его сжатых копий
+    во всех доступных кодировках (см. compression.py).
+    Файлы записываются во временные и атомарно переименовываются, файлы прежних ревизий удаляются.
+    :version_id: id версии справочника.
+    :revision: Ревизия версии, для которой собираются файлы.
+    :return: Флаг того, что файлы созданы. Если за время сборки ревизия изменилась, файлы не сохраняются.
+    """
+    root = Path(get_setting('PAYLOAD_ROOT'))
+    root.mkdir(parents=True, exist_ok=True)
+    path = _get_path(root, version_id, revision)
+    rows = (
+        models.ReferenceBookElement.objects
+        .filter(ref_book_version_id=version_id)
+        .values_list('code', 'value')
+        .iterator(chunk_size=get_setting('STREAM_CHUNK_SIZE'))
+    )
+    temp_paths = {}
+    try:
+        temp_paths[path] = _write_temp(root, stream_elements_json(rows, get_setting('STREAM_CHUNK_SIZE')))
+        for encoding in get_encodings():
+            temp_paths[path.with_name(path.name + SUFFIXES[encoding])] = _compress(root, temp_paths[path], encoding)
+        # Элементы могли измениться во время чтения - такой файл не соответствует ревизии.
+        if not models.ReferenceBookVersion.objects.filter(pk=version_id, revision=revision).exists():
+            return False
+        # Несжатый файл переименовывается последним: его наличие означает, что все копии готовы.
+        for target, temp_path in reversed(temp_paths.items()):
+            os.replace(temp_path, target)
+        temp_paths.clear()
+    finally:
+        for temp_path in temp_paths.values():
+            temp_path.unlink(missing_ok=True)
+    for stale_path in root.glob(f'{version_id}-*.json*'):
+        if not stale_path.name.startswith(path.name):
+            stale_path.unlink(missing_ok=True)
+    return True
+
+
+def _open_payload(path: Path, accept_encoding: str) -> tuple[BinaryIO, str | None]:
+    """
+    Открытие файла JSON и, если клиент принимает сжатие, его сжатой копии.
+    :raises FileNotFoundError: Несжатого файла нет.
+    """
+    # Несжатый файл переименовывается последним (см. build_payload) и открывается первым:
+    # если он есть, сжатые копии той же ревизии уже были записаны.
+    file = path.open('rb')
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return file, None
+    try:
+        compressed_file = path.with_name(path.name + SUFFIXES[encoding]).open('rb')
+    except FileNotFoundError:
+        # Копии в этой кодировке нет (пакет установлен после сборки либо файлы удаляются) - отдаётся несжатый файл.
+        return file, None
+    file.close()
+    return compressed_file, encoding
+
+
+def remove_payloads(version_id: int) -> None:
+    """
+    Удаление файлов всех ревизий версии справочника.
+    """
+    root = get_setting('PAYLOAD_ROOT')
+    if root is None:
+        return
+    for path in Path(root).glob(f'{version_id}-*.json*'):
+        path.unlink(missing_ok=True)
+
+
+def _get_path(root: Path, version_id: int, revision: int) -> Path:
+    return root / f'{version_id}-{revision}.json'
+
+
+def _write_temp(root: Path, chunks) -> Path:
+    with tempfile.NamedTemporaryFile(dir=root, prefix='.tmp-', delete=False) as file:
+        for chunk in chunks:
+            file.write(chunk)
+    return Path(file.name)
+
+
+def _compress(root: Path, source: Path, encoding: str) -> Path:
+    with source.open('rb') as file:
+        return _write_temp(root, compress_stream(iter(partial(file.read, CHUNK_SIZE), b''), encoding, static=True))
@@ -0,0 +1,93 @@
+from collections.abc import Iterable, Iterator
+from json.encoder import encode_basestring
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+def can_stream_json(request) -> bool:
+    """
+    Проверка того, что ответ можно отдать потоком, сохранив побайтовую совместимость с JSONRenderer:
+    клиент получает компактный JSON без отступов.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    return (
+        isinstance(renderer, JSONRenderer)
+        and renderer.compact
+        and renderer.get_indent(request.accepted_media_type, {}) is None
+    )
+
+
+class OctetStreamRenderer(BaseRenderer):
+    """
+    Рендерер двоичных ответов (снимок справочников, см. snapshots.py), чтобы запросы
+    с Accept: application/octet-stream проходили согласование содержимого DRF.
+    """
+    media_type = 'application/octet-stream'
+    format = 'bin'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+def stream_elements_json(rows: Iterable[tuple[str, str]], chunk_size: int) -> Iterator[bytes]:
+    """
+    Потоковая сериализация элементов справочника в JSON вида {"elements":[{"code":...,"value":...},...]}.
+    Результат совпадает с выводом JSONRenderer для ReferenceBookElementSerializer(many=True).
+    :rows: Пары (код, значение) элементов.
+    :chunk_size: Количество элементов в одном отдаваемом фрагменте.
+    """
+    yield b'{"elements":['
+    chunk = []
+    separator = ''
+    for code, value in rows:
+        chunk.append(f'{separator}{{"code":{encode_basestring(code)},"value":{encode_basestring(value)}}}')
+        separator = ','
+        if len(chunk) >= chunk_size:
+            yield _encode(chunk)
+            chunk = []
+    if chunk:
+        yield _encode(chunk)
+    yield b']}'
+
+
+def stream_diff_json(rows: Iterable[tuple[str, str, str, str | None]], chunk_size: int) -> Iterator[bytes]:
+    """
+    Потоковая сериализация различий версий справочника (см. services.get_version_diff) в JSON вида
+    {"changes":[{"op":...,"code":...,"value":...[,"old_value":...]},...]}.
+    Результат совпадает с выводом JSONRenderer для diff_to_dicts(rows).
+    """
+    yield b'{"changes":['
+    chunk = []
+    separator = ''
+    for op, code, value, old_value in rows:
+        item = f'{separator}{{"op":"{op}","code":{encode_basestring(code)},"value":{encode_basestring(value)}'
+        if old_value is not None:
+            item += f',"old_value":{encode_basestring(old_value)}'
+        chunk.append(item + '}')
+        separator = ','
+        if len(chunk) >= chunk_size:
+            yield _encode(chunk)
+            chunk = []
+    if chunk:
+        yield _encode(chunk)
+    yield b']}'
+
+
+def diff_to_dicts(rows: Iterable[tuple[str, str, str, str | None]]) -> list[dict]:
+    """
+    Различия версий справочника в виде словарей для сериализации рендерерами DRF.
+    """
+    changes = []
+    for op, code, value, old_value in rows:
+        change = {"op": op, "code": code, "value": value}
+        if old_value is not None:
+            change["old_value"] = old_value
+        changes.append(change)
+    return changes
+
+
+def _encode(chunk: list[str]) -> bytes:
+    # Как и JSONRenderer, экранируем \u2028 и \u2029, чтобы JSON оставался подмножеством JavaScript.
+    return ''.join(chunk).replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
@@ -0,0 +1,165 @@
+"""
+Чтение эндпоинтами справочников из реплик БД (настройка READ_REPLICAS).
+Реплика выбирается при входе в представление (ReplicaReadMixin, replica_reads) и хранится в контекстной
+переменной, поэтому запросы админки, команд и записи выполняются в основной БД. После изменения справочников
+чтение в течение REPLICA_LAG секунд выполняется из основной БД, пока изменения не дошли до реплик.
+
+Реплика может отставать дольше REPLICA_LAG, поэтому значения, прочитанные из реплики, сохраняются в общем кэше
+(на CACHE_TIMEOUT) только если она не отстаёт: последний токен журнала изменений (см. changelog.py) в реплике
+не меньше токена основной БД, который сохраняется в общем кэше после фиксации изменений до увеличения номеров
+версий пространств имён (см. signals.py). Без журнала изменений (CHANGE_LOG_ENABLED) прочитанное из реплик
+в кэше не сохраняется.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Max
+
+from . import models
+from .caches import shared_cache
+from .conf import get_setting
+
+# Флаг общего кэша, установленный в течение REPLICA_LAG секунд после изменения справочников.
+PRIMARY_WRITE_FLAG = 'primary_write'
+# Флаг общего кэша с последним токеном журнала изменений основной БД.
+PRIMARY_TOKEN_FLAG = 'primary_token'
+
+_read_database: ContextVar[str | None] = ContextVar('reference_books_read_database', default=None)
+
+
+class ReplicaRouter:
+    """
+    Роутер БД (settings.DATABASE_ROUTERS).
+    """
+
+    def db_for_read(self, model, **hints):
+        # None - решение принимает следующий роутер либо используется основная БД.
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        # Явно, иначе объект, прочитанный из реплики, сохранялся бы в неё же.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД.
+        return True
+
+
+def choose_read_database() -> str | None:
+    """
+    Выбор реплики для чтения.
+    :return: Псевдоним реплики либо None для основной БД (реплики не заданы либо справочники недавно изменены).
+    """
+    replicas = get_setting('READ_REPLICAS')
+    if not replicas or (get_setting('REPLICA_LAG') and shared_cache.has_flag(PRIMARY_WRITE_FLAG)):
+        return None
+    return random.choice(replicas)
+
+
+async def achoose_read_database() -> str | None:
+    """
+    Асинхронный вариант choose_read_database.
+    """
+    replicas = get_setting('READ_REPLICAS')
+    if not replicas or (get_setting('REPLICA_LAG') and await shared_cache.ahas_flag(PRIMARY_WRITE_FLAG)):
+        return None
+    return random.choice(replicas)
+
+
+def mark_primary_write() -> None:
+    """
+    Отметка изменения справочников в основной БД (см. signals.py).
+    """
+    lag = get_setting('REPLICA_LAG')
+    if get_setting('READ_REPLICAS') and lag:
+        shared_cache.set_flag(PRIMARY_WRITE_FLAG, lag)
+
+
+def record_primary_token() -> None:
+    """
+    Сохранение последнего токена журнала изменений основной БД в общем кэше.
+    Вызывается после фиксации изменений справочников до увеличения номеров версий пространств имён (см. signals.py).
+    """
+    if not get_setting('READ_REPLICAS') or not get_setting('CHANGE_LOG_ENABLED'):
+        return
+    token = _get_last_token(DEFAULT_DB_ALIAS)
+    # Токен не уменьшается, даже если транзакции фиксируются не в порядке вызовов.
+    if token > (shared_cache.get_flag(PRIMARY_TOKEN_FLAG) or 0):
+        shared_cache.set_flag(PRIMARY_TOKEN_FLAG, None, token)
+
+
+def replica_is_current() -> bool:
+    """
+    Проверка того, что значения, прочитанные в текущем контексте, можно сохранять в общем кэше:
+    чтение выполняется из основной БД либо из реплики, которая не отстаёт от неё.
+    """
+    database = _read_database.get()
+    if database is None:
+        return True
+    if not get_setting('CHANGE_LOG_ENABLED'):
+        return False
+    return _get_last_token(database) >= (shared_cache.get_flag(PRIMARY_TOKEN_FLAG) or 0)
+
+
+async def areplica_is_current() -> bool:
+    """
+    Асинхронный вариант replica_is_current.
+    """
+    database = _read_database.get()
+    if database is None:
+        return True
+    if not get_setting('CHANGE_LOG_ENABLED'):
+        return False
+    primary_token = await shared_cache.aget_flag(PRIMARY_TOKEN_FLAG) or 0
+    return await sync_to_async(_get_last_token)(database) >= primary_token
+
+
+def _get_last_token(database: str) -> int:
+    return models.ChangeLogEntry.objects.using(database).aggregate(token=Max('id'))['token'] or 0
+
+
+shared_cache.add_fill_check(replica_is_current, areplica_is_current)
+
+
+@contextmanager
+def read_from_replica():
+    """
+    Выполнение запросов чтения внутри блока в реплике, выбранной choose_read_database.
+    """
+    token = _read_database.set(choose_read_database())
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def replica_reads(view):
+    """
+    Декоратор асинхронного представления: запросы чтения выполняются в реплике.
+    Контекстная переменная передаётся и в синхронный код, вызываемый через sync_to_async.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        token = _read_database.set(await achoose_read_database())
+        try:
+            return await view(request, *args, **kwargs)
+        finally:
+            _read_database.reset(token)
+
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """
+    Примесь представления DRF: запросы чтения при обработке GET и HEAD выполняются в реплике.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        with read_from_replica():
+            return super().dispatch(request, *args, **kwargs)
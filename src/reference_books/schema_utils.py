@@ -23,6 +23,15 @@ VERSION_PARAMETER = OpenApiParameter(
     type=OpenApiTypes.STR,
 )
 
+VERSION_DATE_PARAMETER = OpenApiParameter(
+    name='date',
+    description='Дата в формате ГГГГ-ММ-ДД. </br>Если указана (вместо версии), '
+                'то берётся версия, действовавшая на эту дату: '
+                'с самой поздней датой начала действия, но не позже указанной.',
+    required=False,
+    type=OpenApiTypes.DATE,
+)
+
 CODE_PARAMETER = OpenApiParameter(
     name='code',
     description='Код элемента справочника',
@@ -37,6 +46,20 @@ VALUE_PARAMETER = OpenApiParameter(
     type=OpenApiTypes.STR,
 )
 
+SEARCH_QUERY_PARAMETER = OpenApiParameter(
+    name='q',
+    description='Строка поиска: начало кода элемента либо часть значения (не короче 3 символов).',
+    required=True,
+    type=OpenApiTypes.STR,
+)
+
+SEARCH_LIMIT_PARAMETER = OpenApiParameter(
+    name='limit',
+    description='Максимальное количество элементов (от 1 до 100, по умолчанию 20).',
+    required=False,
+    type=OpenApiTypes.INT,
+)
+
 REFBOOKS_OK_EXAMPLE = OpenApiExample(
     'OK',
     value={
@@ -86,6 +109,24 @@ ELEMENTS_LIST_OK_EXAMPLE = OpenApiExample(
     response_only=True,
 )
 
+ELEMENTS_LIST_PAGE_OK_EXAMPLE = OpenApiExample(
+    'OK (page_size)',
+    summary='Постраничная выдача',
+    description='Только при указании page_size (см. ElementCursorPagination), иначе возвращаются все элементы.',
+    value={
+        "next": "http://api.example.org/refbooks/1/elements/?cursor=cD1KMDE%3D&page_size=1",
+        "previous": None,
+        "elements": [
+            {
+                "code": "J00",
+                "value": " ()"
+            }
+        ]
+    },
+    status_codes=[status.HTTP_200_OK],
+    response_only=True,
+)
+
 ELEMENTS_LIST_BAD_REQUEST_EXAMPLE = OpenApiExample(
     'Bad request',
     summary='Ошибка отправки данных',
@@ -152,3 +193,177 @@ ELEMENT_VALIDATION_VERSION_ERROR_EXAMPLE = OpenApiExample(
     status_codes=[status.HTTP_400_BAD_REQUEST],
     response_only=True,
 )
+
+ELEMENT_BATCH_VALIDATION_REQUEST_EXAMPLE = OpenApiExample(
+    'Запрос',
+    value={
+        "elements": [
+            {
+                "code": "J00",
+                "value": " ()"
+            },
+            {
+                "code": "J01",
+                "value": " ",
+                "version": "1.0"
+            }
+        ]
+    },
+    request_only=True,
+)
+
+ELEMENT_BATCH_VALIDATION_OK_EXAMPLE = OpenApiExample(
+    'OK',
+    value={
+        "results": [
+            {
+                "code": "J00",
+                "value": " ()",
+                "exists": True
+            },
+            {
+                "code": "J01",
+                "value": " ",
+                "version": "1.0",
+                "exists": False
+            }
+        ]
+    },
+    status_codes=[status.HTTP_200_OK],
+    response_only=True,
+)
+
+ELEMENT_BATCH_VALIDATION_BAD_REQUEST_EXAMPLE = OpenApiExample(
+    'Bad request',
+    summary='Ошибка отправки данных',
+    value={
+        "elements": [
+            {},
+            {
+                "code": [
+                    "Обязательное поле."
+                ]
+            }
+        ]
+    },
+    status_codes=[status.HTTP_400_BAD_REQUEST],
+    response_only=True,
+)
+
+ELEMENT_BULK_VALIDATION_REQUEST_EXAMPLE = OpenApiExample(
+    'Запрос',
+    value={
+        "elements": [
+            {
+                "ref_book_id": 2,
+                "code": "J00",
+                "value": " ()"
+            },
+            {
+                "ref_book_id": 1,
+                "code": "1",
+                "value": " ",
+                "version": "1.0"
+            }
+        ]
+    },
+    request_only=True,
+)
+
+ELEMENT_BULK_VALIDATION_OK_EXAMPLE = OpenApiExample(
+    'OK',
+    value={
+        "results": [
+            {
+                "ref_book_id": 2,
+                "code": "J00",
+                "value": " ()",
+                "exists": True
+            },
+            {
+                "ref_book_id": 1,
+                "code": "1",
+                "value": " ",
+                "version": "1.0",
+                "exists": False
+            }
+        ]
+    },
+    status_codes=[status.HTTP_200_OK],
+    response_only=True,
+)
+
+ELEMENT_BULK_VALIDATION_BAD_REQUEST_EXAMPLE = OpenApiExample(
+    'Bad request',
+    summary='Ошибка отправки данных',
+    value={
+        "elements": [
+            {
+                "ref_book_id": [
+                    "Обязательное поле."
+                ]
+            }
+        ]
+    },
+    status_codes=[status.HTTP_400_BAD_REQUEST],
+    response_only=True,
+)
+
+DIFF_FROM_PARAMETER = OpenApiParameter(
+    name='from',
+    description='Исходная версия справочника.',
+    required=True,
+    type=OpenApiTypes.STR,
+)
+
+DIFF_TO_PARAMETER = OpenApiParameter(
+    name='to',
+    description='Новая версия справочника.',
+    required=True,
+    type=OpenApiTypes.STR,
+)
+
+VERSION_DIFF_OK_EXAMPLE = OpenApiExample(
+    'OK',
+    value={
+        "changes": [
+            {"op": "add", "code": "J00.1", "value": "Острый назофарингит"},
+            {"op": "change", "code": "J01", "value": "Острый синусит", "old_value": "Синусит"},
+            {"op": "remove", "code": "J02", "value": "Фарингит"},
+        ]
+    },
+    status_codes=[status.HTTP_200_OK],
+    response_only=True,
+)
+
+CHANGES_SINCE_PARAMETER = OpenApiParameter(
+    name='since',
+    description='Токен - значение next предыдущего ответа. Если не указан, изменения отдаются с начала журнала.',
+    required=False,
+    type=OpenApiTypes.INT,
+)
+
+CHANGES_LIMIT_PARAMETER = OpenApiParameter(
+    name='limit',
+    description='Максимальное количество изменений в ответе (от 1 до 10000, по умолчанию 1000).',
+    required=False,
+    type=OpenApiTypes.INT,
+)
+
+CHANGES_OK_EXAMPLE = OpenApiExample(
+    'OK',
+    value={
+        "changes": [
+            {"token": 101, "type": "ref_book", "op": "upsert", "id": 1, "code": "ICD-10", "name": "МКБ-10"},
+            {"token": 102, "type": "version", "op": "upsert", "id": 7, "ref_book_id": 1, "version": "2.0",
+             "date": "2024-01-01"},
+            {"token": 103, "type": "element", "op": "upsert", "id": 5001, "version_id": 7, "code": "J00",
+             "value": "Острый назофарингит"},
+            {"token": 104, "type": "element", "op": "delete", "id": 4999},
+        ],
+        "next": 104,
+        "has_more": False,
+    },
+    status_codes=[status.HTTP_200_OK],
+    response_only=True,
+)
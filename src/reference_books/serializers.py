@@ -1,3 +1,4 @@
+from drf_spectacular.utils import extend_schema_serializer
 from rest_framework import serializers
 
 from . import models
@@ -15,15 +16,124 @@ class ReferenceBookElementSerializer(serializers.ModelSerializer):
         fields = ['code', 'value']
 
 
+# Ответ списка - объект с ключом elements, а не массив: drf-spectacular не оборачивает его в страницу.
+@extend_schema_serializer(many=False)
+class ReferenceBookElementListViewResponseSerializer(serializers.Serializer):
+    elements = ReferenceBookElementSerializer(many=True)
+    next = serializers.URLField(
+        required=False, allow_null=True, help_text='Только при указании page_size: ссылка на следующую страницу.',
+    )
+    previous = serializers.URLField(
+        required=False, allow_null=True, help_text='Только при указании page_size: ссылка на предыдущую страницу.',
+    )
+
+
 class ReferenceBookListViewQueryParamSerializer(serializers.Serializer):
     date = serializers.DateField(required=False)
 
 
-class ReferenceBookElementListViewQueryParamSerializer(serializers.Serializer):
+class VersionOrDateQueryParamSerializer(serializers.Serializer):
     version = serializers.CharField(max_length=50, required=False)
+    date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get('version') is not None and attrs.get('date') is not None:
+            raise serializers.ValidationError({'date': 'Укажите либо версию, либо дату.'})
+        return attrs
+
+
+class ReferenceBookElementListViewQueryParamSerializer(VersionOrDateQueryParamSerializer):
+    page_size = serializers.IntegerField(min_value=1, required=False)
+
+
+class ElementSearchViewQueryParamSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=300)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+    version = serializers.CharField(max_length=50, required=False)
+
+
+class VersionDiffViewQueryParamSerializer(serializers.Serializer):
+    def get_fields(self):
+        # from - ключевое слово, поэтому поля объявляются здесь, а не атрибутами класса.
+        return {
+            'from': serializers.CharField(max_length=50),
+            'to': serializers.CharField(max_length=50),
+        }
 
 
-class ElementValidationViewQueryParamSerializer(serializers.Serializer):
+class VersionDiffChangeSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=['add', 'change', 'remove'])
+    code = serializers.CharField()
+    value = serializers.CharField()
+    old_value = serializers.CharField(required=False)
+
+
+class VersionDiffViewResponseSerializer(serializers.Serializer):
+    changes = VersionDiffChangeSerializer(many=True)
+
+
+class ElementValidationViewQueryParamSerializer(VersionOrDateQueryParamSerializer):
+    code = serializers.CharField(max_length=100)
+    value = serializers.CharField(max_length=300)
+
+
+class ElementBatchValidationItemSerializer(serializers.Serializer):
     code = serializers.CharField(max_length=100)
     value = serializers.CharField(max_length=300)
     version = serializers.CharField(max_length=50, required=False)
+
+
+class ElementBatchValidationViewRequestSerializer(serializers.Serializer):
+    elements = ElementBatchValidationItemSerializer(many=True, allow_empty=False, max_length=1000)
+
+
+class ElementBatchValidationResultSerializer(ElementBatchValidationItemSerializer):
+    exists = serializers.BooleanField()
+
+
+class ElementBatchValidationViewResponseSerializer(serializers.Serializer):
+    results = ElementBatchValidationResultSerializer(many=True)
+
+
+class ElementBulkValidationItemSerializer(serializers.Serializer):
+    ref_book_id = serializers.IntegerField(min_value=1)
+    code = serializers.CharField(max_length=100)
+    value = serializers.CharField(max_length=300)
+    version = serializers.CharField(max_length=50, required=False)
+
+
+class ElementBulkValidationViewRequestSerializer(serializers.Serializer):
+    elements = ElementBulkValidationItemSerializer(many=True, allow_empty=False, max_length=1000)
+
+
+class ElementBulkValidationResultSerializer(ElementBulkValidationItemSerializer):
+    exists = serializers.BooleanField()
+
+
+class ElementBulkValidationViewResponseSerializer(serializers.Serializer):
+    results = ElementBulkValidationResultSerializer(many=True)
+
+
+class ChangeLogViewQueryParamSerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=10000, default=1000)
+
+
+class ChangeSerializer(serializers.Serializer):
+    token = serializers.IntegerField()
+    type = serializers.ChoiceField(choices=models.ChangeLogEntry.OBJECT_TYPE_CHOICES)
+    op = serializers.ChoiceField(choices=models.ChangeLogEntry.OPERATION_CHOICES)
+    id = serializers.IntegerField()
+    code = serializers.CharField(required=False)
+    name = serializers.CharField(required=False)
+    ref_book_id = serializers.IntegerField(required=False)
+    version = serializers.CharField(required=False)
+    date = serializers.DateField(required=False)
+    version_id = serializers.IntegerField(required=False)
+    value = serializers.CharField(required=False)
+
+
+class ChangeLogViewResponseSerializer(serializers.Serializer):
+    changes = ChangeSerializer(many=True)
+    next = serializers.IntegerField()
+    has_more = serializers.BooleanField()
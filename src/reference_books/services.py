@@ -1,10 +1,155 @@
-from django.db.models import OuterRef, Subquery, QuerySet
+import datetime
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import CharField, Exists, F, Max, Min, OuterRef, Q, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils.timezone import localdate
 
 from . import models
+from .caches import REF_BOOK_LIST_NAMESPACE, shared_cache, version_namespace
+from .conf import get_setting
+from .element_index import element_index
+from .element_store import element_store
+from .routers import mark_primary_write
+from .versions import current_version_resolver
+
+# Ограничение числа параметров в одном запросе (SQLite ограничивает количество переменных).
+BATCH_QUERY_SIZE = 500
+# Минимальная длина строки поиска по значениям элементов (индекс FTS5 trigram состоит из триграмм).
+SEARCH_VALUE_MIN_LENGTH = 3
+# Символ, больший любого символа кода: коды с префиксом p лежат в диапазоне [p, p + PREFIX_UPPER_BOUND).
+PREFIX_UPPER_BOUND = '\U0010ffff'
+# Количество совпадений по значению, среди которых выбираются наиболее релевантные (см. _search_values).
+SEARCH_VALUE_CANDIDATES = 1000
+# Операции в различиях версий (как в файле изменений import_refbook_version --base-version).
+DIFF_ADD = 'add'
+DIFF_CHANGE = 'change'
+DIFF_REMOVE = 'remove'
+
+
+def get_queryset_of_ref_books(date: datetime.date | None = None) -> QuerySet:
+    """
+    Получение QuerySet справочников (+ актуальных на указанную дату).
+    :date: Дата начала действия. Если указана, то возвращаются только те справочники,
+           в которых имеются версии с датой начала действия раннее или равной указанной.
+    :return: QuerySet справочников, упорядоченный по id.
+    """
+    queryset = models.ReferenceBook.objects.all().only("id", "code", "name").order_by('id')
+    if date is not None:
+        # Полусоединение вместо JOIN + DISTINCT, использует уникальный индекс (ref_book_id, date).
+        versions = models.ReferenceBookVersion.objects.filter(ref_book_id=OuterRef('id'), date__lte=date)
+        queryset = queryset.filter(Exists(versions))
+    return queryset
+
+
+def get_ref_books(date: datetime.date | None = None) -> list[dict]:
+    """
+    Получение списка справочников (+ актуальных на указанную дату) в виде словарей с ключами id, code, name.
+    Результат кэшируется в общем кэше (см. caches.py) для каждой даты до изменения справочников или их версий.
+    :date: Дата начала действия (см. get_queryset_of_ref_books).
+    """
+    def load():
+        rows = get_queryset_of_ref_books(date).values_list("id", "code", "name")
+        return [{"id": id_, "code": code, "name": name} for id_, code, name in rows]
+
+    key = date.isoformat() if date is not None else 'all'
+    return shared_cache.get_or_set(REF_BOOK_LIST_NAMESPACE, key, load)
+
+
+def resolve_version_id(ref_book_id: int, version: str | None = None,
+                       date: datetime.date | None = None) -> int | None:
+    """
+    Получение id версии заданного справочника ref_book_id.
+    :ref_book_id: id справочника.
+    :version: Версия справочника.
+              Если не указана, то возвращается id текущей версии.
+              Текущей является та версия, дата начала действия которой позже всех остальных версий данного справочника,
+              но не позже текущей даты.
+    :date: Дата. Если указана (без version), то возвращается id версии, действовавшей на эту дату.
+    :return: id версии либо None, если версия не найдена.
+    """
+    if version is not None:
+        return current_version_resolver.get_version_id(ref_book_id, version)
+    if date is not None:
+        return current_version_resolver.get_version_id_on_date(ref_book_id, date)
+    return current_version_resolver.get(ref_book_id)
+
+
+def roll_current_versions(ref_book_ids: Iterable[int] | None = None) -> int:
+    """
+    Обновление указателей ReferenceBook.current_version на текущие версии справочников.
+    Текущей является та версия, дата начала действия которой позже всех остальных версий данного справочника,
+    но не позже текущей даты.
+    :ref_book_ids: id справочников. Если не указаны, то обновляются все справочники.
+    :return: Количество справочников, у которых изменилась текущая версия.
+    """
+    actual_version = Subquery(
+        models.ReferenceBookVersion.objects
+        .filter(ref_book_id=OuterRef('id'), date__lte=localdate())
+        .order_by('-date')
+        .values('id')[:1]
+    )
+    queryset = models.ReferenceBook.objects.all()
+    if ref_book_ids is not None:
+        queryset = queryset.filter(id__in=list(ref_book_ids))
+    changed_ids = list(
+        queryset
+        .annotate(actual_version_id=Coalesce(actual_version, 0))
+        .exclude(actual_version_id=Coalesce('current_version_id', 0))
+        .values_list('id', flat=True)
+    )
+    for start in range(0, len(changed_ids), BATCH_QUERY_SIZE):
+        chunk = changed_ids[start:start + BATCH_QUERY_SIZE]
+        models.ReferenceBook.objects.filter(id__in=chunk).update(current_version=actual_version)
+    for ref_book_id in changed_ids:
+        current_version_resolver.invalidate(ref_book_id)
+    if changed_ids:
+        mark_primary_write()
+    return len(changed_ids)
+
+
+def get_version_state(ref_book_id: int, version: str | None = None,
+                      date: datetime.date | None = None) -> dict | None:
+    """
+    Получение состояния версии справочника для условных HTTP-запросов (ETag / Last-Modified).
+    Элементы версии при этом не запрашиваются.
+    :ref_book_id: id справочника.
+    :version: Версия справочника. Если не указана, то берётся текущая версия.
+    :date: Дата (без version): берётся версия, действовавшая на эту дату.
+    :return: Словарь с ключами id, revision, modified_at, last_modified и is_past
+             (версия заменена более поздней действующей версией) либо None, если версия не найдена.
+             last_modified (для Last-Modified) - время изменения версии, указанной явно (version), либо None:
+             текущая версия и версия на дату сменяются другой версией, время изменения которой может быть
+             раньше, поэтому сравнение по времени вернуло бы клиенту 304 с элементами прежней версии.
+    """
+    version_id = resolve_version_id(ref_book_id, version, date)
+    if version_id is None:
+        return None
+    state = (
+        models.ReferenceBookVersion.objects
+        .filter(pk=version_id)
+        .values('id', 'date', 'revision', 'modified_at')
+        .first()
+    )
+    if state is None:
+        return None
+    version_date = state.pop('date')
+    state['last_modified'] = state['modified_at'] if version is not None else None
+    # Текущая версия и версия на дату (date) могут смениться при изменении версий, поэтому не считаются прошлыми.
+    current_version_id = current_version_resolver.get(ref_book_id) if version is not None else version_id
+    state['is_past'] = (
+        current_version_id is not None
+        and version_id != current_version_id
+        and version_date <= localdate()
+    )
+    return state
 
 
-def get_queryset_of_ref_book_elements(ref_book_id: int, version: str | None = None) -> QuerySet:
+def get_queryset_of_ref_book_elements(ref_book_id: int, version: str | None = None,
+                                      date: datetime.date | None = None) -> QuerySet:
     """
     Получение QuerySet элементов заданного справочника ref_book_id.
     :ref_book_id: id справочника.
@@ -12,33 +157,39 @@ def get_queryset_of_ref_book_elements(ref_book_id: int, version: str | None = No
               Если не указана, то должны возвращаться элементы текущей версии.
               Текущей является та версия, дата начала действия которой позже всех остальных версий данного справочника,
               но не позже текущей даты.
+    :date: Дата (без version): берётся версия, действовавшая на эту дату.
     :return: QuerySet элементов заданного справочника.
     """
-    queryset = (
-        models.ReferenceBookElement.objects
-        .filter(ref_book_version__ref_book_id=ref_book_id)
-        .only("code", "value")
-    )
-    if version is not None:
-        queryset = queryset.filter(ref_book_version__version=version)
-    else:
-        # Будем брать текущую версию. Текущей является та версия, дата начала действия
-        # которой позже всех остальных версий данного справочника, но не позже текущей даты.
-        current_date = localdate()
-        current_version = (
-            models.ReferenceBookVersion.objects
-            .filter(
-                ref_book_id=OuterRef('ref_book_version__ref_book_id'),
-                date__lte=current_date,
-            )
-            .order_by('-date')
-            .values('id')[:1]
-        )
-        queryset = queryset.filter(ref_book_version_id=Subquery(current_version))
+    version_id = resolve_version_id(ref_book_id, version, date)
+    if version_id is None:
+        return models.ReferenceBookElement.objects.none()
+    queryset = models.ReferenceBookElement.objects.filter(ref_book_version_id=version_id)
+    queryset = queryset.only("code", "value")
     return queryset
 
 
-def validate_elements(ref_book_id: int, code: str, value: str, version: str | None = None) -> bool:
+def get_ref_book_elements(ref_book_id: int, version: str | None = None,
+                          date: datetime.date | None = None) -> list[dict]:
+    """
+    Получение элементов заданного справочника ref_book_id в виде словарей с ключами code, value.
+    Результат кэшируется в общем кэше (см. caches.py) до изменения элементов версии.
+    :ref_book_id: id справочника.
+    :version: Версия справочника. Если не указана, то возвращаются элементы текущей версии.
+    :date: Дата (без version): берётся версия, действовавшая на эту дату.
+    """
+    version_id = resolve_version_id(ref_book_id, version, date)
+    if version_id is None:
+        return []
+
+    def load():
+        rows = models.ReferenceBookElement.objects.filter(ref_book_version_id=version_id).values_list("code", "value")
+        return [{"code": code, "value": value} for code, value in rows]
+
+    return shared_cache.get_or_set(version_namespace(version_id), 'elements', load)
+
+
+def validate_elements(ref_book_id: int, code: str, value: str, version: str | None = None,
+                      date: datetime.date | None = None) -> bool:
     """
     Проверка на то, что элемент с данным кодом (code) и значением (value) присутствует в указанной версии справочника.
     :ref_book_id: id справочника.
@@ -48,8 +199,383 @@ def validate_elements(ref_book_id: int, code: str, value: str, version: str | No
               Если не указана, то должны возвращаться элементы текущей версии.
               Текущей является та версия, дата начала действия которой позже всех остальных версий данного справочника,
               но не позже текущей даты.
+    :date: Дата (без version): берётся версия, действовавшая на эту дату.
     :return: Флаг, присутствует (True), не присутствует (False).
     """
-    queryset = get_queryset_of_ref_book_elements(ref_book_id, version)
+    use_store = get_setting('ELEMENT_STORE_ROOT') is not None
+    use_index = get_setting('ELEMENT_INDEX_ENABLED')
+    if use_store or use_index:
+        version_id = resolve_version_id(ref_book_id, version, date)
+        # Ревизия общая для всех процессов (общий кэш), поэтому изменения элементов другими процессами
+        # не читаются из устаревших файла или индекса.
+        revision = get_version_revision(version_id) if version_id is not None else None
+        if revision is None:
+            return False
+        if use_store:
+            exists = element_store.contains(version_id, revision, code, value)
+            if exists is not None:
+                return exists
+        if use_index:
+            exists = element_index.contains(version_id, revision, code, value)
+            if exists is not None:
+                return exists
+    queryset = get_queryset_of_ref_book_elements(ref_book_id, version, date)
     queryset = queryset.filter(code=code, value=value)
     return queryset.exists()
+
+
+def get_version_revision(version_id: int) -> int | None:
+    """
+    Получение ревизии версии справочника (хранится в общем кэше до изменения элементов версии).
+    :version_id: id версии справочника.
+    :return: Ревизия либо None, если версия не найдена.
+    """
+    def load():
+        return models.ReferenceBookVersion.objects.filter(pk=version_id).values_list('revision', flat=True).first()
+
+    return shared_cache.get_or_set(version_namespace(version_id), 'revision', load)
+
+
+def resolve_version_ids(keys: Iterable[tuple[int, str | None]]) -> dict[tuple[int, str | None], int | None]:
+    """
+    Получение id версий для нескольких пар (id справочника, версия).
+    Текущие версии всех справочников определяются одним запросом, явно указанные версии - ещё одним.
+    :keys: Пары (id справочника, версия). Если версия None, то берётся текущая версия справочника.
+    :return: Словарь {(id справочника, версия): id версии либо None, если версия не найдена}.
+    """
+    keys = {(int(ref_book_id), version) for ref_book_id, version in keys}
+    current_version_ids = current_version_resolver.get_many(
+        ref_book_id for ref_book_id, version in keys if version is None
+    )
+    version_ids = current_version_resolver.get_version_ids(
+        (ref_book_id, version) for ref_book_id, version in keys if version is not None
+    )
+    return {
+        (ref_book_id, version): (
+            current_version_ids.get(ref_book_id) if version is None else version_ids.get((ref_book_id, version))
+        )
+        for ref_book_id, version in keys
+    }
+
+
+def validate_elements_bulk(elements: list[dict]) -> list[bool]:
+    """
+    Пакетная проверка присутствия элементов в версиях разных справочников.
+    Элементы группируются по (справочник, версия), версии определяются один раз для всего пакета,
+    элементы проверяются запросами по множеству кодов.
+    :elements: Список словарей с ключами ref_book_id, code, value и необязательным ключом version.
+               Если версия не указана, то проверяется текущая версия справочника.
+    :return: Список флагов присутствия элементов в порядке входного списка.
+    """
+    keys = [(int(element['ref_book_id']), element.get('version')) for element in elements]
+    version_ids = resolve_version_ids(keys)
+    element_version_ids = [version_ids[key] for key in keys]
+    codes_by_version_id = defaultdict(set)
+    for version_id, element in zip(element_version_ids, elements):
+        if version_id is not None:
+            codes_by_version_id[version_id].add(element['code'])
+    pairs = [(version_id, code) for version_id, codes in codes_by_version_id.items() for code in codes]
+    found = set()
+    for start in range(0, len(pairs), BATCH_QUERY_SIZE):
+        condition = Q()
+        for version_id, codes in _group_codes(pairs[start:start + BATCH_QUERY_SIZE]).items():
+            condition |= Q(ref_book_version_id=version_id, code__in=codes)
+        rows = (
+            models.ReferenceBookElement.objects
+            .filter(condition)
+            .values_list('ref_book_version_id', 'code', 'value')
+        )
+        found.update(rows)
+    return [
+        (version_id, element['code'], element['value']) in found
+        for version_id, element in zip(element_version_ids, elements)
+    ]
+
+
+def validate_elements_batch(ref_book_id: int, elements: list[dict]) -> list[bool]:
+    """
+    Пакетная проверка присутствия элементов в версиях справочника.
+    :ref_book_id: id справочника.
+    :elements: Список словарей с ключами code, value и необязательным ключом version.
+               Если версия не указана, то проверяется текущая версия.
+    :return: Список флагов присутствия элементов в порядке входного списка.
+    """
+    return validate_elements_bulk([{**element, 'ref_book_id': ref_book_id} for element in elements])
+
+
+def search_elements(ref_book_id: int, q: str, limit: int, version: str | None = None) -> list[dict]:
+    """
+    Поиск элементов версии справочника для подсказок при вводе.
+    Сначала возвращаются элементы, код которых начинается с q (с учётом регистра, в порядке кодов), затем элементы,
+    значение которых содержит q (без учёта регистра, по релевантности). Значения ищутся, если длина q
+    не меньше SEARCH_VALUE_MIN_LENGTH.
+    :ref_book_id: id справочника.
+    :q: Строка поиска.
+    :limit: Максимальное количество элементов.
+    :version: Версия справочника. Если не указана, то поиск выполняется в текущей версии.
+    :return: Список словарей с ключами code, value.
+    """
+    version_id = resolve_version_id(ref_book_id, version)
+    if version_id is None:
+        return []
+    queryset = models.ReferenceBookElement.objects.filter(ref_book_version_id=version_id)
+    # Условие на диапазон выполняется по индексу (ref_book_version, code), startswith (LIKE) в SQLite -
+    # нет, но отсекает лишнее при сравнении строк с учётом правил сортировки (PostgreSQL).
+    elements = list(
+        queryset
+        .filter(code__gte=q, code__lt=q + PREFIX_UPPER_BOUND, code__startswith=q)
+        .order_by('code')
+        .values('code', 'value')[:limit]
+    )
+    if len(elements) == limit or len(q) < SEARCH_VALUE_MIN_LENGTH:
+        return elements
+    codes = {element['code'] for element in elements}
+    for code, value in _search_values(queryset, version_id, q, limit):
+        if code not in codes:
+            elements.append({'code': code, 'value': value})
+            if len(elements) == limit:
+                break
+    return elements
+
+
+def _search_values(queryset: QuerySet, version_id: int, q: str, limit: int) -> list[tuple[str, str]]:
+    connection = connections[queryset.db]
+    if connection.vendor != 'sqlite' or connection.Database.sqlite_version_info < (3, 34, 0):
+        # Индекс создаётся только в SQLite (см. миграцию 0005_element_value_fts).
+        return list(queryset.filter(value__icontains=q).order_by('code').values_list('code', 'value')[:limit])
+    min_id, max_id = _get_element_id_range(version_id)
+    if min_id is None:
+        return []
+    # Строка поиска - одна фраза FTS5, кавычки в ней удваиваются.
+    match = '"{}"'.format(q.replace('"', '""'))
+    with connection.cursor() as cursor:
+        # Диапазон rowid ограничивает чтение индекса элементами версии (элементы версии загружаются подряд).
+        # CROSS JOIN задаёт порядок соединения: иначе SQLite перебирает элементы версии и выполняет MATCH для каждого.
+        cursor.execute(
+            'SELECT element.code, element.value '
+            'FROM reference_books_element_fts '
+            'CROSS JOIN reference_books_referencebookelement AS element '
+            'ON element.id = reference_books_element_fts.rowid '
+            'WHERE reference_books_element_fts MATCH %s '
+            'AND reference_books_element_fts.rowid BETWEEN %s AND %s '
+            'AND element.ref_book_version_id = %s '
+            'LIMIT %s',
+            [match, min_id, max_id, version_id, SEARCH_VALUE_CANDIDATES],
+        )
+        candidates = cursor.fetchall()
+    # Ранжируются первые SEARCH_VALUE_CANDIDATES совпадений: вхождение ближе к началу значения, затем
+    # более короткое значение. Ранжирование FTS5 (bm25) оценивает все совпадения, для частой подстроки -
+    # десятки миллисекунд.
+    folded_q = q.casefold()
+    candidates.sort(key=lambda row: (row[1].casefold().find(folded_q), len(row[1]), row[0]))
+    return candidates[:limit]
+
+
+def _get_element_id_range(version_id: int) -> tuple[int | None, int | None]:
+    def load():
+        id_range = models.ReferenceBookElement.objects.filter(ref_book_version_id=version_id).aggregate(
+            min_id=Min('id'), max_id=Max('id'),
+        )
+        return id_range['min_id'], id_range['max_id']
+
+    return shared_cache.get_or_set(version_namespace(version_id), 'element_id_range', load)
+
+
+def get_version_diff(ref_book_id: int, from_version: str,
+                     to_version: str) -> tuple[str, Iterable[tuple[str, str, str, str | None]]] | None:
+    """
+    Получение различий двух версий справочника.
+    Различия вычисляются одним запросом по индексам (ref_book_version, code) и, если их не больше
+    DIFF_CACHE_MAX_ROWS, сохраняются в общем кэше до изменения любой из версий.
+    :ref_book_id: id справочника.
+    :from_version: Исходная версия.
+    :to_version: Новая версия.
+    :return: Пара (ключ состояния версий - id и ревизии, для ETag; различия) либо None, если версия не найдена.
+             Различия - кортежи (операция, код, значение, прежнее значение) в порядке кодов, операции - как в файле
+             изменений import_refbook_version: add, change (прежнее значение указывается только для неё)
+             и remove (значение - удалённое). Без кэша различия читаются из БД при переборе.
+    """
+    version_ids = resolve_version_ids([(ref_book_id, from_version), (ref_book_id, to_version)])
+    from_id, to_id = version_ids[(int(ref_book_id), from_version)], version_ids[(int(ref_book_id), to_version)]
+    if from_id is None or to_id is None:
+        return None
+    revisions = dict(models.ReferenceBookVersion.objects.filter(pk__in=[from_id, to_id]).values_list('id', 'revision'))
+    if len(revisions) != len({from_id, to_id}):
+        return None
+    state_key = f'{from_id}-{revisions[from_id]}-{to_id}-{revisions[to_id]}'
+    # Ревизия исходной версии входит в ключ, пространство имён - новой версии: изменение любой из них
+    # делает сохранённые различия недоступными.
+    cache_key = shared_cache.make_key(version_namespace(to_id), f'diff:{from_id}-{revisions[from_id]}')
+    cached = shared_cache.get_many([cache_key]).get(cache_key)
+    if cached is not None:
+        return state_key, cached
+    if not shared_cache.can_fill():
+        cache_key = None
+    queryset = models.ReferenceBookElement.objects.all()
+    return state_key, _iter_version_diff(queryset.using(queryset.db), from_id, to_id, cache_key)
+
+
+def _iter_version_diff(queryset: QuerySet, from_id: int, to_id: int,
+                       cache_key: str | None) -> Iterator[tuple[str, str, str, str | None]]:
+    if from_id == to_id:
+        return
+    # Элементы новой версии, отсутствующие либо отличающиеся в исходной, и элементы исходной версии,
+    # отсутствующие в новой: каждая часть - проход по индексу одной версии в порядке кодов с поиском кода
+    # в другой версии по индексу (ref_book_version, code), поэтому СУБД объединяет части слиянием без сортировки.
+    same_code = queryset.filter(code=OuterRef('code'))
+    added_or_changed = (
+        queryset
+        .filter(ref_book_version_id=to_id)
+        .filter(~Exists(same_code.filter(ref_book_version_id=from_id, value=OuterRef('value'))))
+        .annotate(
+            old_value=Subquery(same_code.filter(ref_book_version_id=from_id).values('value')[:1]),
+            new_value=F('value'),
+        )
+        .values_list('code', 'old_value', 'new_value')
+    )
+    removed = (
+        queryset
+        .filter(ref_book_version_id=from_id)
+        .filter(~Exists(same_code.filter(ref_book_version_id=to_id)))
+        .annotate(old_value=F('value'), new_value=Value(None, output_field=CharField()))
+        .values_list('code', 'old_value', 'new_value')
+    )
+    rows = added_or_changed.union(removed, all=True).order_by('code').iterator(
+        chunk_size=get_setting('STREAM_CHUNK_SIZE'),
+    )
+    max_rows = get_setting('DIFF_CACHE_MAX_ROWS')
+    # Различия накапливаются для кэша, пока их не больше max_rows, иначе память росла бы с размером различий.
+    # cache_key None - различия не сохраняются (прочитаны из отстающей реплики, см. routers.py).
+    diff = [] if cache_key is not None else None
+    for code, old_value, new_value in rows:
+        if old_value is None:
+            row = (DIFF_ADD, code, new_value, None)
+        elif new_value is None:
+            row = (DIFF_REMOVE, code, old_value, None)
+        else:
+            row = (DIFF_CHANGE, code, new_value, old_value)
+        if diff is not None:
+            diff.append(row)
+            if len(diff) > max_rows:
+                diff = None
+        yield row
+    # Сохраняется только полностью прочитанный результат.
+    if diff is not None:
+        shared_cache.set_many({cache_key: diff})
+
+
+def _group_codes(pairs: list[tuple[int, str]]) -> dict[int, list[str]]:
+    codes_by_version_id = defaultdict(list)
+    for version_id, code in pairs:
+        codes_by_version_id[version_id].append(code)
+    return codes_by_version_id
+
+
+# Асинхронные варианты функций для async_views.py: запросы выполняются через асинхронный ORM
+# (aiterator, aexists, afirst), обращения к общему кэшу - через асинхронные методы кэша.
+
+async def aresolve_version_id(ref_book_id: int, version: str | None = None,
+                              date: datetime.date | None = None) -> int | None:
+    """
+    Асинхронный вариант resolve_version_id.
+    """
+    if version is not None:
+        return await current_version_resolver.aget_version_id(ref_book_id, version)
+    if date is not None:
+        return await current_version_resolver.aget_version_id_on_date(ref_book_id, date)
+    return await current_version_resolver.aget(ref_book_id)
+
+
+async def aget_version_revision(version_id: int) -> int | None:
+    """
+    Асинхронный вариант get_version_revision.
+    """
+    async def load():
+        queryset = models.ReferenceBookVersion.objects.filter(pk=version_id).values_list('revision', flat=True)
+        return await queryset.afirst()
+
+    return await shared_cache.aget_or_set(version_namespace(version_id), 'revision', load)
+
+
+async def aget_ref_books(date: datetime.date | None = None) -> list[dict]:
+    """
+    Асинхронный вариант get_ref_books.
+    """
+    async def load():
+        # values() вместо values_list(): в Django 4.1 values_list().aiterator() выполняет запрос
+        # в асинхронном контексте (SynchronousOnlyOperation).
+        return [row async for row in get_queryset_of_ref_books(date).values("id", "code", "name").aiterator()]
+
+    key = date.isoformat() if date is not None else 'all'
+    return await shared_cache.aget_or_set(REF_BOOK_LIST_NAMESPACE, key, load)
+
+
+async def aget_version_state(ref_book_id: int, version: str | None = None,
+                             date: datetime.date | None = None) -> dict | None:
+    """
+    Асинхронный вариант get_version_state.
+    """
+    version_id = await aresolve_version_id(ref_book_id, version, date)
+    if version_id is None:
+        return None
+    state = await (
+        models.ReferenceBookVersion.objects
+        .filter(pk=version_id)
+        .values('id', 'date', 'revision', 'modified_at')
+        .afirst()
+    )
+    if state is None:
+        return None
+    version_date = state.pop('date')
+    state['last_modified'] = state['modified_at'] if version is not None else None
+    current_version_id = await current_version_resolver.aget(ref_book_id) if version is not None else version_id
+    state['is_past'] = (
+        current_version_id is not None
+        and version_id != current_version_id
+        and version_date <= localdate()
+    )
+    return state
+
+
+async def aget_ref_book_elements(ref_book_id: int, version: str | None = None,
+                                 date: datetime.date | None = None) -> list[dict]:
+    """
+    Асинхронный вариант get_ref_book_elements.
+    """
+    version_id = await aresolve_version_id(ref_book_id, version, date)
+    if version_id is None:
+        return []
+
+    async def load():
+        rows = models.ReferenceBookElement.objects.filter(ref_book_version_id=version_id).values("code", "value")
+        return [row async for row in rows.aiterator()]
+
+    return await shared_cache.aget_or_set(version_namespace(version_id), 'elements', load)
+
+
+async def avalidate_elements(ref_book_id: int, code: str, value: str, version: str | None = None,
+                             date: datetime.date | None = None) -> bool:
+    """
+    Асинхронный вариант validate_elements.
+    """
+    version_id = await aresolve_version_id(ref_book_id, version, date)
+    if version_id is None:
+        return False
+    use_store = get_setting('ELEMENT_STORE_ROOT') is not None
+    use_index = get_setting('ELEMENT_INDEX_ENABLED')
+    if use_store or use_index:
+        revision = await aget_version_revision(version_id)
+        if revision is None:
+            return False
+    if use_store:
+        # Файл элементов читается через mmap без запросов к БД, поэтому проверка выполняется без потока.
+        exists = element_store.contains(version_id, revision, code, value)
+        if exists is not None:
+            return exists
+    if use_index:
+        # Загрузка версии в индекс - синхронный запрос, выполняется в потоке.
+        exists = await sync_to_async(element_index.contains)(version_id, revision, code, value)
+        if exists is not None:
+            return exists
+    queryset = models.ReferenceBookElement.objects.filter(ref_book_version_id=version_id, code=code, value=value)
+    return await queryset.aexists()
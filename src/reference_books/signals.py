@@ -0,0 +1,157 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import changelog
+from . import models
+from . import services
+from .caches import REF_BOOK_LIST_NAMESPACE, shared_cache, version_namespace
+from .conf import get_setting
+from .element_index import element_index
+from .element_store import remove_element_store
+from .payloads import remove_payloads
+from .routers import mark_primary_write, record_primary_token
+from .versions import current_version_resolver
+
+
+def _invalidate_current_version(ref_book_id: int) -> None:
+    # Сбрасываем сразу (для текущего потока) и после фиксации транзакции,
+    # чтобы другие потоки не закэшировали состояние до коммита.
+    current_version_resolver.invalidate(ref_book_id)
+    shared_cache.bump(REF_BOOK_LIST_NAMESPACE)
+    mark_primary_write()
+    # Токен журнала - до увеличения номеров версий пространств имён (см. routers.py).
+    transaction.on_commit(record_primary_token)
+    transaction.on_commit(lambda: current_version_resolver.invalidate(ref_book_id))
+    transaction.on_commit(lambda: shared_cache.bump(REF_BOOK_LIST_NAMESPACE))
+    # Отсчёт отставания реплик - от фиксации транзакции.
+    transaction.on_commit(mark_primary_write)
+
+
+def _invalidate_version(version_id: int) -> None:
+    shared_cache.bump(version_namespace(version_id))
+    mark_primary_write()
+    transaction.on_commit(record_primary_token)
+    transaction.on_commit(lambda: shared_cache.bump(version_namespace(version_id)))
+    transaction.on_commit(mark_primary_write)
+
+
+def _bump_revision(version_id: int, removed_code: str | None = None, added: tuple[str, str] | None = None) -> None:
+    models.ReferenceBookVersion.objects.filter(pk=version_id).update(
+        revision=F('revision') + 1,
+        modified_at=timezone.now(),
+    )
+    _invalidate_version(version_id)
+    _update_element_index(version_id, removed_code, added)
+
+
+def _update_element_index(version_id: int, removed_code: str | None, added: tuple[str, str] | None) -> None:
+    # Изменение элемента применяется к версии, загруженной в индекс этого процесса, вместо её повторной загрузки.
+    # Ревизия читается после её увеличения в той же транзакции: индекс применит изменение, только если она
+    # на единицу больше ревизии загруженной версии, то есть других изменений после загрузки не было.
+    if element_index.get_revision(version_id) is None:
+        return
+    revision = models.ReferenceBookVersion.objects.filter(pk=version_id).values_list('revision', flat=True).first()
+    if revision is not None:
+        transaction.on_commit(lambda: element_index.apply_change(version_id, revision, removed_code, added))
+
+
+def _origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def _is_cascade_delete(origin) -> bool:
+    # Элемент удаляется вместе с версией или справочником - обновлять ревизию и индекс не нужно.
+    return _origin_model(origin) in (models.ReferenceBook, models.ReferenceBookVersion)
+
+
+@receiver(post_save, sender=models.ReferenceBook)
+def ref_book_saved(sender, instance, created, **kwargs):
+    if not created:
+        # Сохранение устаревшего экземпляра могло перезаписать указатель на текущую версию.
+        services.roll_current_versions([instance.pk])
+    _invalidate_current_version(instance.pk)
+    changelog.record_ref_book(instance, models.ChangeLogEntry.UPSERT)
+
+
+@receiver(post_delete, sender=models.ReferenceBook)
+def ref_book_deleted(sender, instance, **kwargs):
+    _invalidate_current_version(instance.pk)
+    changelog.record_ref_book(instance, models.ChangeLogEntry.DELETE)
+
+
+@receiver(post_save, sender=models.ReferenceBookVersion)
+@receiver(post_delete, sender=models.ReferenceBookVersion)
+def ref_book_version_changed(sender, instance, origin=None, **kwargs):
+    if not isinstance(origin, models.ReferenceBook):
+        services.roll_current_versions([instance.ref_book_id])
+    # После удаления instance.pk равен None, поэтому id запоминается для отложенных вызовов.
+    version_id = instance.pk
+    _invalidate_current_version(instance.ref_book_id)
+    _invalidate_version(version_id)
+    element_index.discard(version_id)
+    transaction.on_commit(lambda: element_index.discard(version_id))
+
+
+@receiver(post_save, sender=models.ReferenceBookVersion)
+def ref_book_version_saved(sender, instance, **kwargs):
+    changelog.record_version(instance, models.ChangeLogEntry.UPSERT)
+
+
+@receiver(post_delete, sender=models.ReferenceBookVersion)
+def ref_book_version_deleted(sender, instance, origin=None, **kwargs):
+    if _origin_model(origin) is not models.ReferenceBook:
+        changelog.record_version(instance, models.ChangeLogEntry.DELETE)
+    version_id = instance.pk
+    transaction.on_commit(lambda: remove_payloads(version_id))
+    transaction.on_commit(lambda: remove_element_store(version_id))
+
+
+@receiver(pre_save, sender=models.ReferenceBookElement)
+def ref_book_element_pre_save(sender, instance, **kwargs):
+    # Запоминаем прежние версию и код, чтобы обновить и ревизию прежней версии, если элемент перенесён
+    # в другую версию, и убрать прежний код из индекса элементов.
+    instance._previous_version_id = instance._previous_code = None
+    if instance.pk is not None:
+        instance._previous_version_id, instance._previous_code = (
+            models.ReferenceBookElement.objects
+            .filter(pk=instance.pk)
+            .values_list('ref_book_version_id', 'code')
+            .first()
+        ) or (None, None)
+
+
+@receiver(post_save, sender=models.ReferenceBookElement)
+def ref_book_element_saved(sender, instance, **kwargs):
+    previous_version_id = getattr(instance, '_previous_version_id', None)
+    previous_code = getattr(instance, '_previous_code', None)
+    version_id = instance.ref_book_version_id
+    if previous_version_id is not None and previous_version_id != version_id:
+        _bump_revision(version_id, added=(instance.code, instance.value))
+        _bump_revision(previous_version_id, removed_code=previous_code)
+    else:
+        _bump_revision(version_id, removed_code=previous_code, added=(instance.code, instance.value))
+    changelog.record_element(instance, models.ChangeLogEntry.UPSERT)
+
+
+@receiver(post_delete, sender=models.ReferenceBookElement)
+def ref_book_element_deleted(sender, instance, origin=None, **kwargs):
+    if _is_cascade_delete(origin):
+        return
+    _bump_revision(instance.ref_book_version_id, removed_code=instance.code)
+    changelog.record_element(instance, models.ChangeLogEntry.DELETE)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = get_setting('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,247 @@
+"""
+Снимок всех справочников, версий и элементов в одном двоичном файле (команда export_snapshot,
+эндпоинт /snapshot/). Файл записывается потоково и читается без загрузки в память через mmap (SnapshotReader).
+
+Формат (все целые - беззнаковые little-endian, str - длина в байтах u16 и строка UTF-8):
+    заголовок:  magic b'RBSNAP1\\n' | u64 время создания (Unix) | u64 токен журнала изменений (см. changelog.py)
+    справочники, по возрастанию id:
+                b'R' | u64 id | u64 id текущей версии (0 - нет) | str code | str name
+    версии, по возрастанию id, каждая вместе со своими элементами (n) в порядке кодов:
+                b'V' | u64 id | u64 id справочника | u32 дата (date.toordinal()) | u32 ревизия | u32 n | str version
+                | строки UTF-8 кодов и значений элементов подряд без разделителей: код 1, значение 1, код 2, ...
+                | u32 смещения [2n + 1] начал строк и конца последней строки от начала строк элементов
+    индекс:     для каждой версии: u64 id | u64 смещение записи b'V' | u64 смещение таблицы смещений строк
+    окончание:  u64 смещение индекса | u64 количество версий | magic b'RBSNAPE\\n'
+Таблица смещений записывается после строк, поэтому элементы версии не накапливаются в памяти при записи,
+а при чтении строку любого элемента можно получить без разбора предыдущих.
+Токен журнала позволяет после загрузки снимка получать изменения через /changes/?since=<токен>.
+"""
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Iterator
+from datetime import date
+from itertools import islice
+from pathlib import Path
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, Max
+
+from . import models
+from .conf import get_setting
+
+MAGIC = b'RBSNAP1\n'
+END_MAGIC = b'RBSNAPE\n'
+REF_BOOK_TAG = b'R'
+VERSION_TAG = b'V'
+
+HEADER = struct.Struct('<8sQQ')
+REF_BOOK = struct.Struct('<cQQ')
+VERSION = struct.Struct('<cQQIII')
+STRING_LENGTH = struct.Struct('<H')
+INDEX_ITEM = struct.Struct('<QQQ')
+TRAILER = struct.Struct('<QQ8s')
+
+# Размер фрагмента, отдаваемого при потоковой записи.
+CHUNK_SIZE = 64 * 1024
+
+
+class SnapshotFormatError(ValueError):
+    pass
+
+
+def iter_snapshot(using: str = DEFAULT_DB_ALIAS) -> Iterator[bytes]:
+    """
+    Потоковая запись снимка. Все запросы выполняются в одной транзакции, поэтому снимок согласован
+    с токеном журнала изменений.
+    :using: Псевдоним БД, из которой читаются данные.
+    :return: Фрагменты файла.
+    """
+    chunk_size = get_setting('STREAM_CHUNK_SIZE')
+    with transaction.atomic(using=using):
+        if connections[using].vendor == 'postgresql':
+            # В READ COMMITTED каждый запрос видел бы свои данные.
+            with connections[using].cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        token = models.ChangeLogEntry.objects.using(using).aggregate(token=Max('id'))['token'] or 0
+        buffer = bytearray(HEADER.pack(MAGIC, int(time.time()), token))
+        offset = 0
+        ref_books = (
+            models.ReferenceBook.objects.using(using)
+            .order_by('id')
+            .values_list('id', 'current_version_id', 'code', 'name')
+            .iterator(chunk_size=chunk_size)
+        )
+        for ref_book_id, current_version_id, code, name in ref_books:
+            buffer += REF_BOOK.pack(REF_BOOK_TAG, ref_book_id, current_version_id or 0)
+            _pack_string(buffer, code)
+            _pack_string(buffer, name)
+            if len(buffer) >= CHUNK_SIZE:
+                offset += len(buffer)
+                yield bytes(buffer)
+                buffer.clear()
+
+        counts = dict(
+            models.ReferenceBookElement.objects.using(using)
+            .values('ref_book_version_id')
+            .annotate(count=Count('id'))
+            .values_list('ref_book_version_id', 'count')
+        )
+        versions = (
+            models.ReferenceBookVersion.objects.using(using)
+            .order_by('id')
+            .values_list('id', 'ref_book_id', 'date', 'revision', 'version')
+            .iterator(chunk_size=chunk_size)
+        )
+        # Элементы всех версий читаются одним запросом по индексу (ref_book_version, code) в порядке версий.
+        elements = (
+            models.ReferenceBookElement.objects.using(using)
+            .order_by('ref_book_version_id', 'code')
+            .values_list('code', 'value')
+            .iterator(chunk_size=chunk_size)
+        )
+        index = bytearray()
+        version_count = 0
+        for version_id, ref_book_id, version_date, revision, version in versions:
+            count = counts.get(version_id, 0)
+            record_offset = offset + len(buffer)
+            buffer += VERSION.pack(VERSION_TAG, version_id, ref_book_id, version_date.toordinal(), revision, count)
+            _pack_string(buffer, version)
+            position = 0
+            offsets = array('I', [0])
+            for code, value in islice(elements, count):
+                for string in (code.encode(), value.encode()):
+                    buffer += string
+                    position += len(string)
+                    offsets.append(position)
+                if len(buffer) >= CHUNK_SIZE:
+                    offset += len(buffer)
+                    yield bytes(buffer)
+                    buffer.clear()
+            index += INDEX_ITEM.pack(version_id, record_offset, offset + len(buffer))
+            version_count += 1
+            if sys.byteorder != 'little':
+                offsets.byteswap()
+            buffer += offsets.tobytes()
+            if len(buffer) >= CHUNK_SIZE:
+                offset += len(buffer)
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += index
+        buffer += TRAILER.pack(offset + len(buffer) - len(index), version_count, END_MAGIC)
+        yield bytes(buffer)
+
+
+def write_snapshot(path: Path, using: str = DEFAULT_DB_ALIAS) -> int:
+    """
+    Запись снимка в файл. Файл записывается во временный и атомарно переименовывается,
+    поэтому читатели прежнего файла (в том числе через mmap) его не теряют.
+    :path: Путь к файлу.
+    :using: Псевдоним БД, из которой читаются данные.
+    :return: Размер файла в байтах.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f'.tmp-{path.name}')
+    try:
+        with temp_path.open('wb') as file:
+            for chunk in iter_snapshot(using):
+                file.write(chunk)
+        size = temp_path.stat().st_size
+        temp_path.replace(path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return size
+
+
+class SnapshotReader:
+    """
+    Чтение снимка через mmap: файл не загружается в память, страницы разделяются процессами,
+    строки декодируются только при обращении к ним.
+    """
+
+    def __init__(self, path: Path | str):
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size + TRAILER.size:
+                raise SnapshotFormatError('Файл слишком мал для снимка справочников.')
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, self.created_at, self.token = HEADER.unpack_from(self._view, 0)
+        index_offset, version_count, end_magic = TRAILER.unpack_from(self._view, len(self._view) - TRAILER.size)
+        if magic != MAGIC or end_magic != END_MAGIC:
+            self.close()
+            raise SnapshotFormatError('Файл не является снимком справочников либо записан не полностью.')
+        self._index_offset = index_offset
+        # {id версии: (смещение записи, смещение таблицы смещений строк)}
+        self._version_offsets = {}
+        for i in range(version_count):
+            version_id, *offsets = INDEX_ITEM.unpack_from(self._view, index_offset + i * INDEX_ITEM.size)
+            self._version_offsets[version_id] = offsets
+
+    def ref_books(self) -> Iterator[tuple[int, int | None, str, str]]:
+        """
+        :return: Справочники (id, id текущей версии, код, наименование).
+        """
+        position = HEADER.size
+        while position < self._index_offset and self._view[position:position + 1] == REF_BOOK_TAG:
+            _, ref_book_id, current_version_id = REF_BOOK.unpack_from(self._view, position)
+            code, position = self._read_string(position + REF_BOOK.size)
+            name, position = self._read_string(position)
+            yield ref_book_id, current_version_id or None, code, name
+
+    def versions(self) -> Iterator[tuple[int, int, str, date, int, int]]:
+        """
+        :return: Версии (id, id справочника, номер версии, дата, ревизия, количество элементов).
+        """
+        for version_id, (offset, _) in self._version_offsets.items():
+            _, _, ref_book_id, ordinal, revision, count = VERSION.unpack_from(self._view, offset)
+            version, _ = self._read_string(offset + VERSION.size)
+            yield version_id, ref_book_id, version, date.fromordinal(ordinal), revision, count
+
+    def elements(self, version_id: int) -> Iterator[tuple[str, str]]:
+        """
+        :version_id: id версии.
+        :return: Элементы версии (код, значение) в порядке кодов.
+        """
+        if version_id not in self._version_offsets:
+            return
+        offset, table_offset = self._version_offsets[version_id]
+        count = VERSION.unpack_from(self._view, offset)[-1]
+        _, start = self._read_string(offset + VERSION.size)
+        table = self._view[table_offset:table_offset + (2 * count + 1) * 4]
+        # Таблица смещений читается без копирования, кроме платформ с обратным порядком байтов.
+        if sys.byteorder == 'little':
+            offsets = table.cast('I').tolist()
+        else:
+            offsets = array('I', table)
+            offsets.byteswap()
+        table.release()
+        # Срез mmap - строка байтов без промежуточного memoryview, так быстрее для коротких строк.
+        data = self._mmap
+        ends = iter(offsets[1:])
+        for code_start, code_end, value_end in zip(offsets[::2], ends, ends):
+            yield data[start + code_start:start + code_end].decode(), data[start + code_end:start + value_end].decode()
+
+    def close(self) -> None:
+        # Отображение нельзя закрыть, пока на него ссылается memoryview.
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read_string(self, position: int) -> tuple[str, int]:
+        length, = STRING_LENGTH.unpack_from(self._view, position)
+        start = position + STRING_LENGTH.size
+        return str(self._view[start:start + length], 'utf-8'), start + length
+
+
+def _pack_string(buffer: bytearray, value: str) -> None:
+    encoded = value.encode()
+    buffer += STRING_LENGTH.pack(len(encoded))
+    buffer += encoded
@@ -0,0 +1,89 @@
+import tempfile
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import localdate
+from rest_framework import status
+
+from .. import models
+from ..caches import shared_cache
+
+
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        shared_cache.clear()
+        self.ref_book = models.ReferenceBook.objects.create(code='test_ref_book', name='Test Reference Book')
+        models.ReferenceBook.objects.create(code='future_ref_book', name='Future Reference Book')
+        self.version1 = models.ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0',
+                                                                   date=localdate() - timedelta(days=1))
+        self.version2 = models.ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='2.0',
+                                                                   date=localdate())
+        for i, value in enumerate(['Элемент "1"', 'line separator', 'простое']):
+            models.ReferenceBookElement.objects.create(ref_book_version=self.version1, code=f'code{i}', value=value)
+            models.ReferenceBookElement.objects.create(ref_book_version=self.version2, code=f'code{i}',
+                                                       value=f'{value} 2')
+
+    async def assertSameResponse(self, name, params=None, headers=None):
+        if name == 'refbooks-list':
+            url, async_url = reverse('referencebook-list'), reverse('async-refbooks-list')
+        else:
+            url = reverse(name, kwargs={'id': self.ref_book.id})
+            async_url = reverse(f'async-{name}', kwargs={'id': self.ref_book.id})
+        # AsyncClient в Django 4.1 принимает заголовки запроса под их HTTP-именами (без префикса HTTP_).
+        response = await self.async_client.get(url, params or {}, **(headers or {}))
+        async_response = await self.async_client.get(async_url, params or {}, **(headers or {}))
+        self.assertEqual(async_response.status_code, response.status_code)
+        self.assertEqual(async_response['Content-Type'], response['Content-Type'])
+        self.assertEqual(async_response.content, response.content)
+        return async_response
+
+    async def test_ref_book_list(self):
+        await self.assertSameResponse('refbooks-list')
+        await self.assertSameResponse('refbooks-list', {'date': localdate().isoformat()})
+        await self.assertSameResponse('refbooks-list', {'date': 'invalid'})
+
+    async def test_ref_book_element_list(self):
+        response = await self.assertSameResponse('refbooks-elements-list')
+        self.assertEqual(response['ETag'], f'"{self.version2.id}-3"')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        response = await self.assertSameResponse('refbooks-elements-list', {'version': '1.0'})
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000')
+        await self.assertSameResponse('refbooks-elements-list', {'version': '3.0'})
+        await self.assertSameResponse('refbooks-elements-list', {'version': ''})
+        await self.assertSameResponse('refbooks-elements-list', {'date': (localdate() - timedelta(days=1)).isoformat()})
+        url = reverse('async-refbooks-elements-list', kwargs={'id': self.ref_book.id})
+        response = await self.async_client.get(url, {'page_size': 2})
+        self.assertEqual(len(response.json()['elements']), 2)
+        self.assertIn('/async/refbooks/', response.json()['next'])
+        await self.assertSameResponse('refbooks-elements-list', headers={'Accept': 'application/json; indent=4'})
+
+    async def test_ref_book_element_list_not_modified(self):
+        url = reverse('async-refbooks-elements-list', kwargs={'id': self.ref_book.id})
+        etag = (await self.async_client.get(url))['ETag']
+        response = await self.async_client.get(url, **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_ref_book_element_list_payload(self):
+        with tempfile.TemporaryDirectory() as payload_root, \
+                override_settings(REFERENCE_BOOKS={'PAYLOAD_ROOT': payload_root}):
+            response = await self.async_client.get(
+                reverse('async-refbooks-elements-list', kwargs={'id': self.ref_book.id}))
+            content = b''.join(response.streaming_content)
+        expected = await self.async_client.get(reverse('refbooks-elements-list', kwargs={'id': self.ref_book.id}))
+        self.assertEqual(content, expected.content)
+
+    async def test_element_validation(self):
+        await self.assertSameResponse('element-validation', {'code': 'code0', 'value': 'Элемент "1" 2'})
+        await self.assertSameResponse('element-validation', {'code': 'code0', 'value': 'Элемент "1"'})
+        await self.assertSameResponse('element-validation',
+                                      {'code': 'code0', 'value': 'Элемент "1"', 'version': '1.0'})
+        await self.assertSameResponse('element-validation', {'code': 'code0'})
+        yesterday = (localdate() - timedelta(days=1)).isoformat()
+        params = {'code': 'code0', 'value': 'Элемент "1"', 'date': yesterday}
+        await self.assertSameResponse('element-validation', params)
+        await self.assertSameResponse('element-validation', {**params, 'version': '1.0'})
+
+    @override_settings(REFERENCE_BOOKS={'ELEMENT_INDEX_ENABLED': True})
+    async def test_element_validation_with_index(self):
+        await self.assertSameResponse('element-validation', {'code': 'code1', 'value': 'line separator 2'})
@@ -0,0 +1,101 @@
+import tempfile
+import threading
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.timezone import localdate
+
+from ..caches import VersionedCache
+from ..models import ReferenceBook, ReferenceBookVersion, ReferenceBookElement
+from ..services import get_ref_book_elements
+
+
+class VersionedCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        self.cache = VersionedCache(prefix='test')
+        self.cache.clear()
+        self.compute = mock.Mock(side_effect=lambda: self.compute.call_count)
+
+    def test_get_or_set_computes_once(self):
+        self.assertEqual(self.cache.get_or_set('ns', 'key', self.compute), 1)
+        self.assertEqual(self.cache.get_or_set('ns', 'key', self.compute), 1)
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_bump_invalidates_namespace(self):
+        self.cache.get_or_set('ns', 'key', self.compute)
+        self.cache.get_or_set('other', 'key', self.compute)
+        self.cache.bump('ns')
+        self.assertEqual(self.cache.get_or_set('ns', 'key', self.compute), 3)
+        self.assertEqual(self.cache.get_or_set('other', 'key', self.compute), 2)
+
+    def test_clear_invalidates_all_namespaces(self):
+        self.cache.get_or_set('ns', 'key', self.compute)
+        self.cache.clear()
+        self.assertEqual(self.cache.get_or_set('ns', 'key', self.compute), 2)
+
+    def test_value_computed_before_bump_is_not_read(self):
+        def compute():
+            self.cache.bump('ns')
+            return 'stale'
+
+        self.cache.get_or_set('ns', 'key', compute)
+        self.assertEqual(self.cache.get_or_set('ns', 'key', self.compute), 1)
+
+    def test_evicted_namespace_version_does_not_reuse_keys(self):
+        self.cache.get_or_set('ns', 'key', self.compute)
+        self.cache.cache.delete(self.cache._namespace_key('ns'))
+        self.assertEqual(self.cache.get_or_set('ns', 'key', self.compute), 2)
+
+    def test_lock_is_released_on_error(self):
+        with self.assertRaises(ZeroDivisionError):
+            self.cache.get_or_set('ns', 'key', lambda: 1 / 0)
+        self.assertEqual(self.cache.get_or_set('ns', 'key', self.compute), 1)
+
+    @mock.patch('reference_books.caches.LOCK_POLL_INTERVAL', 0.01)
+    def test_waits_for_concurrent_computation(self):
+        """
+        Проверка того, что при вычислении значения другим процессом значение не вычисляется повторно.
+        """
+        cache_key = self.cache.make_key('ns', 'key')
+        self.cache.cache.add(f'{cache_key}:lock', 1)
+        timer = threading.Timer(0.05, lambda: self.cache.cache.set(cache_key, 'computed'))
+        timer.start()
+        self.assertEqual(self.cache.get_or_set('ns', 'key', self.compute), 'computed')
+        timer.join()
+        self.compute.assert_not_called()
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+            }):
+                self.assertEqual(self.cache.get_or_set('ns', 'key', self.compute), 1)
+                self.assertEqual(self.cache.get_or_set('ns', 'key', self.compute), 1)
+                self.cache.bump('ns')
+                self.assertEqual(self.cache.get_or_set('ns', 'key', self.compute), 2)
+                caches['default'].clear()
+
+
+class ElementPayloadCacheTestCase(TestCase):
+    def setUp(self):
+        self.ref_book = ReferenceBook.objects.create(code='ref_book1', name='Справочник 1')
+        self.version = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0', date=localdate())
+        self.element = ReferenceBookElement.objects.create(ref_book_version=self.version, code='elem1',
+                                                           value='Element 1')
+
+    def test_elements_are_cached(self):
+        self.assertEqual(get_ref_book_elements(self.ref_book.id), [{'code': 'elem1', 'value': 'Element 1'}])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_ref_book_elements(self.ref_book.id), [{'code': 'elem1', 'value': 'Element 1'}])
+
+    def test_element_write_invalidates_cache(self):
+        get_ref_book_elements(self.ref_book.id, '1.0')
+        self.element.value = 'Element 2'
+        self.element.save()
+        self.assertEqual(get_ref_book_elements(self.ref_book.id, '1.0'), [{'code': 'elem1', 'value': 'Element 2'}])
+        self.element.delete()
+        self.assertEqual(get_ref_book_elements(self.ref_book.id, '1.0'), [])
+
+    def test_unknown_version(self):
+        self.assertEqual(get_ref_book_elements(self.ref_book.id, '2.0'), [])
@@ -0,0 +1,102 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import changelog
+from ..models import ChangeLogEntry, ReferenceBook, ReferenceBookVersion, ReferenceBookElement
+
+
+class ChangeLogViewTestCase(TestCase):
+    def setUp(self):
+        self.url = reverse('changes')
+        self.ref_book = ReferenceBook.objects.create(code='ICD-10', name='МКБ-10')
+        self.version = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0', date='2023-01-01')
+        self.element = ReferenceBookElement.objects.create(ref_book_version=self.version, code='J00', value='Ринит')
+        self.token = ChangeLogEntry.objects.latest('id').id
+
+    def get_changes(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_changes(self):
+        data = self.get_changes()
+        changes = [{key: value for key, value in change.items() if key != 'token'} for change in data['changes']]
+        self.assertEqual(changes, [
+            {"type": "ref_book", "op": "upsert", "id": self.ref_book.id, "code": "ICD-10", "name": "МКБ-10"},
+            {"type": "version", "op": "upsert", "id": self.version.id, "ref_book_id": self.ref_book.id,
+             "version": "1.0", "date": "2023-01-01"},
+            {"type": "element", "op": "upsert", "id": self.element.id, "version_id": self.version.id,
+             "code": "J00", "value": "Ринит"},
+        ])
+        self.assertEqual(data['next'], self.token)
+        self.assertFalse(data['has_more'])
+
+    def test_changes_since_token(self):
+        self.element.value = 'Назофарингит'
+        self.element.save()
+        element_id = self.element.id
+        self.element.delete()
+        data = self.get_changes(since=self.token)
+        self.assertEqual([(change['type'], change['op']) for change in data['changes']],
+                         [('element', 'upsert'), ('element', 'delete')])
+        self.assertEqual(data['changes'][0]['value'], 'Назофарингит')
+        self.assertEqual(data['changes'][1], {"token": data['next'], "type": "element", "op": "delete",
+                                              "id": element_id})
+        self.assertEqual(self.get_changes(since=data['next']), {"changes": [], "next": data['next'], "has_more": False})
+
+    def test_batches(self):
+        first = self.get_changes(limit=2)
+        self.assertEqual(len(first['changes']), 2)
+        self.assertTrue(first['has_more'])
+        second = self.get_changes(since=first['next'], limit=2)
+        self.assertEqual([change['type'] for change in second['changes']], ['element'])
+        self.assertFalse(second['has_more'])
+
+    def test_cascade_delete_is_one_change(self):
+        version_id = self.version.id
+        self.version.delete()
+        changes = self.get_changes(since=self.token)['changes']
+        self.assertEqual([(change['type'], change['op'], change['id']) for change in changes],
+                         [('version', 'delete', version_id)])
+        ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='2.0', date='2024-01-01')
+        token = ChangeLogEntry.objects.latest('id').id
+        self.ref_book.delete()
+        changes = self.get_changes(since=token)['changes']
+        self.assertEqual([(change['type'], change['op']) for change in changes], [('ref_book', 'delete')])
+
+    def test_imported_version(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = Path(tmp_dir.name) / 'elements.csv'
+        path.write_text('op,code,value\nadd,J01,Синусит\nremove,J00,\n', encoding='utf-8')
+        call_command('import_refbook_version', str(path), ref_book='ICD-10', ref_book_version='2.0',
+                     date='2024-01-01', base_version='1.0', stdout=StringIO())
+        changes = self.get_changes(since=self.token)['changes']
+        version_id = ReferenceBookVersion.objects.get(version='2.0').id
+        self.assertEqual([(change['type'], change['op']) for change in changes],
+                         [('version', 'upsert'), ('element', 'upsert')])
+        self.assertEqual((changes[1]['version_id'], changes[1]['code']), (version_id, 'J01'))
+
+    @override_settings(REFERENCE_BOOKS={'CHANGE_LOG_ENABLED': False})
+    def test_disabled(self):
+        self.element.delete()
+        self.assertEqual(self.get_changes(since=self.token)['changes'], [])
+
+    def test_invalid_params(self):
+        self.assertIn('since', self.client.get(self.url, {'since': -1}).json())
+        self.assertIn('limit', self.client.get(self.url, {'limit': 0}).json())
+
+    def test_postgresql_lock(self):
+        # В PostgreSQL запись в журнал выполняется под транзакционной блокировкой (порядок id - порядок фиксации).
+        with mock.patch.object(changelog, 'connection') as connection:
+            connection.vendor = 'postgresql'
+            self.element.save()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.execute.assert_called_once_with('SELECT pg_advisory_xact_lock(%s)', [changelog.LOCK_KEY])
+        self.assertEqual(ChangeLogEntry.objects.latest('id').object_id, self.element.id)
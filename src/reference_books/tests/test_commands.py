@@ -0,0 +1,165 @@
+import tempfile
+from io import StringIO
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils.timezone import localdate
+
+from ..models import ReferenceBook, ReferenceBookVersion, ReferenceBookElement
+
+
+class ImportRefBookVersionCommandTestCase(TestCase):
+    def setUp(self):
+        self.ref_book = ReferenceBook.objects.create(code='ICD-10', name='МКБ-10')
+        ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0', date='2023-01-01')
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def _write(self, name, content):
+        path = Path(self.tmp_dir.name) / name
+        path.write_text(content, encoding='utf-8')
+        return path
+
+    def _import(self, path, version='2.0', date='2024-01-01', **options):
+        stdout = StringIO()
+        call_command('import_refbook_version', str(path), ref_book='ICD-10', ref_book_version=version, date=date,
+                     stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_import_csv(self):
+        path = self._write('elements.csv', 'code,value\nJ00,Назофарингит\nJ01,"Синусит, острый"\n')
+        output = self._import(path, batch_size=1)
+        version = ReferenceBookVersion.objects.get(ref_book=self.ref_book, version='2.0')
+        self.assertEqual(
+            list(ReferenceBookElement.objects.filter(ref_book_version=version).values_list('code', 'value')),
+            [('J00', 'Назофарингит'), ('J01', 'Синусит, острый')],
+        )
+        self.assertIn('Загружено элементов: 2', output)
+
+    def test_import_jsonl(self):
+        path = self._write('elements.jsonl', '{"code": "J00", "value": "Назофарингит"}\n\n{"code": "J01", "value": "Синусит"}\n')
+        self._import(path)
+        self.assertEqual(ReferenceBookElement.objects.filter(ref_book_version__version='2.0').count(), 2)
+
+    def test_existing_version_is_rejected(self):
+        path = self._write('elements.csv', 'code,value\nJ00,Назофарингит\n')
+        with self.assertRaisesMessage(CommandError, 'Версия 1.0 справочника ICD-10 уже существует.'):
+            self._import(path, version='1.0')
+        with self.assertRaisesMessage(CommandError, 'с датой 2023-01-01 уже существует'):
+            self._import(path, date='2023-01-01')
+
+    def test_invalid_batch_size_is_rejected(self):
+        path = self._write('elements.csv', 'code,value\nJ00,Назофарингит\n')
+        for batch_size in [0, -1]:
+            with self.assertRaisesMessage(CommandError, '--batch-size должен быть положительным числом.'):
+                self._import(path, batch_size=batch_size)
+        self.assertFalse(ReferenceBookVersion.objects.filter(version='2.0').exists())
+
+    def test_duplicate_codes_roll_back_import(self):
+        path = self._write('elements.csv', 'code,value\nJ00,Назофарингит\nJ00,Синусит\n')
+        with self.assertRaisesMessage(CommandError, 'Коды элементов в версии справочника должны быть уникальны'):
+            self._import(path)
+        self.assertFalse(ReferenceBookVersion.objects.filter(version='2.0').exists())
+
+    def test_invalid_row_rolls_back_import(self):
+        path = self._write('elements.csv', 'code,value\nJ00,Назофарингит\nJ01,\n')
+        with self.assertRaisesMessage(CommandError, 'Строка 3: не указано значение элемента.'):
+            self._import(path, batch_size=1)
+        self.assertFalse(ReferenceBookVersion.objects.filter(version='2.0').exists())
+        self.assertFalse(ReferenceBookElement.objects.exists())
+
+
+class ImportRefBookVersionDiffCommandTestCase(TestCase):
+    def setUp(self):
+        self.ref_book = ReferenceBook.objects.create(code='ICD-10', name='МКБ-10')
+        self.base_version = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0',
+                                                                date='2023-01-01')
+        ReferenceBookElement.objects.bulk_create(
+            ReferenceBookElement(ref_book_version=self.base_version, code=f'J0{i}', value=f'Значение {i}')
+            for i in range(5)
+        )
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def _import_diff(self, content, name='diff.csv', **options):
+        path = Path(self.tmp_dir.name) / name
+        path.write_text(content, encoding='utf-8')
+        stdout = StringIO()
+        call_command('import_refbook_version', str(path), ref_book='ICD-10', ref_book_version='2.0',
+                     date='2024-01-01', base_version='1.0', stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def _elements(self, version):
+        return dict(ReferenceBookElement.objects.filter(ref_book_version__version=version).values_list('code', 'value'))
+
+    def test_import_diff(self):
+        output = self._import_diff('op,code,value\nadd,J10,Новый\nchange,J01,Изменённый\nremove,J02,\n', batch_size=2)
+        self.assertEqual(
+            self._elements('2.0'),
+            {'J00': 'Значение 0', 'J01': 'Изменённый', 'J03': 'Значение 3', 'J04': 'Значение 4', 'J10': 'Новый'},
+        )
+        self.assertEqual(len(self._elements('1.0')), 5)
+        self.assertIn('Загружено элементов: 5', output)
+
+    def test_import_diff_jsonl(self):
+        self._import_diff('{"op": "remove", "code": "J00"}\n{"op": "add", "code": "J20", "value": "Новый"}\n',
+                          name='diff.jsonl')
+        self.assertEqual(set(self._elements('2.0')), {'J01', 'J02', 'J03', 'J04', 'J20'})
+
+    def test_change_of_missing_code_is_rejected(self):
+        with self.assertRaisesMessage(CommandError, 'должны присутствовать в базовой версии'):
+            self._import_diff('op,code,value\nchange,J99,Изменённый\n')
+        self.assertFalse(ReferenceBookVersion.objects.filter(version='2.0').exists())
+
+    def test_add_of_existing_code_is_rejected(self):
+        with self.assertRaisesMessage(CommandError, 'Коды элементов в версии справочника должны быть уникальны'):
+            self._import_diff('op,code,value\nadd,J00,Дубликат\n')
+
+    def test_duplicate_code_is_rejected(self):
+        with self.assertRaisesMessage(CommandError, 'Строка 4: код J01 уже указан в строке 2.'):
+            self._import_diff('op,code,value\nchange,J01,Изменённый\nadd,J10,Новый\nremove,J01,\n')
+        with self.assertRaisesMessage(CommandError, 'Строка 3: код J01 уже указан в строке 1.'):
+            self._import_diff('{"op": "remove", "code": "J01"}\n{"op": "add", "code": "J10", "value": "Новый"}\n'
+                              '{"op": "remove", "code": "J01"}\n', name='diff.jsonl', batch_size=1)
+        self.assertFalse(ReferenceBookVersion.objects.filter(version='2.0').exists())
+
+    def test_unknown_operation_is_rejected(self):
+        with self.assertRaisesMessage(CommandError, 'Строка 2: операция должна быть одной из'):
+            self._import_diff('op,code,value\nupsert,J00,Значение\n')
+
+
+class RollCurrentVersionsCommandTestCase(TestCase):
+    def test_roll_current_versions(self):
+        ref_book = ReferenceBook.objects.create(code='ICD-10', name='МКБ-10')
+        version = ReferenceBookVersion.objects.create(ref_book=ref_book, version='1.0',
+                                                      date=localdate() + timedelta(days=1))
+        stdout = StringIO()
+        with mock.patch('reference_books.services.localdate', return_value=version.date):
+            call_command('roll_current_versions', stdout=stdout)
+        self.assertIn('Текущая версия изменилась у справочников: 1', stdout.getvalue())
+        self.assertEqual(ReferenceBook.objects.get(pk=ref_book.pk).current_version, version)
+
+
+class BuildElementPayloadsCommandTestCase(TestCase):
+    def setUp(self):
+        ref_book = ReferenceBook.objects.create(code='ICD-10', name='МКБ-10')
+        self.version = ReferenceBookVersion.objects.create(ref_book=ref_book, version='1.0', date=localdate())
+        ReferenceBookElement.objects.create(ref_book_version=self.version, code='J00', value='Назофарингит')
+        self.version.refresh_from_db()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_build_element_payloads(self):
+        stdout = StringIO()
+        with override_settings(REFERENCE_BOOKS={'PAYLOAD_ROOT': self.tmp_dir.name}):
+            call_command('build_element_payloads', ref_book='ICD-10', stdout=stdout)
+        self.assertIn('Собрано файлов версий: 1', stdout.getvalue())
+        path = Path(self.tmp_dir.name) / f'{self.version.id}-{self.version.revision}.json'
+        self.assertEqual(path.read_text(encoding='utf-8'), '{"elements":[{"code":"J00","value":"Назофарингит"}]}')
+
+    def test_payload_root_is_required(self):
+        with self.assertRaisesMessage(CommandError, 'Не задана настройка PAYLOAD_ROOT.'):
+            call_command('build_element_payloads')
@@ -0,0 +1,87 @@
+import gzip
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import localdate
+
+from .. import models
+from ..caches import shared_cache
+from ..compression import choose_encoding, compress, compress_stream
+
+
+class ChooseEncodingTestCase(SimpleTestCase):
+    def test_choose_encoding(self):
+        encodings = ['br', 'zstd', 'gzip']
+        self.assertEqual(choose_encoding('gzip, deflate, br', encodings), 'br')
+        self.assertEqual(choose_encoding('gzip;q=1.0, br;q=0.5', encodings), 'gzip')
+        self.assertEqual(choose_encoding('br;q=0, *', encodings), 'zstd')
+        self.assertEqual(choose_encoding('deflate', encodings), None)
+        self.assertEqual(choose_encoding('gzip;q=0', encodings), None)
+        self.assertEqual(choose_encoding('', encodings), None)
+
+    def test_compress_stream(self):
+        chunks = [b'{"elements":[', b'{"code":"1","value":"1"}' * 100, b']}']
+        self.assertEqual(gzip.decompress(b''.join(compress_stream(chunks, 'gzip'))), b''.join(chunks))
+        self.assertEqual(gzip.decompress(compress(b''.join(chunks), 'gzip', static=True)), b''.join(chunks))
+
+
+class CompressionMiddlewareTestCase(TestCase):
+    def setUp(self):
+        shared_cache.clear()
+        self.ref_book = models.ReferenceBook.objects.create(code='test_ref_book', name='Test Reference Book')
+        self.version1 = models.ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0',
+                                                                   date=localdate() - timedelta(days=1))
+        self.version2 = models.ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='2.0',
+                                                                   date=localdate())
+        for version in (self.version1, self.version2):
+            models.ReferenceBookElement.objects.bulk_create(
+                models.ReferenceBookElement(ref_book_version=version, code=f'code{i}', value=f'Значение {i}')
+                for i in range(100)
+            )
+        self.url = reverse('refbooks-elements-list', kwargs={"id": self.ref_book.id})
+
+    def test_gzip(self):
+        content = self.client.get(self.url).content
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), content)
+
+    def test_not_accepted_encoding(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_response_is_not_compressed(self):
+        response = self.client.get(self.url, {'version': '3.0'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_weak_etag_matches(self):
+        etag = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_immutable_response_is_compressed_once(self):
+        with mock.patch('reference_books.middleware.compress', wraps=compress) as compress_mock:
+            for _ in range(3):
+                response = self.client.get(self.url, {'version': '1.0'}, HTTP_ACCEPT_ENCODING='gzip')
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(compress_mock.call_count, 1)
+            for _ in range(2):
+                self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(compress_mock.call_count, 3)
+
+    @override_settings(REFERENCE_BOOKS={'STREAM_ELEMENTS': True})
+    def test_streaming_response(self):
+        content = b''.join(self.client.get(self.url).streaming_content)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), content)
+
+    def test_html_is_not_compressed(self):
+        response = self.client.get(reverse('admin:login'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
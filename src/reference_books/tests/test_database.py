@@ -0,0 +1,23 @@
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+
+
+class SqlitePragmasTestCase(SimpleTestCase):
+    databases = {'default'}
+
+    def _get_pragma(self, name):
+        new_connection = connection.copy()
+        try:
+            with new_connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA {name}')
+                return cursor.fetchone()[0]
+        finally:
+            new_connection.close()
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        with override_settings(REFERENCE_BOOKS={'SQLITE_PRAGMAS': {'cache_size': -1234, 'temp_store': 'MEMORY'}}):
+            self.assertEqual(self._get_pragma('cache_size'), -1234)
+            self.assertEqual(self._get_pragma('temp_store'), 2)
+
+    def test_no_pragmas_by_default(self):
+        self.assertNotEqual(self._get_pragma('cache_size'), -1234)
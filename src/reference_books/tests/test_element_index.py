@@ -0,0 +1,118 @@
+from unittest import mock
+
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils.timezone import localdate
+
+from ..caches import shared_cache, version_namespace
+from ..element_index import ElementIndex, element_index
+from ..models import ReferenceBook, ReferenceBookVersion, ReferenceBookElement
+from ..services import validate_elements
+
+
+class ElementIndexTestCase(TestCase):
+    def setUp(self):
+        self.index = ElementIndex()
+        self.ref_book = ReferenceBook.objects.create(code='ref_book1', name='Справочник 1')
+        self.version1 = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0', date=localdate())
+        self.version2 = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='2.0',
+                                                            date=localdate().replace(year=2000))
+        ReferenceBookElement.objects.create(ref_book_version=self.version1, code='elem1', value='Element 1')
+        ReferenceBookElement.objects.create(ref_book_version=self.version2, code='elem2', value='Element 2')
+
+    def test_contains(self):
+        self.assertTrue(self.index.contains(self.version1.id, 0, 'elem1', 'Element 1'))
+        self.assertFalse(self.index.contains(self.version1.id, 0, 'elem1', 'Element 2'))
+        self.assertFalse(self.index.contains(self.version1.id, 0, 'elem2', 'Element 2'))
+
+    def test_version_is_loaded_once(self):
+        self.index.contains(self.version1.id, 0, 'elem1', 'Element 1')
+        with self.assertNumQueries(0):
+            self.index.contains(self.version1.id, 0, 'elem1', 'Element 1')
+
+    @override_settings(REFERENCE_BOOKS={'ELEMENT_INDEX_MAX_BYTES': 250})
+    def test_lru_eviction_of_whole_versions(self):
+        self.index.contains(self.version1.id, 0, 'elem1', 'Element 1')
+        self.index.contains(self.version2.id, 0, 'elem2', 'Element 2')
+        with self.assertNumQueries(0):
+            self.index.contains(self.version2.id, 0, 'elem2', 'Element 2')
+        with self.assertNumQueries(1):
+            self.index.contains(self.version1.id, 0, 'elem1', 'Element 1')
+
+    @override_settings(REFERENCE_BOOKS={'ELEMENT_INDEX_MAX_BYTES': 10})
+    def test_oversized_version_is_not_indexed(self):
+        self.assertIsNone(self.index.contains(self.version1.id, 0, 'elem1', 'Element 1'))
+
+
+@override_settings(REFERENCE_BOOKS={'ELEMENT_INDEX_ENABLED': True})
+class ElementIndexValidationTestCase(TestCase):
+    def setUp(self):
+        element_index.clear()
+        self.ref_book = ReferenceBook.objects.create(code='ref_book1', name='Справочник 1')
+        self.version = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0', date=localdate())
+        self.element = ReferenceBookElement.objects.create(ref_book_version=self.version, code='elem1',
+                                                           value='Element 1')
+
+    def test_validate_elements_without_queries(self):
+        self.assertTrue(validate_elements(self.ref_book.id, code='elem1', value='Element 1'))
+        self.assertTrue(validate_elements(self.ref_book.id, code='elem1', value='Element 1', version='1.0'))
+        with self.assertNumQueries(0):
+            self.assertTrue(validate_elements(self.ref_book.id, code='elem1', value='Element 1'))
+            self.assertTrue(validate_elements(self.ref_book.id, code='elem1', value='Element 1', version='1.0'))
+            self.assertFalse(validate_elements(self.ref_book.id, code='elem1', value='Element 2'))
+
+    def test_index_is_updated_on_element_changes(self):
+        self.assertTrue(validate_elements(self.ref_book.id, code='elem1', value='Element 1'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.element.code = 'elem2'
+            self.element.save()
+            ReferenceBookElement.objects.create(ref_book_version=self.version, code='elem3', value='Element 3')
+        self.assertFalse(validate_elements(self.ref_book.id, code='elem1', value='Element 1'))
+        with self.assertNumQueries(0):
+            self.assertTrue(validate_elements(self.ref_book.id, code='elem2', value='Element 1'))
+            self.assertTrue(validate_elements(self.ref_book.id, code='elem3', value='Element 3'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.element.delete()
+        self.assertFalse(validate_elements(self.ref_book.id, code='elem2', value='Element 1'))
+
+    def test_element_changes_are_applied_without_reload(self):
+        self.assertTrue(validate_elements(self.ref_book.id, code='elem1', value='Element 1'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.element.code = 'elem2'
+            self.element.save()
+            ReferenceBookElement.objects.create(ref_book_version=self.version, code='elem3', value='Element 3')
+        revision = ReferenceBookVersion.objects.get(pk=self.version.pk).revision
+        self.assertEqual(element_index.get_revision(self.version.pk), revision)
+        with mock.patch.object(ReferenceBookElement.objects, 'filter', side_effect=AssertionError):
+            self.assertFalse(validate_elements(self.ref_book.id, code='elem1', value='Element 1'))
+            self.assertTrue(validate_elements(self.ref_book.id, code='elem2', value='Element 1'))
+            self.assertTrue(validate_elements(self.ref_book.id, code='elem3', value='Element 3'))
+
+    def test_change_after_concurrent_change_is_not_applied(self):
+        self.assertTrue(validate_elements(self.ref_book.id, code='elem1', value='Element 1'))
+        # Изменение другим процессом, о котором этот процесс не знает.
+        ReferenceBookElement.objects.filter(pk=self.element.pk).update(value='Element 2')
+        ReferenceBookVersion.objects.filter(pk=self.version.pk).update(revision=F('revision') + 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            ReferenceBookElement.objects.create(ref_book_version=self.version, code='elem3', value='Element 3')
+        self.assertEqual(element_index.get_revision(self.version.pk), 1)
+        self.assertTrue(validate_elements(self.ref_book.id, code='elem1', value='Element 2'))
+        self.assertTrue(validate_elements(self.ref_book.id, code='elem3', value='Element 3'))
+
+    def test_index_is_reloaded_on_revision_change(self):
+        self.assertTrue(validate_elements(self.ref_book.id, code='elem1', value='Element 1'))
+        # Изменение другим процессом: сигналы этого процесса не вызываются, меняются только данные,
+        # ревизия и версия пространства имён версии в общем кэше.
+        ReferenceBookElement.objects.filter(pk=self.element.pk).update(value='Element 2')
+        ReferenceBookVersion.objects.filter(pk=self.version.pk).update(revision=F('revision') + 1)
+        shared_cache.bump(version_namespace(self.version.pk))
+        self.assertFalse(validate_elements(self.ref_book.id, code='elem1', value='Element 1'))
+        self.assertTrue(validate_elements(self.ref_book.id, code='elem1', value='Element 2'))
+
+    def test_oversized_version_is_rechecked_on_revision_change(self):
+        index = ElementIndex()
+        with override_settings(REFERENCE_BOOKS={'ELEMENT_INDEX_MAX_BYTES': 10}):
+            self.assertIsNone(index.contains(self.version.id, 0, 'elem1', 'Element 1'))
+            with self.assertNumQueries(0):
+                self.assertIsNone(index.contains(self.version.id, 0, 'elem1', 'Element 1'))
+        self.assertTrue(index.contains(self.version.id, 1, 'elem1', 'Element 1'))
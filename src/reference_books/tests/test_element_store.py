@@ -0,0 +1,139 @@
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils.timezone import localdate
+
+from ..caches import shared_cache
+from ..element_store import MISSING_RECHECK_INTERVAL, ElementStoreFile, ElementStoreFormatError, element_store
+from ..models import ReferenceBook, ReferenceBookVersion, ReferenceBookElement
+from ..services import avalidate_elements, validate_elements
+
+CODES = ['a10', 'a9', 'B', 'b', 'Я', 'J00.1']
+
+
+class ElementStoreTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        settings_override = override_settings(REFERENCE_BOOKS={'ELEMENT_STORE_ROOT': str(self.root)})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        shared_cache.clear()
+        element_store.clear()
+        self.ref_book = ReferenceBook.objects.create(code='ICD-10', name='МКБ-10')
+        self.version = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0', date=localdate())
+        for code in CODES:
+            ReferenceBookElement.objects.create(ref_book_version=self.version, code=code, value=f'Значение {code}')
+
+    def build(self):
+        call_command('build_element_store', stdout=StringIO())
+
+    def get_files(self):
+        return sorted(path.name for path in self.root.iterdir())
+
+    def test_store_file(self):
+        self.build()
+        revision = ReferenceBookVersion.objects.get(pk=self.version.pk).revision
+        self.assertEqual(self.get_files(), [f'{self.version.id}-{revision}.elements'])
+        store_file = ElementStoreFile(self.root / self.get_files()[0])
+        self.assertEqual(len(store_file), len(CODES))
+        for code in CODES:
+            self.assertEqual(store_file.get(code), f'Значение {code}')
+        for code in ['', 'a', 'a1', 'J00', 'Я0', 'z']:
+            self.assertIsNone(store_file.get(code))
+
+    def test_validation_uses_store(self):
+        self.build()
+        self.assertTrue(validate_elements(self.ref_book.id, 'Я', 'Значение Я'))
+        with self.assertNumQueries(0):
+            self.assertTrue(validate_elements(self.ref_book.id, 'J00.1', 'Значение J00.1'))
+            self.assertFalse(validate_elements(self.ref_book.id, 'J00.1', 'Значение'))
+            self.assertFalse(validate_elements(self.ref_book.id, 'J00', 'Значение J00'))
+
+    async def test_async_validation_uses_store(self):
+        await sync_to_async(self.build)()
+        # update() не отправляет сигналы и не меняет ревизию: ответ из файла отличается от данных БД.
+        await ReferenceBookElement.objects.filter(code='B').aupdate(value='Изменено в БД')
+        self.assertTrue(await avalidate_elements(self.ref_book.id, 'B', 'Значение B'))
+        self.assertFalse(await avalidate_elements(self.ref_book.id, 'B', 'Изменено в БД'))
+
+    def test_changed_elements_are_not_read_from_stale_file(self):
+        self.build()
+        self.assertTrue(validate_elements(self.ref_book.id, 'b', 'Значение b'))
+        element = ReferenceBookElement.objects.get(ref_book_version=self.version, code='b')
+        element.value = 'Новое значение'
+        element.save()
+        self.assertFalse(validate_elements(self.ref_book.id, 'b', 'Значение b'))
+        self.assertTrue(validate_elements(self.ref_book.id, 'b', 'Новое значение'))
+        # Новая ревизия заменяет файл прежней.
+        self.build()
+        revision = ReferenceBookVersion.objects.get(pk=self.version.pk).revision
+        self.assertEqual(self.get_files(), [f'{self.version.id}-{revision}.elements'])
+        with self.assertNumQueries(0):
+            self.assertTrue(validate_elements(self.ref_book.id, 'b', 'Новое значение'))
+
+    def test_corrupt_file_falls_back_to_database(self):
+        self.build()
+        path = self.root / self.get_files()[0]
+        content = path.read_bytes()
+        for corrupt in [b'', content[:10], content[:-1], b'X' * len(content), content[:-2] + b'\xff\xff']:
+            path.write_bytes(corrupt)
+            element_store.clear()
+            with self.assertLogs('reference_books.element_store', 'WARNING'):
+                self.assertTrue(validate_elements(self.ref_book.id, 'b', 'Значение b'))
+                self.assertTrue(validate_elements(self.ref_book.id, 'Я', 'Значение Я'))
+        for corrupt in [content[:-1], b'X' * len(content)]:
+            path.write_bytes(corrupt)
+            with self.assertRaises(ElementStoreFormatError):
+                ElementStoreFile(path)
+
+    def test_missing_file_is_remembered(self):
+        with mock.patch('reference_books.element_store.ElementStoreFile', wraps=ElementStoreFile) as file_mock:
+            for _ in range(3):
+                self.assertTrue(validate_elements(self.ref_book.id, 'b', 'Значение b'))
+            self.assertEqual(file_mock.call_count, 1)
+            self.build()
+            with self.assertNumQueries(0):
+                self.assertTrue(validate_elements(self.ref_book.id, 'b', 'Значение b'))
+            self.assertEqual(file_mock.call_count, 2)
+
+    def test_file_built_by_other_process_is_used_after_recheck_interval(self):
+        self.assertTrue(validate_elements(self.ref_book.id, 'b', 'Значение b'))
+        self.build()
+        # Отметка об отсутствии файла, которую сборка в другом процессе не сбрасывает.
+        revision = ReferenceBookVersion.objects.get(pk=self.version.pk).revision
+        element_store._set_missing(self.version.pk, revision)
+        with self.assertNumQueries(1):
+            self.assertTrue(validate_elements(self.ref_book.id, 'b', 'Значение b'))
+        now = time.monotonic()
+        with mock.patch('reference_books.element_store.time.monotonic', return_value=now + MISSING_RECHECK_INTERVAL):
+            with self.assertNumQueries(0):
+                self.assertTrue(validate_elements(self.ref_book.id, 'b', 'Значение b'))
+
+    def test_version_delete_removes_files(self):
+        self.build()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.version.delete()
+        self.assertEqual(self.get_files(), [])
+
+    def test_imported_version(self):
+        path = self.root.parent / f'{self.root.name}.csv'
+        self.addCleanup(path.unlink, missing_ok=True)
+        path.write_text('code,value\nJ00,Назофарингит\n', encoding='utf-8')
+        call_command('import_refbook_version', str(path), ref_book='ICD-10', ref_book_version='2.0',
+                     date='2999-01-01', stdout=StringIO())
+        version = ReferenceBookVersion.objects.get(version='2.0')
+        self.assertEqual(self.get_files(), [f'{version.id}-{version.revision}.elements'])
+        self.assertTrue(validate_elements(self.ref_book.id, 'J00', 'Назофарингит', version='2.0'))
+
+    def test_command_requires_root(self):
+        with override_settings(REFERENCE_BOOKS={}):
+            with self.assertRaises(CommandError):
+                self.build()
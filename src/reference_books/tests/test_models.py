@@ -102,3 +102,14 @@ class ReferenceBookElementTestCase(TestCase):
                 code='code1',
                 value='Value 1'
             )
+
+    def test_element_changes_bump_version_revision(self):
+        """
+        Проверка того, что изменение элементов увеличивает ревизию версии.
+        """
+        revision = ReferenceBookVersion.objects.get(pk=self.version.pk).revision
+        self.element.value = 'Value 2'
+        self.element.save()
+        ReferenceBookElement.objects.create(ref_book_version=self.version, code='code2', value='Value 2')
+        ReferenceBookElement.objects.filter(code='code2').delete()
+        self.assertEqual(ReferenceBookVersion.objects.get(pk=self.version.pk).revision, revision + 3)
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import localdate
+
+from ..models import ReferenceBook, ReferenceBookVersion, ReferenceBookElement
+from ..services import get_queryset_of_ref_book_elements, get_version_diff, validate_elements, validate_elements_bulk
+from ..versions import current_version_resolver
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN есть только в SQLite')
+class QueryPlanTestCase(TestCase):
+    """
+    Проверка того, что частые запросы из services.py выполняются по индексам без обращения к таблицам.
+    """
+
+    def setUp(self):
+        self.ref_book = ReferenceBook.objects.create(code='ref_book1', name='Справочник 1')
+        self.version = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0', date=localdate())
+        ReferenceBookElement.objects.create(ref_book_version=self.version, code='elem1', value='Element 1')
+        current_version_resolver.clear()
+
+    def _get_plans(self, func) -> list[list[str]]:
+        with CaptureQueriesContext(connection) as context:
+            func()
+        self.assertTrue(context.captured_queries)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+                plans.append([row[3] for row in cursor.fetchall() if row[3].startswith(('SEARCH', 'SCAN'))])
+        return plans
+
+    def assertIndexOnly(self, plans):
+        for plan in plans:
+            for step in plan:
+                self.assertRegex(step, r'^SEARCH .* USING (COVERING INDEX|INTEGER PRIMARY KEY)', plan)
+
+    def test_current_version_resolution(self):
+        self.assertIndexOnly(self._get_plans(lambda: current_version_resolver.get(self.ref_book.id)))
+
+    def test_version_resolution(self):
+        self.assertIndexOnly(self._get_plans(lambda: current_version_resolver.get_version_id(self.ref_book.id, '1.0')))
+
+    def test_version_on_date_resolution(self):
+        plans = self._get_plans(lambda: current_version_resolver.get_version_id_on_date(self.ref_book.id, localdate()))
+        self.assertIndexOnly(plans)
+
+    def test_element_list(self):
+        current_version_resolver.get(self.ref_book.id)
+        plans = self._get_plans(
+            lambda: list(get_queryset_of_ref_book_elements(self.ref_book.id).values_list('code', 'value'))
+        )
+        self.assertIndexOnly(plans)
+
+    def test_bulk_validation(self):
+        current_version_resolver.get(self.ref_book.id)
+        elements = [
+            {'ref_book_id': self.ref_book.id, 'code': 'elem1', 'value': 'Element 1'},
+            {'ref_book_id': self.ref_book.id, 'code': 'elem2', 'value': 'Element 2'},
+        ]
+        self.assertIndexOnly(self._get_plans(lambda: validate_elements_bulk(elements)))
+
+    def test_validation(self):
+        """
+        Для проверки одного элемента SQLite выбирает уникальный индекс (ref_book_version, code):
+        он гарантирует не более одной строки, значение читается одним обращением по rowid.
+        """
+        current_version_resolver.get(self.ref_book.id)
+        plans = self._get_plans(lambda: validate_elements(self.ref_book.id, code='elem1', value='Element 1'))
+        for plan in plans:
+            for step in plan:
+                self.assertRegex(step, r'^SEARCH .* USING (COVERING )?INDEX .*\(ref_book_version_id=\? AND code=\?',
+                                 plan)
+
+    def test_version_diff(self):
+        """
+        Обе части различий читаются по индексам в порядке кодов, объединение выполняется слиянием без сортировки.
+        """
+        ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='2.0', date=localdate() + timedelta(days=1))
+        _, rows = get_version_diff(self.ref_book.id, '1.0', '2.0')
+        with CaptureQueriesContext(connection) as context:
+            list(rows)
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {context.captured_queries[0]["sql"]}')
+            plan = [row[3] for row in cursor.fetchall()]
+        self.assertIn('MERGE (UNION ALL)', plan)
+        self.assertFalse([step for step in plan if 'TEMP B-TREE' in step], plan)
+        for step in plan:
+            if step.startswith(('SEARCH', 'SCAN')):
+                self.assertRegex(step, r'^SEARCH .* USING (COVERING )?INDEX', plan)
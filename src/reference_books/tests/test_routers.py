@@ -0,0 +1,152 @@
+import json
+import tempfile
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import localdate
+
+from .. import models
+from ..caches import shared_cache
+from ..routers import PRIMARY_TOKEN_FLAG, read_from_replica
+
+REPLICAS = ['replica1', 'replica2']
+# id записей, одинаковые в основной БД и репликах.
+OBJECT_ID = 1000
+
+
+@override_settings(REFERENCE_BOOKS={'READ_REPLICAS': REPLICAS, 'REPLICA_LAG': 0})
+class ReplicaRouterTestCase(TestCase):
+    """
+    Реплики - отдельные файлы SQLite с другими данными, по которым видно, из какой БД прочитан ответ.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        for alias in REPLICAS:
+            connections.settings[alias] = {
+                **connections.settings['default'], 'NAME': str(Path(cls.replica_dir.name) / f'{alias}.sqlite3'),
+            }
+            call_command('migrate', database=alias, verbosity=0)
+            # bulk_create и update не отправляют сигналы, изменяющие основную БД.
+            models.ReferenceBook.objects.using(alias).bulk_create([
+                models.ReferenceBook(id=OBJECT_ID, code='replica_ref_book', name='Replica'),
+            ])
+            models.ReferenceBookVersion.objects.using(alias).bulk_create([
+                models.ReferenceBookVersion(id=OBJECT_ID, ref_book_id=OBJECT_ID, version='1.0', date=localdate()),
+            ])
+            models.ReferenceBookElement.objects.using(alias).bulk_create([
+                models.ReferenceBookElement(ref_book_version_id=OBJECT_ID, code='replica', value='Реплика'),
+            ])
+            models.ReferenceBook.objects.using(alias).update(current_version_id=OBJECT_ID)
+
+    @classmethod
+    def tearDownClass(cls):
+        for alias in REPLICAS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        cls.replica_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        shared_cache.clear()
+        self.ref_book = models.ReferenceBook.objects.create(id=OBJECT_ID, code='primary_ref_book', name='Primary')
+        version = models.ReferenceBookVersion.objects.create(
+            id=OBJECT_ID, ref_book=self.ref_book, version='1.0', date=localdate(),
+        )
+        models.ReferenceBookElement.objects.create(ref_book_version=version, code='primary', value='Основная')
+
+    def get_elements(self):
+        response = self.client.get(reverse('refbooks-elements-list', kwargs={'id': OBJECT_ID}))
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return [element['code'] for element in json.loads(content)['elements']]
+
+    def test_read_views_use_replica(self):
+        response = self.client.get(reverse('referencebook-list'))
+        self.assertEqual([ref_book['code'] for ref_book in response.json()['refbooks']], ['replica_ref_book'])
+        self.assertEqual(self.get_elements(), ['replica'])
+        url = reverse('element-validation', kwargs={'id': OBJECT_ID})
+        self.assertTrue(self.client.get(url, {'code': 'replica', 'value': 'Реплика'}).json()['exists'])
+        self.assertFalse(self.client.get(url, {'code': 'primary', 'value': 'Основная'}).json()['exists'])
+
+    def test_streamed_elements_use_replica(self):
+        with override_settings(REFERENCE_BOOKS={'READ_REPLICAS': REPLICAS, 'REPLICA_LAG': 0, 'STREAM_ELEMENTS': True}):
+            self.assertEqual(self.get_elements(), ['replica'])
+
+    async def test_async_views_use_replica(self):
+        response = await self.async_client.get(reverse('async-refbooks-list'))
+        self.assertEqual([ref_book['code'] for ref_book in response.json()['refbooks']], ['replica_ref_book'])
+        response = await self.async_client.get(reverse('async-refbooks-elements-list', kwargs={'id': OBJECT_ID}))
+        self.assertEqual([element['code'] for element in response.json()['elements']], ['replica'])
+
+    def test_primary_without_replicas(self):
+        with override_settings(REFERENCE_BOOKS={}):
+            self.assertEqual(self.get_elements(), ['primary'])
+
+    def test_primary_after_write(self):
+        with override_settings(REFERENCE_BOOKS={'READ_REPLICAS': REPLICAS, 'REPLICA_LAG': 60}):
+            self.assertEqual(self.get_elements(), ['replica'])
+            models.ReferenceBookElement.objects.create(ref_book_version_id=OBJECT_ID, code='added', value='Новый')
+            self.assertEqual(self.get_elements(), ['added', 'primary'])
+
+    def _set_replica_token(self, token):
+        for alias in REPLICAS:
+            models.ChangeLogEntry.objects.using(alias).bulk_create([
+                models.ChangeLogEntry(id=token, object_type=models.ChangeLogEntry.REF_BOOK,
+                                      operation=models.ChangeLogEntry.UPSERT, object_id=OBJECT_ID),
+            ])
+            self.addCleanup(models.ChangeLogEntry.objects.using(alias).all().delete)
+
+    def _write_to_primary(self):
+        shared_cache.set_flag(PRIMARY_TOKEN_FLAG, None, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            models.ReferenceBookElement.objects.create(ref_book_version_id=OBJECT_ID, code='added', value='Новый')
+        return models.ChangeLogEntry.objects.latest('id').id
+
+    def test_lagging_replica_does_not_fill_cache(self):
+        token = self._write_to_primary()
+        self._set_replica_token(token - 1)
+        self.assertEqual(self.get_elements(), ['replica'])
+        # Реплика отстаёт дольше REPLICA_LAG: её ответ не сохраняется в общем кэше для основной БД и реплик.
+        with override_settings(REFERENCE_BOOKS={}):
+            self.assertEqual(self.get_elements(), ['added', 'primary'])
+
+    def test_current_replica_fills_cache(self):
+        token = self._write_to_primary()
+        self._set_replica_token(token)
+        self.assertEqual(self.get_elements(), ['replica'])
+        with override_settings(REFERENCE_BOOKS={}):
+            self.assertEqual(self.get_elements(), ['replica'])
+
+    async def test_async_lagging_replica_does_not_fill_cache(self):
+        token = await sync_to_async(self._write_to_primary)()
+        await sync_to_async(self._set_replica_token)(token - 1)
+        url = reverse('async-refbooks-elements-list', kwargs={'id': OBJECT_ID})
+        self.assertEqual([element['code'] for element in (await self.async_client.get(url)).json()['elements']],
+                         ['replica'])
+        with override_settings(REFERENCE_BOOKS={}):
+            response = await self.async_client.get(url)
+        self.assertEqual([element['code'] for element in response.json()['elements']], ['added', 'primary'])
+
+    def test_writes_use_primary(self):
+        with read_from_replica():
+            ref_book = models.ReferenceBook.objects.get(id=OBJECT_ID)
+            self.assertIn(ref_book._state.db, REPLICAS)
+            ref_book.name = 'Changed'
+            ref_book.save()
+        self.assertEqual(models.ReferenceBook.objects.get(id=OBJECT_ID).name, 'Changed')
+        for alias in REPLICAS:
+            self.assertEqual(models.ReferenceBook.objects.using(alias).get(id=OBJECT_ID).name, 'Replica')
+
+    def test_admin_uses_primary(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get(reverse('admin:reference_books_referencebook_changelist'))
+        self.assertContains(response, 'primary_ref_book')
+        self.assertNotContains(response, 'replica_ref_book')
@@ -1,11 +1,14 @@
 from datetime import timedelta
+from unittest import mock
 
 from django.db.models import QuerySet
 from django.test import TestCase
 from django.utils.timezone import localdate
 
 from ..models import ReferenceBook, ReferenceBookVersion, ReferenceBookElement
-from ..services import get_queryset_of_ref_book_elements, validate_elements
+from ..services import get_queryset_of_ref_book_elements, validate_elements, \
+    validate_elements_batch, validate_elements_bulk, roll_current_versions, \
+    get_ref_books, get_queryset_of_ref_books
 
 
 class ServicesTestCase(TestCase):
@@ -76,3 +79,127 @@ class ServicesTestCase(TestCase):
         self.assertFalse(validate_elements(self.ref_book.id, code="elem1", value="Element 2"))
         self.assertFalse(validate_elements(self.ref_book.id, code="elem2", value="Element 3"))
         self.assertFalse(validate_elements(self.ref_book.id, code="elem1", value="Element 1", version="1.0"))
+
+    def test_validate_elements_batch(self):
+        elements = [
+            {"code": "elem1", "value": "Element 1"},
+            {"code": "elem3", "value": "Element 3", "version": "1.0"},
+            {"code": "elem1", "value": "Element 2"},
+            {"code": "elem1", "value": "Element 1", "version": "1.0"},
+            {"code": "elem2", "value": "Element 2", "version": "3.0"},
+            {"code": "elem2", "value": "Element 2"},
+        ]
+        self.assertEqual(
+            validate_elements_batch(self.ref_book.id, elements),
+            [True, True, False, False, False, True],
+        )
+
+    def test_validate_elements_batch_for_invalid_ref_book_id(self):
+        self.assertEqual(validate_elements_batch(999, [{"code": "elem1", "value": "Element 1"}]), [False])
+
+
+class ValidateElementsBulkTestCase(TestCase):
+    def setUp(self):
+        self.ref_book1 = ReferenceBook.objects.create(code='ref_book1', name='Справочник 1')
+        self.ref_book2 = ReferenceBook.objects.create(code='ref_book2', name='Справочник 2')
+        version1 = ReferenceBookVersion.objects.create(ref_book=self.ref_book1, version='1.0', date=localdate())
+        version2 = ReferenceBookVersion.objects.create(ref_book=self.ref_book2, version='1.0',
+                                                       date=localdate() - timedelta(days=1))
+        version3 = ReferenceBookVersion.objects.create(ref_book=self.ref_book2, version='2.0',
+                                                       date=localdate() + timedelta(days=1))
+        ReferenceBookElement.objects.create(ref_book_version=version1, code='J00', value='Element 1')
+        ReferenceBookElement.objects.create(ref_book_version=version2, code='J00', value='Element 2')
+        ReferenceBookElement.objects.create(ref_book_version=version3, code='J01', value='Element 3')
+
+    def test_validate_elements_bulk(self):
+        elements = [
+            {"ref_book_id": self.ref_book2.id, "code": "J01", "value": "Element 3"},
+            {"ref_book_id": self.ref_book1.id, "code": "J00", "value": "Element 1"},
+            {"ref_book_id": self.ref_book2.id, "code": "J00", "value": "Element 2"},
+            {"ref_book_id": self.ref_book2.id, "code": "J01", "value": "Element 3", "version": "2.0"},
+            {"ref_book_id": self.ref_book1.id, "code": "J00", "value": "Element 2"},
+            {"ref_book_id": 999, "code": "J00", "value": "Element 1"},
+        ]
+        self.assertEqual(validate_elements_bulk(elements), [False, True, True, True, False, False])
+
+    def test_validate_elements_bulk_query_count(self):
+        """
+        Проверка того, что текущие версии, явные версии и элементы определяются тремя запросами.
+        """
+        elements = [
+            {"ref_book_id": self.ref_book1.id, "code": "J00", "value": "Element 1"},
+            {"ref_book_id": self.ref_book2.id, "code": "J00", "value": "Element 2"},
+            {"ref_book_id": self.ref_book2.id, "code": "J01", "value": "Element 3", "version": "2.0"},
+        ]
+        with self.assertNumQueries(3):
+            validate_elements_bulk(elements)
+
+
+class RollCurrentVersionsTestCase(TestCase):
+    def setUp(self):
+        self.ref_book = ReferenceBook.objects.create(code='ref_book1', name='Справочник 1')
+        self.version1 = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0',
+                                                            date=localdate() - timedelta(days=1))
+        self.version2 = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='2.0',
+                                                            date=localdate() + timedelta(days=1))
+
+    def _current_version_id(self):
+        return ReferenceBook.objects.get(pk=self.ref_book.pk).current_version_id
+
+    def test_pointer_is_kept_on_version_writes(self):
+        self.assertEqual(self._current_version_id(), self.version1.id)
+        version3 = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='3.0', date=localdate())
+        self.assertEqual(self._current_version_id(), version3.id)
+        version3.delete()
+        self.assertEqual(self._current_version_id(), self.version1.id)
+        self.version1.delete()
+        self.assertIsNone(self._current_version_id())
+
+    def test_stale_instance_save_keeps_pointer(self):
+        ref_book = ReferenceBook.objects.get(pk=self.ref_book.pk)
+        version3 = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='3.0', date=localdate())
+        ref_book.name = 'Справочник 1.1'
+        ref_book.save()
+        self.assertEqual(self._current_version_id(), version3.id)
+
+    def test_roll_current_versions(self):
+        self.assertEqual(roll_current_versions(), 0)
+        with mock.patch('reference_books.services.localdate', return_value=self.version2.date):
+            self.assertEqual(roll_current_versions(), 1)
+        self.assertEqual(self._current_version_id(), self.version2.id)
+
+
+class GetRefBooksTestCase(TestCase):
+    def setUp(self):
+        self.ref_book1 = ReferenceBook.objects.create(code='ref_book1', name='Справочник 1')
+        self.ref_book2 = ReferenceBook.objects.create(code='ref_book2', name='Справочник 2')
+        for i in range(3):
+            ReferenceBookVersion.objects.create(ref_book=self.ref_book1, version=str(i),
+                                                date=localdate() - timedelta(days=i))
+        ReferenceBookVersion.objects.create(ref_book=self.ref_book2, version='1.0',
+                                            date=localdate() + timedelta(days=1))
+
+    def test_date_filter_uses_semi_join(self):
+        sql = str(get_queryset_of_ref_books(localdate()).query)
+        self.assertIn('EXISTS', sql)
+        self.assertNotIn('DISTINCT', sql)
+        self.assertNotIn('JOIN', sql)
+
+    def test_get_ref_books(self):
+        self.assertEqual(
+            get_ref_books(localdate()),
+            [{'id': self.ref_book1.id, 'code': 'ref_book1', 'name': 'Справочник 1'}],
+        )
+        self.assertEqual(len(get_ref_books()), 2)
+
+    def test_get_ref_books_is_cached_per_date(self):
+        get_ref_books(localdate())
+        with self.assertNumQueries(0):
+            get_ref_books(localdate())
+        with self.assertNumQueries(1):
+            get_ref_books(localdate() + timedelta(days=1))
+
+    def test_version_write_invalidates_cache(self):
+        self.assertEqual(len(get_ref_books(localdate())), 1)
+        ReferenceBookVersion.objects.create(ref_book=self.ref_book2, version='0.9', date=localdate())
+        self.assertEqual(len(get_ref_books(localdate())), 2)
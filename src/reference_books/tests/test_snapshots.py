@@ -0,0 +1,95 @@
+import tempfile
+from datetime import date
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import ChangeLogEntry, ReferenceBook, ReferenceBookVersion, ReferenceBookElement
+from ..snapshots import HEADER, SnapshotFormatError, SnapshotReader
+
+
+class SnapshotTestCase(TestCase):
+    def setUp(self):
+        self.ref_book = ReferenceBook.objects.create(code='ICD-10', name='МКБ-10')
+        self.empty_ref_book = ReferenceBook.objects.create(code='empty', name='Пустой')
+        self.old_version = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0', date='2023-01-01')
+        self.version = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='2.0', date='2024-01-01')
+        self.future_version = ReferenceBookVersion.objects.create(
+            ref_book=self.ref_book, version='3.0', date='2999-01-01',
+        )
+        ReferenceBookElement.objects.create(ref_book_version=self.old_version, code='J00', value='Ринит')
+        for code, value in [('J01', 'Синусит'), ('J00', 'Острый назофарингит'), ('A', 'Значение "с кавычками"')]:
+            ReferenceBookElement.objects.create(ref_book_version=self.version, code=code, value=value)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = Path(self.tmp_dir.name) / 'refbooks.snapshot'
+
+    def export(self):
+        call_command('export_snapshot', output=self.path, stdout=StringIO())
+
+    def test_export_and_read(self):
+        self.export()
+        with SnapshotReader(self.path) as reader:
+            self.assertEqual(reader.token, ChangeLogEntry.objects.latest('id').id)
+            self.assertEqual(list(reader.ref_books()), [
+                (self.ref_book.id, self.version.id, 'ICD-10', 'МКБ-10'),
+                (self.empty_ref_book.id, None, 'empty', 'Пустой'),
+            ])
+            self.assertEqual(list(reader.versions()), [
+                (self.old_version.id, self.ref_book.id, '1.0', date(2023, 1, 1), 1, 1),
+                (self.version.id, self.ref_book.id, '2.0', date(2024, 1, 1), 3, 3),
+                (self.future_version.id, self.ref_book.id, '3.0', date(2999, 1, 1), 0, 0),
+            ])
+            self.assertEqual(list(reader.elements(self.version.id)), [
+                ('A', 'Значение "с кавычками"'), ('J00', 'Острый назофарингит'), ('J01', 'Синусит'),
+            ])
+            self.assertEqual(list(reader.elements(self.old_version.id)), [('J00', 'Ринит')])
+            self.assertEqual(list(reader.elements(self.future_version.id)), [])
+            self.assertEqual(list(reader.elements(0)), [])
+
+    def test_export_replaces_file_atomically(self):
+        self.export()
+        with SnapshotReader(self.path) as reader:
+            ReferenceBookElement.objects.filter(ref_book_version=self.version).delete()
+            self.export()
+            # Открытый читатель продолжает видеть прежний файл.
+            self.assertEqual(len(list(reader.elements(self.version.id))), 3)
+        with SnapshotReader(self.path) as reader:
+            self.assertEqual(list(reader.elements(self.version.id)), [])
+        self.assertEqual(list(self.path.parent.iterdir()), [self.path])
+
+    def test_export_without_path(self):
+        with self.assertRaises(CommandError):
+            call_command('export_snapshot', stdout=StringIO())
+
+    def test_truncated_file(self):
+        self.export()
+        self.path.write_bytes(self.path.read_bytes()[:-1])
+        with self.assertRaises(SnapshotFormatError):
+            SnapshotReader(self.path)
+        self.path.write_bytes(b'')
+        with self.assertRaises(SnapshotFormatError):
+            SnapshotReader(self.path)
+
+    def test_streamed_snapshot(self):
+        self.export()
+        response = self.client.get(reverse('snapshot'), HTTP_ACCEPT='application/octet-stream')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        content = b''.join(response.streaming_content)
+        # Различается только время создания в заголовке.
+        expected = self.path.read_bytes()
+        self.assertEqual(content[:8], expected[:8])
+        self.assertEqual(content[HEADER.size - 8:], expected[HEADER.size - 8:])
+
+    def test_exported_file(self):
+        self.export()
+        with override_settings(REFERENCE_BOOKS={'SNAPSHOT_PATH': str(self.path)}):
+            response = self.client.get(reverse('snapshot'))
+            self.assertEqual(b''.join(response.streaming_content), self.path.read_bytes())
+            self.assertIn('refbooks.snapshot', response['Content-Disposition'])
+            response = self.client.get(reverse('snapshot'), HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
@@ -0,0 +1,101 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import localdate
+
+from ..models import ReferenceBook, ReferenceBookVersion
+from ..versions import CurrentVersionResolver
+
+
+class CurrentVersionResolverTestCase(TestCase):
+    def setUp(self):
+        self.resolver = CurrentVersionResolver()
+        self.ref_book = ReferenceBook.objects.create(code='ref_book1', name='Справочник 1')
+        self.version1 = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0',
+                                                            date=localdate() - timedelta(days=1))
+        self.version2 = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='2.0',
+                                                            date=localdate() + timedelta(days=1))
+
+    def test_get_returns_current_version(self):
+        self.assertEqual(self.resolver.get(self.ref_book.id), self.version1.id)
+
+    def test_get_returns_none_for_unknown_ref_book(self):
+        self.assertIsNone(self.resolver.get(999))
+
+    def test_get_is_cached(self):
+        self.resolver.get(self.ref_book.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolver.get(self.ref_book.id), self.version1.id)
+
+    def test_cache_expires_at_next_version_date(self):
+        """
+        Проверка того, что после наступления даты следующей версии кэш пересчитывается.
+        """
+        self.resolver.get(self.ref_book.id)
+        with mock.patch('reference_books.versions.localdate', return_value=self.version2.date):
+            self.assertEqual(self.resolver.get(self.ref_book.id), self.version2.id)
+
+    def test_get_many_uses_single_query(self):
+        ref_book2 = ReferenceBook.objects.create(code='ref_book2', name='Справочник 2')
+        with self.assertNumQueries(1):
+            result = self.resolver.get_many([self.ref_book.id, ref_book2.id])
+        self.assertEqual(result, {self.ref_book.id: self.version1.id, ref_book2.id: None})
+
+    def test_version_write_invalidates_cache(self):
+        """
+        Проверка того, что запись версии сбрасывает кэш глобального резолвера.
+        """
+        from ..versions import current_version_resolver
+
+        self.assertEqual(current_version_resolver.get(self.ref_book.id), self.version1.id)
+        version3 = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='3.0', date=localdate())
+        self.assertEqual(current_version_resolver.get(self.ref_book.id), version3.id)
+        version3.delete()
+        self.assertEqual(current_version_resolver.get(self.ref_book.id), self.version1.id)
+
+    def test_stale_pointer_falls_back_to_dates(self):
+        """
+        Проверка того, что вступившая в действие версия становится текущей до запуска roll_current_versions.
+        """
+        self.assertEqual(ReferenceBook.objects.get(pk=self.ref_book.pk).current_version_id, self.version1.id)
+        with mock.patch('reference_books.versions.localdate', return_value=self.version2.date):
+            self.assertEqual(self.resolver.get(self.ref_book.id), self.version2.id)
+
+    def test_get_version_id_on_date(self):
+        resolver = self.resolver
+        self.assertIsNone(resolver.get_version_id_on_date(self.ref_book.id, self.version1.date - timedelta(days=1)))
+        self.assertEqual(resolver.get_version_id_on_date(self.ref_book.id, self.version1.date), self.version1.id)
+        self.assertEqual(resolver.get_version_id_on_date(self.ref_book.id, localdate()), self.version1.id)
+        self.assertEqual(resolver.get_version_id_on_date(self.ref_book.id, self.version2.date), self.version2.id)
+        self.assertEqual(
+            resolver.get_version_id_on_date(self.ref_book.id, self.version2.date + timedelta(days=365)),
+            self.version2.id,
+        )
+        self.assertIsNone(resolver.get_version_id_on_date(999, localdate()))
+
+    def test_timeline_is_cached_and_invalidated(self):
+        self.resolver.get_version_id_on_date(self.ref_book.id, localdate())
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolver.get_version_id_on_date(self.ref_book.id, localdate()), self.version1.id)
+        version3 = ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='3.0', date=localdate())
+        self.assertEqual(self.resolver.get_version_id_on_date(self.ref_book.id, localdate()), version3.id)
+
+
+class ReferenceBookAdminTestCase(TestCase):
+    def test_current_version_before_roll(self):
+        ref_book = ReferenceBook.objects.create(code='ref_book1', name='Справочник 1')
+        ReferenceBookVersion.objects.create(ref_book=ref_book, version='1.0', date=localdate() - timedelta(days=1))
+        version2 = ReferenceBookVersion.objects.create(ref_book=ref_book, version='2.0',
+                                                       date=localdate() + timedelta(days=1))
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        url = reverse('admin:reference_books_referencebook_changelist')
+        self.assertContains(self.client.get(url), '<td class="field-current_version_number">1.0</td>', html=True)
+        # Дата начала действия версии 2.0 наступила, а roll_current_versions ещё не запускалась.
+        with mock.patch('reference_books.admin.localdate', return_value=version2.date):
+            response = self.client.get(url)
+        self.assertContains(response, '<td class="field-current_version_number">2.0</td>', html=True)
+        ref_book.refresh_from_db()
+        self.assertNotEqual(ref_book.current_version_id, version2.id)
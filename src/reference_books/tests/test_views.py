@@ -1,11 +1,20 @@
+import gzip
+import json
+import tempfile
+import time
 from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils.http import http_date
 from django.utils.timezone import localdate
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 
 from .. import models, serializers
+from ..caches import shared_cache
 
 
 class ReferenceBookListViewTestCase(TestCase):
@@ -128,6 +137,31 @@ class ReferenceBookElementListViewTest(TestCase):
         self.assertEqual(response.data, {'elements': []})
         self.assertEqual(response.status_code, 200)
 
+    def test_get_elements_by_date(self):
+        version2 = models.ReferenceBookVersion.objects.create(
+            ref_book=self.ref_book, version='2.0', date=localdate() + timedelta(days=10),
+        )
+        models.ReferenceBookElement.objects.create(ref_book_version=version2, code='future', value='Future')
+        url = reverse('refbooks-elements-list', kwargs={"id": self.ref_book.id})
+        for date, codes in [
+            (localdate() - timedelta(days=1), []),
+            (localdate(), ['test_element1', 'test_element2']),
+            (version2.date, ['future']),
+        ]:
+            response = self.client.get(url, {'date': date.isoformat()})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([element['code'] for element in response.data['elements']], codes)
+            # Версия на дату может смениться при добавлении версий - ответ не кэшируется как неизменяемый.
+            if codes:
+                self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    def test_get_elements_with_version_and_date(self):
+        url = reverse('refbooks-elements-list', kwargs={"id": self.ref_book.id})
+        response = self.client.get(url, {'version': '1.0', 'date': localdate().isoformat()})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date', response.data)
+        self.assertEqual(self.client.get(url, {'date': 'invalid'}).status_code, 400)
+
     def test_get_elements_by_invalid_version(self):
         url = reverse('refbooks-elements-list', kwargs={"id": self.ref_book.id})
         invalid_version = "1" * 52
@@ -143,6 +177,414 @@ class ReferenceBookElementListViewTest(TestCase):
         )
 
 
+class ReferenceBookElementListViewStreamingTest(TestCase):
+    def setUp(self):
+        self.ref_book = models.ReferenceBook.objects.create(code='test_ref_book', name='Test Reference Book')
+        self.version = models.ReferenceBookVersion.objects.create(
+            ref_book=self.ref_book,
+            version='1.0',
+            date=localdate(),
+        )
+        for i, value in enumerate(['Элемент "1"', 'back\\slash', 'line\u2028separator', 'tab\tvalue', 'простое']):
+            models.ReferenceBookElement.objects.create(ref_book_version=self.version, code=f'code{i}', value=value)
+
+    def test_streaming_response_is_byte_compatible(self):
+        url = reverse('refbooks-elements-list', kwargs={"id": self.ref_book.id})
+        response = self.client.get(url)
+        with override_settings(REFERENCE_BOOKS={'STREAM_ELEMENTS': True, 'STREAM_CHUNK_SIZE': 2}):
+            streaming_response = self.client.get(url)
+        self.assertTrue(streaming_response.streaming)
+        self.assertEqual(streaming_response['Content-Type'], response['Content-Type'])
+        self.assertEqual(b''.join(streaming_response.streaming_content), response.content)
+
+    @override_settings(REFERENCE_BOOKS={'STREAM_ELEMENTS': True})
+    def test_streaming_response_for_empty_version(self):
+        url = reverse('refbooks-elements-list', kwargs={"id": self.ref_book.id})
+        response = self.client.get(url, {'version': '2.0'})
+        self.assertEqual(b''.join(response.streaming_content), b'{"elements":[]}')
+
+    @override_settings(REFERENCE_BOOKS={'STREAM_ELEMENTS': True})
+    def test_indented_json_is_not_streamed(self):
+        url = reverse('refbooks-elements-list', kwargs={"id": self.ref_book.id})
+        response = self.client.get(url, HTTP_ACCEPT='application/json; indent=4')
+        self.assertFalse(response.streaming)
+
+
+class FastListRenderingTest(TestCase):
+    def setUp(self):
+        self.ref_book = models.ReferenceBook.objects.create(code='test_ref_book', name='Справочник "1"')
+        self.version = models.ReferenceBookVersion.objects.create(
+            ref_book=self.ref_book,
+            version='1.0',
+            date=localdate(),
+        )
+        models.ReferenceBookElement.objects.create(ref_book_version=self.version, code='code1', value='Элемент 1')
+        models.ReferenceBookElement.objects.create(ref_book_version=self.version, code='code2', value='Элемент 2')
+
+    def test_fast_path_matches_serializer_output(self):
+        """
+        Проверка того, что ответы без сериализаторов совпадают с ответами через ModelSerializer.
+        """
+        urls = [
+            reverse('referencebook-list'),
+            reverse('refbooks-elements-list', kwargs={"id": self.ref_book.id}),
+        ]
+        for url in urls:
+            with override_settings(REFERENCE_BOOKS={'FAST_LIST_RENDERING': False}):
+                response = self.client.get(url)
+            with override_settings(REFERENCE_BOOKS={'FAST_LIST_RENDERING': True}):
+                fast_response = self.client.get(url)
+            self.assertEqual(fast_response.content, response.content)
+
+
+class ReferenceBookElementListViewConditionalTest(TestCase):
+    def setUp(self):
+        self.ref_book = models.ReferenceBook.objects.create(code='test_ref_book', name='Test Reference Book')
+        self.version1 = models.ReferenceBookVersion.objects.create(
+            ref_book=self.ref_book,
+            version='1.0',
+            date=localdate() - timedelta(days=1),
+        )
+        self.version2 = models.ReferenceBookVersion.objects.create(
+            ref_book=self.ref_book,
+            version='2.0',
+            date=localdate(),
+        )
+        models.ReferenceBookElement.objects.create(ref_book_version=self.version2, code='code1', value='Value 1')
+        self.url = reverse('refbooks-elements-list', kwargs={"id": self.ref_book.id})
+
+    def test_etag_and_last_modified(self):
+        response = self.client.get(self.url)
+        self.version2.refresh_from_db()
+        self.assertEqual(response['ETag'], f'"{self.version2.id}-{self.version2.revision}"')
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        response = self.client.get(self.url, {'version': '2.0'})
+        self.assertIn('Last-Modified', response)
+
+    def test_not_modified_without_element_query(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url, {'version': '2.0'})['Last-Modified']
+        response = self.client.get(self.url, {'version': '2.0'}, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since_after_current_version_change(self):
+        # Будущая версия загружена раньше последнего изменения текущей версии.
+        version3 = models.ReferenceBookVersion.objects.create(
+            ref_book=self.ref_book, version='3.0', date=localdate() + timedelta(days=1),
+        )
+        models.ReferenceBookElement.objects.create(ref_book_version=version3, code='code3', value='Value 3')
+        models.ReferenceBookElement.objects.create(ref_book_version=self.version2, code='code2', value='Value 2')
+        self.assertEqual(len(self.client.get(self.url).data['elements']), 2)
+        if_modified_since = http_date(time.time() + 60)
+        with mock.patch('reference_books.versions.localdate', return_value=version3.date), \
+                mock.patch('reference_books.services.localdate', return_value=version3.date):
+            async_url = reverse('async-refbooks-elements-list', kwargs={"id": self.ref_book.id})
+            for url in [self.url, async_url]:
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=if_modified_since)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(json.loads(response.content)['elements'], [{'code': 'code3', 'value': 'Value 3'}])
+
+    def test_etag_changes_with_elements(self):
+        etag = self.client.get(self.url)['ETag']
+        models.ReferenceBookElement.objects.create(ref_book_version=self.version2, code='code2', value='Value 2')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['elements']), 2)
+
+    def test_saving_stale_version_keeps_revision(self):
+        stale_version = models.ReferenceBookVersion.objects.get(pk=self.version2.pk)
+        models.ReferenceBookElement.objects.create(ref_book_version=self.version2, code='code2', value='Value 2')
+        etag = self.client.get(self.url)['ETag']
+        stale_version.save()
+        models.ReferenceBookElement.objects.create(ref_book_version=self.version2, code='code3', value='Value 3')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['elements']), 3)
+        self.version2.refresh_from_db()
+        self.assertEqual(self.version2.revision, 3)
+
+    def test_past_version_is_cached_long(self):
+        response = self.client.get(self.url, {'version': '1.0'})
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000')
+
+    def test_no_etag_for_non_existing_version(self):
+        response = self.client.get(self.url, {'version': '3.0'})
+        self.assertNotIn('ETag', response)
+
+
+class ReferenceBookElementListViewPayloadTest(TestCase):
+    def setUp(self):
+        self.ref_book = models.ReferenceBook.objects.create(code='test_ref_book', name='Test Reference Book')
+        self.version = models.ReferenceBookVersion.objects.create(
+            ref_book=self.ref_book,
+            version='1.0',
+            date=localdate(),
+        )
+        for i, value in enumerate(['Элемент "1"', 'line\u2028separator', 'простое']):
+            models.ReferenceBookElement.objects.create(ref_book_version=self.version, code=f'code{i}', value=value)
+        self.url = reverse('refbooks-elements-list', kwargs={"id": self.ref_book.id})
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.payload_settings = override_settings(REFERENCE_BOOKS={'PAYLOAD_ROOT': self.tmp_dir.name})
+
+    def _get_files(self):
+        return sorted(path.name for path in Path(self.tmp_dir.name).iterdir())
+
+    def test_payload_is_byte_compatible(self):
+        response = self.client.get(self.url)
+        with self.payload_settings:
+            payload_response = self.client.get(self.url)
+        self.assertTrue(payload_response.streaming)
+        self.assertEqual(payload_response['Content-Type'], response['Content-Type'])
+        self.assertEqual(payload_response['ETag'], response['ETag'])
+        self.assertEqual(b''.join(payload_response.streaming_content), response.content)
+
+    def test_payload_is_built_once(self):
+        with self.payload_settings:
+            self.client.get(self.url)
+            # Запрос состояния версии, элементы не запрашиваются.
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.version.refresh_from_db()
+        self.assertEqual(self._get_files(), [f'{self.version.id}-{self.version.revision}.json',
+                                             f'{self.version.id}-{self.version.revision}.json.gz'])
+
+    def test_gzip_payload(self):
+        with self.payload_settings:
+            content = b''.join(self.client.get(self.url).streaming_content)
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='br;q=1.0, gzip;q=0.5')
+            identity_response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), content)
+        self.assertNotIn('Content-Encoding', identity_response)
+        # Сжатый файл - другое представление: ETag слабый, строгий ETag остаётся у несжатого ответа.
+        self.assertEqual(response['ETag'], f'W/{identity_response["ETag"]}')
+        self.assertTrue(identity_response['ETag'].startswith('"'))
+
+    def test_removed_payload_falls_back_to_rendering(self):
+        response = self.client.get(self.url)
+        # Файлы удалены сразу после сборки (сборкой следующей ревизии или удалением версии в другом процессе).
+        with self.payload_settings, mock.patch('reference_books.payloads.build_payload', return_value=True):
+            fallback_response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(fallback_response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Content-Encoding', fallback_response)
+        self.assertEqual(fallback_response.getvalue(), response.content)
+
+    def test_missing_compressed_payload_falls_back_to_identity(self):
+        with self.payload_settings:
+            content = b''.join(self.client.get(self.url).streaming_content)
+            for path in Path(self.tmp_dir.name).glob('*.gz'):
+                path.unlink()
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        # Несжатый файл сжимается при отдаче (CompressionMiddleware).
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), content)
+
+    def test_element_change_rebuilds_payload(self):
+        with self.payload_settings:
+            self.client.get(self.url)
+            models.ReferenceBookElement.objects.create(ref_book_version=self.version, code='code3', value='Новое')
+            response = self.client.get(self.url)
+        self.assertIn(b'"code3"', b''.join(response.streaming_content))
+        self.version.refresh_from_db()
+        self.assertEqual(len(self._get_files()), 2)
+        self.assertTrue(self._get_files()[0].startswith(f'{self.version.id}-{self.version.revision}.'))
+
+    def test_paginated_and_indented_responses_are_not_served_from_payload(self):
+        with self.payload_settings:
+            self.assertFalse(self.client.get(self.url, {'page_size': 2}).streaming)
+            self.assertFalse(self.client.get(self.url, HTTP_ACCEPT='application/json; indent=4').streaming)
+        self.assertEqual(self._get_files(), [])
+
+    def test_version_delete_removes_payload(self):
+        with self.payload_settings:
+            self.client.get(self.url)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.version.delete()
+        self.assertEqual(self._get_files(), [])
+
+
+class ReferenceBookElementListViewPaginationTest(TestCase):
+    def setUp(self):
+        self.ref_book = models.ReferenceBook.objects.create(code='test_ref_book', name='Test Reference Book')
+        self.version = models.ReferenceBookVersion.objects.create(
+            ref_book=self.ref_book,
+            version='1.0',
+            date=localdate(),
+        )
+        for code in ['c', 'a', 'e', 'b', 'd']:
+            models.ReferenceBookElement.objects.create(ref_book_version=self.version, code=code, value=f'Value {code}')
+        self.url = reverse('refbooks-elements-list', kwargs={"id": self.ref_book.id})
+
+    def _get_all_pages(self, **params):
+        codes = []
+        response = self.client.get(self.url, {'page_size': 2, **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            codes.append([element['code'] for element in response.data['elements']])
+            if response.data['next'] is None:
+                return codes
+            response = self.client.get(response.data['next'])
+
+    def test_pages_are_ordered_by_code(self):
+        for fast in (True, False):
+            with override_settings(REFERENCE_BOOKS={'FAST_LIST_RENDERING': fast}):
+                self.assertEqual(self._get_all_pages(), [['a', 'b'], ['c', 'd'], ['e']])
+
+    def test_pagination_with_version(self):
+        self.assertEqual(self._get_all_pages(version='1.0'), [['a', 'b'], ['c', 'd'], ['e']])
+
+    def test_without_page_size_returns_all_elements(self):
+        response = self.client.get(self.url)
+        self.assertEqual(list(response.data.keys()), ['elements'])
+        self.assertEqual(len(response.data['elements']), 5)
+
+    def test_invalid_page_size(self):
+        response = self.client.get(self.url, {'page_size': 0})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('page_size', response.data)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'page_size': 2, 'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ReferenceBookElementSearchViewTest(TestCase):
+    def setUp(self):
+        self.ref_book = models.ReferenceBook.objects.create(code='ICD-10', name='МКБ-10')
+        self.old_version = models.ReferenceBookVersion.objects.create(
+            ref_book=self.ref_book, version='1.0', date=localdate() - timedelta(days=1),
+        )
+        self.version = models.ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='2.0', date=localdate())
+        models.ReferenceBookElement.objects.create(ref_book_version=self.old_version, code='J00', value='Ринит')
+        for code, value in [
+            ('J00', 'Острый назофарингит (насморк)'),
+            ('J01', 'Острый синусит'),
+            ('J01.0', 'Острый верхнечелюстной синусит'),
+            ('J02', 'Острый фарингит'),
+            ('K21', 'Гастроэзофагеальный рефлюкс'),
+        ]:
+            models.ReferenceBookElement.objects.create(ref_book_version=self.version, code=code, value=value)
+        self.url = reverse('refbooks-elements-search', kwargs={"id": self.ref_book.id})
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [element['code'] for element in response.data['elements']]
+
+    def test_code_prefix(self):
+        self.assertEqual(self.search(q='J0'), ['J00', 'J01', 'J01.0', 'J02'])
+        self.assertEqual(self.search(q='J01'), ['J01', 'J01.0'])
+        self.assertEqual(self.search(q='J0', limit=2), ['J00', 'J01'])
+
+    def test_value_substring_ranked_after_codes(self):
+        # Без учёта регистра; сначала вхождение ближе к началу значения, затем более короткое значение.
+        self.assertEqual(self.search(q='СИНУСИТ'), ['J01', 'J01.0'])
+        self.assertEqual(self.search(q='фарингит'), ['J02', 'J00'])
+        self.assertEqual(self.search(q='Остр', limit=3), ['J01', 'J02', 'J00'])
+
+    def test_short_query_searches_codes_only(self):
+        self.assertEqual(self.search(q='Ос'), [])
+
+    def test_version(self):
+        self.assertEqual(self.search(q='ринит', version='1.0'), ['J00'])
+        self.assertEqual(self.search(q='ринит', version='3.0'), [])
+
+    def test_index_follows_element_changes(self):
+        element = models.ReferenceBookElement.objects.get(ref_book_version=self.version, code='K21')
+        element.value = 'Эзофагит'
+        element.save()
+        self.assertEqual(self.search(q='рефлюкс'), [])
+        self.assertEqual(self.search(q='эзофагит'), ['K21'])
+        element.delete()
+        self.assertEqual(self.search(q='эзофагит'), [])
+
+    def test_invalid_params(self):
+        self.assertIn('q', self.client.get(self.url).data)
+        self.assertIn('limit', self.client.get(self.url, {'q': 'J0', 'limit': 101}).data)
+
+
+class VersionDiffViewTest(TestCase):
+    def setUp(self):
+        shared_cache.clear()
+        self.ref_book = models.ReferenceBook.objects.create(code='ICD-10', name='МКБ-10')
+        self.old_version = models.ReferenceBookVersion.objects.create(
+            ref_book=self.ref_book, version='1.0', date=localdate() - timedelta(days=1),
+        )
+        self.version = models.ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='2.0', date=localdate())
+        for code, value in [('J00', 'Ринит'), ('J01', 'Синусит'), ('J02', 'Фарингит')]:
+            models.ReferenceBookElement.objects.create(ref_book_version=self.old_version, code=code, value=value)
+        for code, value in [('J00', 'Ринит'), ('J00.1', 'Острый "назофарингит"'), ('J01', 'Острый синусит')]:
+            models.ReferenceBookElement.objects.create(ref_book_version=self.version, code=code, value=value)
+        self.url = reverse('refbooks-diff', kwargs={"id": self.ref_book.id})
+
+    def get_changes(self, **params):
+        response = self.client.get(self.url, {'from': '1.0', 'to': '2.0', **params})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response.streaming_content))['changes']
+
+    def test_diff(self):
+        self.assertEqual(self.get_changes(), [
+            {"op": "add", "code": "J00.1", "value": 'Острый "назофарингит"'},
+            {"op": "change", "code": "J01", "value": "Острый синусит", "old_value": "Синусит"},
+            {"op": "remove", "code": "J02", "value": "Фарингит"},
+        ])
+        self.assertEqual([change['op'] for change in self.get_changes(**{'from': '2.0', 'to': '1.0'})],
+                         ['remove', 'change', 'add'])
+        self.assertEqual(self.get_changes(to='1.0'), [])
+
+    def test_streaming_response_is_byte_compatible(self):
+        streamed = b''.join(self.client.get(self.url, {'from': '1.0', 'to': '2.0'}).streaming_content)
+        response = self.client.get(self.url, {'from': '1.0', 'to': '2.0'}, HTTP_ACCEPT='application/json; indent=4')
+        self.assertFalse(response.streaming)
+        self.assertEqual(streamed, JSONRenderer().render(response.data))
+
+    def test_cached_until_version_changes(self):
+        self.get_changes()
+        # Из БД читаются только ревизии версий.
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.get_changes()), 3)
+        models.ReferenceBookElement.objects.create(ref_book_version=self.old_version, code='K21', value='Рефлюкс')
+        self.assertEqual(self.get_changes()[-1], {"op": "remove", "code": "K21", "value": "Рефлюкс"})
+        models.ReferenceBookElement.objects.filter(ref_book_version=self.version, code='J00.1').delete()
+        self.assertNotIn('J00.1', [change['code'] for change in self.get_changes()])
+
+    @override_settings(REFERENCE_BOOKS={'DIFF_CACHE_MAX_ROWS': 2})
+    def test_large_diff_is_not_cached(self):
+        self.assertEqual(len(self.get_changes()), 3)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(self.get_changes()), 3)
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url, {'from': '1.0', 'to': '2.0'})['ETag']
+        response = self.client.get(self.url, {'from': '1.0', 'to': '2.0'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        models.ReferenceBookElement.objects.create(ref_book_version=self.version, code='K21', value='Рефлюкс')
+        response = self.client.get(self.url, {'from': '1.0', 'to': '2.0'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_version(self):
+        response = self.client.get(self.url, {'from': '1.0', 'to': '3.0'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('refbooks-diff', kwargs={"id": 0}), {'from': '1.0', 'to': '2.0'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_params(self):
+        response = self.client.get(self.url, {'from': '1.0'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('to', response.data)
+
+
 class ElementValidationViewTestCase(TestCase):
     def setUp(self):
         self.ref_book = models.ReferenceBook.objects.create(code='ref_book1', name='Справочник 1')
@@ -167,6 +609,18 @@ class ElementValidationViewTestCase(TestCase):
             ref_book_version=self.version1,
         )
 
+    def test_validate_element_by_date(self):
+        url = reverse('element-validation', kwargs={"id": self.ref_book.id})
+        yesterday = (localdate() - timedelta(days=1)).isoformat()
+        response = self.client.get(url, {'code': 'elem3', 'value': 'Element 3', 'date': yesterday})
+        self.assertEqual(response.data, {'exists': True})
+        response = self.client.get(url, {'code': 'elem1', 'value': 'Element 1', 'date': yesterday})
+        self.assertEqual(response.data, {'exists': False})
+        response = self.client.get(url, {'code': 'elem1', 'value': 'Element 1', 'date': localdate().isoformat()})
+        self.assertEqual(response.data, {'exists': True})
+        response = self.client.get(url, {'code': 'elem3', 'value': 'Element 3', 'date': '2000-01-01'})
+        self.assertEqual(response.data, {'exists': False})
+
     def test_validate_element_with_valid_data(self):
         url = reverse("element-validation", kwargs={"id": self.ref_book.id})
         data = {"code": "elem1", "value": "Element 1"}
@@ -232,3 +686,84 @@ class ElementValidationViewTestCase(TestCase):
                 ]
             }
         )
+
+
+class ElementBatchValidationViewTestCase(TestCase):
+    def setUp(self):
+        self.ref_book = models.ReferenceBook.objects.create(code='ref_book1', name='Справочник 1')
+        self.version1 = models.ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='1.0',
+                                                                   date=localdate() - timedelta(days=1))
+        self.version2 = models.ReferenceBookVersion.objects.create(ref_book=self.ref_book, version='2.0',
+                                                                   date=localdate())
+        models.ReferenceBookElement.objects.create(code="elem1", value="Element 1", ref_book_version=self.version2)
+        models.ReferenceBookElement.objects.create(code="elem3", value="Element 3", ref_book_version=self.version1)
+
+    def test_validate_elements_batch(self):
+        url = reverse("element-batch-validation", kwargs={"id": self.ref_book.id})
+        data = {
+            "elements": [
+                {"code": "elem1", "value": "Element 1"},
+                {"code": "elem3", "value": "Element 3", "version": "1.0"},
+                {"code": "elem3", "value": "Element 3"},
+            ]
+        }
+        response = self.client.post(url, data, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "results": [
+                    {"code": "elem1", "value": "Element 1", "exists": True},
+                    {"code": "elem3", "value": "Element 3", "version": "1.0", "exists": True},
+                    {"code": "elem3", "value": "Element 3", "exists": False},
+                ]
+            }
+        )
+
+    def test_validate_elements_batch_missing_code(self):
+        url = reverse("element-batch-validation", kwargs={"id": self.ref_book.id})
+        data = {"elements": [{"code": "elem1", "value": "Element 1"}, {"value": "Element 3"}]}
+        response = self.client.post(url, data, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"elements": [{}, {"code": ["Обязательное поле."]}]})
+
+    def test_validate_elements_batch_empty_list(self):
+        url = reverse("element-batch-validation", kwargs={"id": self.ref_book.id})
+        response = self.client.post(url, {"elements": []}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class ElementBulkValidationViewTestCase(TestCase):
+    def setUp(self):
+        self.ref_book1 = models.ReferenceBook.objects.create(code='ref_book1', name='Справочник 1')
+        self.ref_book2 = models.ReferenceBook.objects.create(code='ref_book2', name='Справочник 2')
+        version1 = models.ReferenceBookVersion.objects.create(ref_book=self.ref_book1, version='1.0',
+                                                              date=localdate())
+        version2 = models.ReferenceBookVersion.objects.create(ref_book=self.ref_book2, version='1.0',
+                                                              date=localdate())
+        models.ReferenceBookElement.objects.create(code="elem1", value="Element 1", ref_book_version=version1)
+        models.ReferenceBookElement.objects.create(code="elem2", value="Element 2", ref_book_version=version2)
+
+    def test_validate_elements_bulk(self):
+        url = reverse("element-bulk-validation")
+        data = {
+            "elements": [
+                {"ref_book_id": self.ref_book2.id, "code": "elem2", "value": "Element 2"},
+                {"ref_book_id": self.ref_book1.id, "code": "elem2", "value": "Element 2", "version": "1.0"},
+                {"ref_book_id": self.ref_book1.id, "code": "elem1", "value": "Element 1"},
+            ]
+        }
+        response = self.client.post(url, data, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["exists"] for result in response.json()["results"]],
+            [True, False, True],
+        )
+        self.assertEqual(response.json()["results"][1]["ref_book_id"], self.ref_book1.id)
+
+    def test_validate_elements_bulk_missing_ref_book_id(self):
+        url = reverse("element-bulk-validation")
+        data = {"elements": [{"code": "elem1", "value": "Element 1"}]}
+        response = self.client.post(url, data, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"elements": [{"ref_book_id": ["Обязательное поле."]}]})
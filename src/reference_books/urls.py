@@ -1,6 +1,7 @@
 from django.urls import path
 from rest_framework import routers
 
+from . import async_views
 from . import views
 
 router = routers.SimpleRouter()
@@ -9,7 +10,20 @@ router.register(r'refbooks', views.ReferenceBookListView)
 router.register(r'refbooks/(?P<id>\d+)/elements', views.ReferenceBookElementListView, basename='refbooks-elements')
 
 urlpatterns = [
+    path('refbooks/validate/', views.ElementBulkValidationView.as_view(),
+         name='element-bulk-validation'),
     path('refbooks/<int:id>/check_element/', views.ElementValidationView.as_view(),
          name='element-validation'),
+    path('refbooks/<int:id>/check_elements/', views.ElementBatchValidationView.as_view(),
+         name='element-batch-validation'),
+    path('refbooks/<int:id>/diff/', views.VersionDiffView.as_view(), name='refbooks-diff'),
+    path('changes/', views.ChangeLogView.as_view(), name='changes'),
+    path('snapshot/', views.SnapshotView.as_view(), name='snapshot'),
     *router.urls,
+    # Асинхронные варианты эндпоинтов чтения для запуска под ASGI (см. async_views.py).
+    path('async/refbooks/', async_views.ref_book_list, name='async-refbooks-list'),
+    path('async/refbooks/<int:id>/elements/', async_views.ref_book_element_list,
+         name='async-refbooks-elements-list'),
+    path('async/refbooks/<int:id>/check_element/', async_views.element_validation,
+         name='async-element-validation'),
 ]
@@ -0,0 +1,268 @@
+from bisect import bisect_right
+from collections.abc import Iterable
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.db.models import DateField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import localdate
+
+from . import models
+from .caches import VersionedCache, shared_cache
+
+# Количество пар (справочник, версия) в одном запросе (SQLite ограничивает количество переменных).
+VERSION_QUERY_SIZE = 250
+
+
+def ref_book_namespace(ref_book_id: int) -> str:
+    """
+    Пространство имён данных справочника (текущей версии и id версий) в общем кэше.
+    """
+    return f'ref_book:{ref_book_id}'
+
+
+class CurrentVersionResolver:
+    """
+    Кэш идентификаторов текущих версий справочников (в общем кэше, см. caches.py).
+    Текущей является та версия, дата начала действия которой позже всех остальных версий данного справочника,
+    но не позже текущей даты.
+    Значение берётся из указателя ReferenceBook.current_version и хранится до даты начала действия
+    следующей версии справочника либо до любого изменения версий этого справочника (см. signals.py).
+    Также кэшируются id версий, запрошенных явно по номеру версии, и хронология версий справочника
+    для определения версии, действовавшей на дату.
+    """
+
+    def __init__(self, cache: VersionedCache = shared_cache):
+        self._cache = cache
+
+    def get(self, ref_book_id: int) -> int | None:
+        """
+        Получение id текущей версии справочника.
+        :ref_book_id: id справочника.
+        :return: id текущей версии либо None, если текущей версии нет.
+        """
+        ref_book_id = int(ref_book_id)
+        return self.get_many([ref_book_id]).get(ref_book_id)
+
+    def get_many(self, ref_book_ids: Iterable[int]) -> dict[int, int | None]:
+        """
+        Получение id текущих версий нескольких справочников.
+        Отсутствующие в кэше значения вычисляются одним запросом.
+        :ref_book_ids: id справочников.
+        :return: Словарь {id справочника: id текущей версии либо None}.
+                 Несуществующие справочники в словарь не попадают.
+        """
+        ref_book_ids = set(map(int, ref_book_ids))
+        if not ref_book_ids:
+            return {}
+        today = localdate()
+        # Ключи получаются до запроса к БД: если версии изменятся во время запроса,
+        # результат сохранится под устаревшими ключами и не будет прочитан.
+        keys = self._cache.make_keys((ref_book_namespace(ref_book_id), 'current') for ref_book_id in ref_book_ids)
+        keys = {ref_book_id: keys[(ref_book_namespace(ref_book_id), 'current')] for ref_book_id in ref_book_ids}
+        cached = self._cache.get_many(keys.values())
+        result = {}
+        missing = set()
+        for ref_book_id, key in keys.items():
+            entry = cached.get(key)
+            if entry is not None and (entry[1] is None or today < entry[1]):
+                result[ref_book_id] = entry[0]
+            else:
+                missing.add(ref_book_id)
+        if missing:
+            can_fill = self._cache.can_fill()
+            entries = self._load(missing, today)
+            if can_fill:
+                self._cache.set_many({keys[ref_book_id]: entry for ref_book_id, entry in entries.items()})
+            result.update({ref_book_id: version_id for ref_book_id, (version_id, _) in entries.items()})
+        return result
+
+    async def aget(self, ref_book_id: int) -> int | None:
+        """
+        Асинхронный вариант get. При отсутствии значения в кэше запрос к БД выполняется в потоке (sync_to_async).
+        """
+        ref_book_id = int(ref_book_id)
+        today = localdate()
+        key = await self._cache.amake_key(ref_book_namespace(ref_book_id), 'current')
+        entry = (await self._cache.aget_many([key])).get(key)
+        if entry is not None and (entry[1] is None or today < entry[1]):
+            return entry[0]
+        can_fill = await self._cache.acan_fill()
+        entries = await sync_to_async(self._load)({ref_book_id}, today)
+        if ref_book_id not in entries:
+            return None
+        if can_fill:
+            await self._cache.aset_many({key: entries[ref_book_id]})
+        return entries[ref_book_id][0]
+
+    def get_version_id(self, ref_book_id: int, version: str) -> int | None:
+        """
+        Получение id версии справочника по номеру версии.
+        :ref_book_id: id справочника.
+        :version: Версия справочника.
+        :return: id версии либо None, если такой версии нет.
+        """
+        ref_book_id = int(ref_book_id)
+        return self.get_version_ids([(ref_book_id, version)]).get((ref_book_id, version))
+
+    async def aget_version_id(self, ref_book_id: int, version: str) -> int | None:
+        """
+        Асинхронный вариант get_version_id.
+        """
+        ref_book_id = int(ref_book_id)
+        key = await self._cache.amake_key(ref_book_namespace(ref_book_id), f'version:{version}')
+        cached = await self._cache.aget_many([key])
+        if key in cached:
+            return cached[key]
+        can_fill = await self._cache.acan_fill()
+        version_id = await (
+            models.ReferenceBookVersion.objects
+            .filter(ref_book_id=ref_book_id, version=version)
+            .values_list('id', flat=True)
+            .afirst()
+        )
+        if version_id is not None and can_fill:
+            await self._cache.aset_many({key: version_id})
+        return version_id
+
+    def get_version_ids(self, keys: Iterable[tuple[int, str]]) -> dict[tuple[int, str], int]:
+        """
+        Получение id версий справочников по парам (id справочника, номер версии).
+        Отсутствующие в кэше значения вычисляются одним запросом (на каждые VERSION_QUERY_SIZE пар).
+        :keys: Пары (id справочника, номер версии).
+        :return: Словарь {(id справочника, номер версии): id версии}. Несуществующие версии в словарь не попадают.
+        """
+        keys = {(int(ref_book_id), version) for ref_book_id, version in keys}
+        if not keys:
+            return {}
+        cache_keys = self._cache.make_keys(
+            (ref_book_namespace(ref_book_id), f'version:{version}') for ref_book_id, version in keys
+        )
+        cache_keys = {
+            (ref_book_id, version): cache_keys[(ref_book_namespace(ref_book_id), f'version:{version}')]
+            for ref_book_id, version in keys
+        }
+        cached = self._cache.get_many(cache_keys.values())
+        result = {}
+        missing = []
+        for key, cache_key in cache_keys.items():
+            if cache_key in cached:
+                result[key] = cached[cache_key]
+            else:
+                missing.append(key)
+        if not missing:
+            return result
+        can_fill = self._cache.can_fill()
+        loaded = {}
+        for start in range(0, len(missing), VERSION_QUERY_SIZE):
+            condition = Q()
+            for ref_book_id, version in missing[start:start + VERSION_QUERY_SIZE]:
+                condition |= Q(ref_book_id=ref_book_id, version=version)
+            rows = models.ReferenceBookVersion.objects.filter(condition).values_list('ref_book_id', 'version', 'id')
+            loaded.update(((ref_book_id, version), version_id) for ref_book_id, version, version_id in rows)
+        if can_fill:
+            self._cache.set_many({cache_keys[key]: version_id for key, version_id in loaded.items()})
+        result.update(loaded)
+        return result
+
+    def get_version_id_on_date(self, ref_book_id: int, on_date: date) -> int | None:
+        """
+        Получение id версии справочника, действовавшей на дату: версии с самой поздней датой начала действия,
+        но не позже on_date.
+        :ref_book_id: id справочника.
+        :on_date: Дата.
+        :return: id версии либо None, если на эту дату версий не было.
+        """
+        ref_book_id = int(ref_book_id)
+        timeline = self._cache.get_or_set(
+            ref_book_namespace(ref_book_id), 'timeline', lambda: self._load_timeline(ref_book_id),
+        )
+        return self._find_in_timeline(timeline, on_date)
+
+    async def aget_version_id_on_date(self, ref_book_id: int, on_date: date) -> int | None:
+        """
+        Асинхронный вариант get_version_id_on_date.
+        """
+        ref_book_id = int(ref_book_id)
+        timeline = await self._cache.aget_or_set(
+            ref_book_namespace(ref_book_id), 'timeline', sync_to_async(lambda: self._load_timeline(ref_book_id)),
+        )
+        return self._find_in_timeline(timeline, on_date)
+
+    def invalidate(self, ref_book_id: int) -> None:
+        self._cache.bump(ref_book_namespace(int(ref_book_id)))
+
+    def clear(self) -> None:
+        """
+        Сброс всего общего кэша (не только версий).
+        """
+        self._cache.clear()
+
+    def _load(self, ref_book_ids: set[int], today: date) -> dict[int, tuple[int | None, date | None]]:
+        # Текущая версия берётся из указателя ReferenceBook.current_version,
+        # дата устаревания - дата следующей за ней версии.
+        next_version_date = Subquery(
+            models.ReferenceBookVersion.objects
+            .filter(
+                ref_book_id=OuterRef('id'),
+                date__gt=Coalesce(OuterRef('current_version__date'), Value(date.min), output_field=DateField()),
+            )
+            .order_by('date')
+            .values('date')[:1]
+        )
+        rows = (
+            models.ReferenceBook.objects
+            .filter(id__in=ref_book_ids)
+            .annotate(next_version_date=next_version_date)
+            .values_list('id', 'current_version_id', 'next_version_date')
+        )
+        entries = {}
+        stale_ref_book_ids = set()
+        for ref_book_id, version_id, next_version_date in rows:
+            if next_version_date is not None and next_version_date <= today:
+                # Следующая версия уже вступила в действие, но указатель ещё не передвинут
+                # (roll_current_versions не запускалась) - определяем текущую версию по датам.
+                stale_ref_book_ids.add(ref_book_id)
+            else:
+                entries[ref_book_id] = (version_id, next_version_date)
+        if stale_ref_book_ids:
+            entries.update(self._compute(stale_ref_book_ids, today))
+        return entries
+
+    @staticmethod
+    def _load_timeline(ref_book_id: int) -> tuple[list[date], list[int]]:
+        # Даты начала действия версий по возрастанию и id версий - один запрос по индексу (ref_book, date).
+        rows = (
+            models.ReferenceBookVersion.objects
+            .filter(ref_book_id=ref_book_id)
+            .order_by('date')
+            .values_list('date', 'id')
+        )
+        dates, version_ids = [], []
+        for version_date, version_id in rows:
+            dates.append(version_date)
+            version_ids.append(version_id)
+        return dates, version_ids
+
+    @staticmethod
+    def _find_in_timeline(timeline: tuple[list[date], list[int]], on_date: date) -> int | None:
+        dates, version_ids = timeline
+        index = bisect_right(dates, on_date)
+        return version_ids[index - 1] if index else None
+
+    @staticmethod
+    def _compute(ref_book_ids: set[int], today: date) -> dict[int, tuple[int | None, date | None]]:
+        versions = models.ReferenceBookVersion.objects.filter(ref_book_id=OuterRef('id'))
+        rows = (
+            models.ReferenceBook.objects
+            .filter(id__in=ref_book_ids)
+            .annotate(
+                actual_version_id=Subquery(versions.filter(date__lte=today).order_by('-date').values('id')[:1]),
+                next_version_date=Subquery(versions.filter(date__gt=today).order_by('date').values('date')[:1]),
+            )
+            .values_list('id', 'actual_version_id', 'next_version_date')
+        )
+        return {ref_book_id: (version_id, next_version_date) for ref_book_id, version_id, next_version_date in rows}
+
+
+current_version_resolver = CurrentVersionResolver()
@@ -1,29 +1,86 @@
+import os
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, inline_serializer
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.fields import BooleanField
 from rest_framework.generics import GenericAPIView
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from . import changelog
 from . import models
+from . import payloads
 from . import serializers
 from . import services
+from . import snapshots
+from .conf import get_setting
+from .pagination import ElementCursorPagination
+from .renderers import OctetStreamRenderer, can_stream_json, diff_to_dicts, stream_diff_json, stream_elements_json
+from .routers import ReplicaReadMixin
 from .schema_utils import DATE_PARAMETER, REFBOOKS_OK_EXAMPLE, REFBOOKS_BAD_REQUEST_EXAMPLE, VERSION_PARAMETER, \
-    ELEMENTS_LIST_OK_EXAMPLE, ELEMENTS_LIST_BAD_REQUEST_EXAMPLE, CODE_PARAMETER, VALUE_PARAMETER, \
+    ELEMENTS_LIST_OK_EXAMPLE, ELEMENTS_LIST_PAGE_OK_EXAMPLE, ELEMENTS_LIST_BAD_REQUEST_EXAMPLE, CODE_PARAMETER, VALUE_PARAMETER, \
     ELEMENT_VALIDATION_EXISTS_EXAMPLE, ELEMENT_VALIDATION_NOT_EXISTS_EXAMPLE, ELEMENT_VALIDATION_CODE_ERROR_EXAMPLE, \
-    ELEMENT_VALIDATION_VALUE_ERROR_EXAMPLE, ELEMENT_VALIDATION_VERSION_ERROR_EXAMPLE
+    ELEMENT_VALIDATION_VALUE_ERROR_EXAMPLE, ELEMENT_VALIDATION_VERSION_ERROR_EXAMPLE, \
+    ELEMENT_BATCH_VALIDATION_REQUEST_EXAMPLE, ELEMENT_BATCH_VALIDATION_OK_EXAMPLE, \
+    ELEMENT_BATCH_VALIDATION_BAD_REQUEST_EXAMPLE, ELEMENT_BULK_VALIDATION_REQUEST_EXAMPLE, \
+    ELEMENT_BULK_VALIDATION_OK_EXAMPLE, ELEMENT_BULK_VALIDATION_BAD_REQUEST_EXAMPLE, SEARCH_QUERY_PARAMETER, \
+    SEARCH_LIMIT_PARAMETER, VERSION_DATE_PARAMETER, DIFF_FROM_PARAMETER, DIFF_TO_PARAMETER, VERSION_DIFF_OK_EXAMPLE, \
+    CHANGES_SINCE_PARAMETER, CHANGES_LIMIT_PARAMETER, CHANGES_OK_EXAMPLE
+
+
+def get_payload_response(file, encoding):
+    """
+    Ответ с открытым готовым файлом JSON списка элементов версии справочника (см. payloads.get_payload).
+    """
+    response = FileResponse(file, content_type="application/json")
+    del response["Content-Disposition"]
+    if encoding is not None:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
 
+def get_version_etag(version_state):
+    return f'"{version_state["id"]}-{version_state["revision"]}"'
+
+
+def get_version_last_modified(version_state):
+    last_modified = version_state["last_modified"]
+    return int(last_modified.timestamp()) if last_modified is not None else None
+
+
+def set_version_cache_headers(response, version_state):
+    """
+    Установка заголовков ETag, Last-Modified (только для явно указанной версии, см. services.get_version_state)
+    и Cache-Control ответа со списком элементов версии справочника.
+    """
+    etag = get_version_etag(version_state)
+    # Сжатый готовый файл побайтово отличается от несжатого (как и в CompressionMiddleware).
+    response["ETag"] = f'W/{etag}' if response.has_header("Content-Encoding") else etag
+    last_modified = get_version_last_modified(version_state)
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    if version_state["is_past"]:
+        # Прошлые версии не меняются, их можно кэшировать надолго.
+        patch_cache_control(response, public=True, max_age=get_setting('PAST_VERSION_MAX_AGE'))
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
 
-class ReferenceBookListView(GenericViewSet):
+
+class ReferenceBookListView(ReplicaReadMixin, GenericViewSet):
     queryset = models.ReferenceBook.objects.all().only("id", "code", "name").order_by('id')
     serializer_class = serializers.ReferenceBookSerializer
 
     def get_queryset(self):
-        queryset = super().get_queryset()
         date = self.request.query_params.get("date", None)
-        if date is not None:
-            queryset = queryset.filter(referencebookversion__date__lte=date).distinct()
-        return queryset
+        return services.get_queryset_of_ref_books(date)
 
     @extend_schema(
         parameters=[
@@ -46,31 +103,40 @@ class ReferenceBookListView(GenericViewSet):
         query_params_serializer = serializers.ReferenceBookListViewQueryParamSerializer(data=self.request.query_params)
         if not query_params_serializer.is_valid():
             return Response(query_params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if get_setting('FAST_LIST_RENDERING'):
+            # Поля те же, что и в ReferenceBookSerializer, но без создания сериализатора на каждую строку.
+            data = {"refbooks": services.get_ref_books(query_params_serializer.validated_data.get("date"))}
+            return Response(data)
         queryset = self.filter_queryset(self.get_queryset())
         serializer = self.get_serializer(queryset, many=True)
         data = {"refbooks": serializer.data}
         return Response(data)
 
 
-class ReferenceBookElementListView(GenericViewSet):
+class ReferenceBookElementListView(ReplicaReadMixin, GenericViewSet):
     serializer_class = serializers.ReferenceBookElementSerializer
+    pagination_class = ElementCursorPagination
 
     def get_queryset(self):
         ref_book_id = self.kwargs["id"]
         version = self.request.query_params.get("version", None)
-        queryset = services.get_queryset_of_ref_book_elements(ref_book_id, version)
+        # Дата из проверенных параметров запроса (см. list).
+        date = getattr(self, "version_date", None)
+        queryset = services.get_queryset_of_ref_book_elements(ref_book_id, version, date)
         return queryset
 
     @extend_schema(
         parameters=[
             VERSION_PARAMETER,
+            VERSION_DATE_PARAMETER,
         ],
         responses={
-            status.HTTP_200_OK: serializers.ReferenceBookElementSerializer,
+            status.HTTP_200_OK: serializers.ReferenceBookElementListViewResponseSerializer,
             status.HTTP_400_BAD_REQUEST: serializers.ReferenceBookElementListViewQueryParamSerializer,
         },
         examples=[
             ELEMENTS_LIST_OK_EXAMPLE,
+            ELEMENTS_LIST_PAGE_OK_EXAMPLE,
             ELEMENTS_LIST_BAD_REQUEST_EXAMPLE,
         ]
     )
@@ -78,19 +144,87 @@ class ReferenceBookElementListView(GenericViewSet):
         """
         Получение элементов заданного справочника
         """
-        # Если нужен будет пагинатор, убрать этот метод, использовать mixins.ListModelMixin,
-        # и в пагинаторе, вместо "results", указать "elements".
+        # Постраничная выдача включается параметром page_size (см. ElementCursorPagination),
+        # без него возвращаются все элементы версии.
         query_params_serializer = serializers.ReferenceBookElementListViewQueryParamSerializer(
             data=self.request.query_params)
         if not query_params_serializer.is_valid():
             return Response(query_params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        self.version_date = query_params_serializer.validated_data.get("date")
+        version_state = services.get_version_state(
+            self.kwargs["id"], query_params_serializer.data.get("version"), self.version_date,
+        )
+        if version_state is not None:
+            # Ответ 304 отдаётся до запроса элементов.
+            not_modified_response = get_conditional_response(
+                request,
+                etag=get_version_etag(version_state),
+                last_modified=get_version_last_modified(version_state),
+            )
+            if not_modified_response is not None:
+                return set_version_cache_headers(not_modified_response, version_state)
+        response = self._get_elements_response(request, version_state)
+        if version_state is not None:
+            set_version_cache_headers(response, version_state)
+        return response
+
+    @extend_schema(
+        parameters=[
+            SEARCH_QUERY_PARAMETER,
+            SEARCH_LIMIT_PARAMETER,
+            VERSION_PARAMETER,
+        ],
+        responses={
+            status.HTTP_200_OK: inline_serializer(
+                'ElementSearchSerializer', {"elements": serializers.ReferenceBookElementSerializer(many=True)},
+            ),
+            status.HTTP_400_BAD_REQUEST: serializers.ElementSearchViewQueryParamSerializer,
+        },
+    )
+    @action(detail=False, pagination_class=None)
+    def search(self, request, *args, **kwargs):
+        """
+        Поиск элементов заданного справочника для подсказок при вводе: сначала элементы, код которых
+        начинается со строки поиска, затем элементы, значение которых её содержит.
+        """
+        query_params_serializer = serializers.ElementSearchViewQueryParamSerializer(data=self.request.query_params)
+        if not query_params_serializer.is_valid():
+            return Response(query_params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        elements = services.search_elements(self.kwargs["id"], **query_params_serializer.validated_data)
+        return Response({"elements": elements})
+
+    def _get_elements_response(self, request, version_state):
+        paginated = self.paginator.get_page_size(request) is not None
+        if not paginated and version_state is not None and can_stream_json(request):
+            # Готовый файл JSON версии (см. payloads.py) отдаётся без запроса элементов.
+            payload = payloads.get_payload(
+                version_state["id"], version_state["revision"], request.META.get("HTTP_ACCEPT_ENCODING", ""),
+            )
+            if payload is not None:
+                return get_payload_response(*payload)
         queryset = self.filter_queryset(self.get_queryset())
+        if not paginated and get_setting('STREAM_ELEMENTS') and can_stream_json(request):
+            chunk_size = get_setting('STREAM_CHUNK_SIZE')
+            # Элементы читаются при отдаче ответа, уже после выхода из представления, -
+            # БД (реплика) фиксируется сейчас.
+            rows = queryset.using(queryset.db).values_list('code', 'value').iterator(chunk_size=chunk_size)
+            return StreamingHttpResponse(stream_elements_json(rows, chunk_size), content_type='application/json')
+        if get_setting('FAST_LIST_RENDERING'):
+            # Поля те же, что и в ReferenceBookElementSerializer, но без создания сериализатора на каждую строку.
+            if paginated:
+                return self.get_paginated_response(self.paginate_queryset(queryset.values("code", "value")))
+            version = self.request.query_params.get("version", None)
+            data = {"elements": services.get_ref_book_elements(self.kwargs["id"], version, self.version_date)}
+            return Response(data)
+        if paginated:
+            serializer = self.get_serializer(self.paginate_queryset(queryset), many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(queryset, many=True)
         data = {"elements": serializer.data}
         return Response(data)
 
 
-class ElementValidationView(GenericAPIView):
+class ElementValidationView(ReplicaReadMixin, GenericAPIView):
     """
     Валидация элемента справочника - это проверка на то,
     что элемент с данным кодом и значением присутствует в указанной версии справочника.
@@ -101,6 +235,7 @@ class ElementValidationView(GenericAPIView):
             CODE_PARAMETER,
             VALUE_PARAMETER,
             VERSION_PARAMETER,
+            VERSION_DATE_PARAMETER,
         ],
         responses={
             status.HTTP_200_OK: inline_serializer('ElementValidationSerializer', {"exists": BooleanField()}),
@@ -120,5 +255,167 @@ class ElementValidationView(GenericAPIView):
             data=self.request.query_params)
         if not query_params_serializer.is_valid():
             return Response(query_params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        exists = services.validate_elements(ref_book_id=ref_book_id, **query_params_serializer.data)
+        exists = services.validate_elements(ref_book_id=ref_book_id, **query_params_serializer.validated_data)
         return Response({"exists": exists})
+
+
+class VersionDiffView(ReplicaReadMixin, GenericAPIView):
+    """
+    Различия двух версий справочника: добавленные, изменённые и удалённые элементы.
+    """
+
+    @extend_schema(
+        parameters=[
+            DIFF_FROM_PARAMETER,
+            DIFF_TO_PARAMETER,
+        ],
+        responses={
+            status.HTTP_200_OK: serializers.VersionDiffViewResponseSerializer,
+            status.HTTP_400_BAD_REQUEST: serializers.VersionDiffViewQueryParamSerializer,
+        },
+        examples=[
+            VERSION_DIFF_OK_EXAMPLE,
+        ],
+    )
+    def get(self, request, *args, **kwargs):
+        query_params_serializer = serializers.VersionDiffViewQueryParamSerializer(data=self.request.query_params)
+        if not query_params_serializer.is_valid():
+            return Response(query_params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = query_params_serializer.validated_data
+        diff = services.get_version_diff(self.kwargs["id"], params["from"], params["to"])
+        if diff is None:
+            return Response({"detail": "Версия не найдена."}, status=status.HTTP_404_NOT_FOUND)
+        state_key, rows = diff
+        etag = f'"diff-{state_key}"'
+        # Различия не вычисляются, если у клиента они уже есть.
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            if can_stream_json(request):
+                chunk_size = get_setting('STREAM_CHUNK_SIZE')
+                response = StreamingHttpResponse(stream_diff_json(rows, chunk_size), content_type='application/json')
+            else:
+                response = Response({"changes": diff_to_dicts(rows)})
+        response["ETag"] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class ElementBatchValidationView(GenericAPIView):
+    """
+    Пакетная валидация элементов справочника - проверка сразу нескольких пар (код, значение)
+    с необязательным указанием версии для каждой пары.
+    """
+
+    @extend_schema(
+        request=serializers.ElementBatchValidationViewRequestSerializer,
+        responses={
+            status.HTTP_200_OK: serializers.ElementBatchValidationViewResponseSerializer,
+            status.HTTP_400_BAD_REQUEST: serializers.ElementBatchValidationViewRequestSerializer,
+        },
+        examples=[
+            ELEMENT_BATCH_VALIDATION_REQUEST_EXAMPLE,
+            ELEMENT_BATCH_VALIDATION_OK_EXAMPLE,
+            ELEMENT_BATCH_VALIDATION_BAD_REQUEST_EXAMPLE,
+        ],
+    )
+    def post(self, request, *args, **kwargs):
+        ref_book_id = self.kwargs["id"]
+        request_serializer = serializers.ElementBatchValidationViewRequestSerializer(data=self.request.data)
+        if not request_serializer.is_valid():
+            return Response(request_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        elements = request_serializer.validated_data["elements"]
+        exists = services.validate_elements_batch(ref_book_id=ref_book_id, elements=elements)
+        results = [{**element, "exists": element_exists} for element, element_exists in zip(elements, exists)]
+        return Response({"results": results})
+
+
+class ElementBulkValidationView(GenericAPIView):
+    """
+    Пакетная валидация элементов нескольких справочников - проверка всех элементов документа одним запросом.
+    Для каждого элемента указывается id справочника и, при необходимости, версия.
+    """
+
+    @extend_schema(
+        request=serializers.ElementBulkValidationViewRequestSerializer,
+        responses={
+            status.HTTP_200_OK: serializers.ElementBulkValidationViewResponseSerializer,
+            status.HTTP_400_BAD_REQUEST: serializers.ElementBulkValidationViewRequestSerializer,
+        },
+        examples=[
+            ELEMENT_BULK_VALIDATION_REQUEST_EXAMPLE,
+            ELEMENT_BULK_VALIDATION_OK_EXAMPLE,
+            ELEMENT_BULK_VALIDATION_BAD_REQUEST_EXAMPLE,
+        ],
+    )
+    def post(self, request, *args, **kwargs):
+        request_serializer = serializers.ElementBulkValidationViewRequestSerializer(data=self.request.data)
+        if not request_serializer.is_valid():
+            return Response(request_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        elements = request_serializer.validated_data["elements"]
+        exists = services.validate_elements_bulk(elements=elements)
+        results = [{**element, "exists": element_exists} for element, element_exists in zip(elements, exists)]
+        return Response({"results": results})
+
+
+class ChangeLogView(ReplicaReadMixin, GenericAPIView):
+    """
+    Журнал изменений справочников, версий и элементов для инкрементальной синхронизации:
+    клиент передаёт в since значение next предыдущего ответа и получает только изменения после него.
+    Удаление справочника или версии означает удаление и вложенных в них объектов.
+    """
+
+    @extend_schema(
+        parameters=[
+            CHANGES_SINCE_PARAMETER,
+            CHANGES_LIMIT_PARAMETER,
+        ],
+        responses={
+            status.HTTP_200_OK: serializers.ChangeLogViewResponseSerializer,
+            status.HTTP_400_BAD_REQUEST: serializers.ChangeLogViewQueryParamSerializer,
+        },
+        examples=[
+            CHANGES_OK_EXAMPLE,
+        ],
+    )
+    def get(self, request, *args, **kwargs):
+        query_params_serializer = serializers.ChangeLogViewQueryParamSerializer(data=self.request.query_params)
+        if not query_params_serializer.is_valid():
+            return Response(query_params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        since, limit = query_params_serializer.validated_data["since"], query_params_serializer.validated_data["limit"]
+        changes, has_more = changelog.get_changes(since, limit)
+        return Response({
+            "changes": changes,
+            "next": changes[-1]["token"] if changes else since,
+            "has_more": has_more,
+        })
+
+
+class SnapshotView(ReplicaReadMixin, GenericAPIView):
+    """
+    Снимок всех справочников, версий и элементов в двоичном формате (см. snapshots.py).
+    Отдаётся файл, записанный командой export_snapshot, а если он не задан (SNAPSHOT_PATH) или ещё не создан -
+    снимок, формируемый при запросе.
+    """
+    renderer_classes = [OctetStreamRenderer, JSONRenderer]
+
+    @extend_schema(
+        responses={
+            (status.HTTP_200_OK, 'application/octet-stream'): OpenApiTypes.BINARY,
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        path = get_setting('SNAPSHOT_PATH')
+        if path is not None and os.path.exists(path):
+            stat = os.stat(path)
+            etag = f'"snapshot-{stat.st_mtime_ns}-{stat.st_size}"'
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = FileResponse(open(path, "rb"), content_type="application/octet-stream")
+            response["ETag"] = etag
+        else:
+            # Запросы выполняются при отдаче ответа, после выхода из представления, поэтому БД фиксируется здесь.
+            using = models.ReferenceBook.objects.all().db
+            response = StreamingHttpResponse(snapshots.iter_snapshot(using), content_type="application/octet-stream")
+        response["Content-Disposition"] = 'attachment; filename="refbooks.snapshot"'
+        patch_cache_control(response, no_cache=True)
+        return response